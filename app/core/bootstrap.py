@@ -8,12 +8,15 @@ from app.core.config import settings
 from app.modules.questions.repository import QuestionRepository
 from app.modules.questions.schemas import QuestionCreate, OptionCreate
 from app.modules.questions.models import DifficultyLevel
+from app.modules.ranking.repository import RankingRepository
+from app.modules.trivias.models import TriviaAssignment, AssignmentStatus
 
 logger = LoggerSetup.get_logger(__name__)
 
 def create_initial_data(db: Session):
     """
     Crea datos iniciales: Superusuario y Preguntas Demo.
+    Además hace el backfill del ranking materializado si aún está vacío.
     """
     # ----------------------------------------------------------------
     # 1. CREACIÓN DE SUPER ADMIN
@@ -86,4 +89,16 @@ def create_initial_data(db: Session):
             except Exception as e:
                 logger.error(f"Error creando pregunta demo: {e}")
         else:
-            logger.info(f"La pregunta '{q_data.text[:30]}...' ya existe.")
\ No newline at end of file
+            logger.info(f"La pregunta '{q_data.text[:30]}...' ya existe.")
+
+    # ----------------------------------------------------------------
+    # 3. BACKFILL DEL RANKING MATERIALIZADO (player_scores)
+    # ----------------------------------------------------------------
+    ranking_repo = RankingRepository(db)
+    if ranking_repo.count_player_scores() == 0:
+        has_completed = db.query(TriviaAssignment.id).filter(
+            TriviaAssignment.status == AssignmentStatus.COMPLETED
+        ).first()
+        if has_completed:
+            players = ranking_repo.rebuild_player_scores()
+            logger.info(f"Ranking materializado reconstruido para {players} jugador(es).")
@@ -16,6 +16,25 @@ class Settings:
     POSTGRES_SERVER: str = os.getenv("POSTGRES_SERVER", "db") # "db" es el nombre del servicio en docker-compose
     POSTGRES_PORT: str = os.getenv("POSTGRES_PORT", "5432")
     POSTGRES_DB: str = os.getenv("POSTGRES_DB", "talatrivia_db")
+    # Réplicas de lectura (URLs separadas por coma). Vacío = todo va al primario
+    DATABASE_REPLICA_URLS: list[str] = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+    # Segundos que un cliente lee del primario después de escribir (lag de replicación)
+    REPLICA_STICKY_SECONDS: int = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+    # Aplicar migraciones al arrancar (desactivar si se ejecutan como paso de deploy)
+    RUN_MIGRATIONS_ON_STARTUP: bool = os.getenv("RUN_MIGRATIONS_ON_STARTUP", "true").lower() == "true"
+    # Pool de conexiones
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "10"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Métricas SQL por petición (Server-Timing, consultas lentas y repetidas)
+    SQL_METRICS_ENABLED: bool = os.getenv("SQL_METRICS_ENABLED", "true").lower() == "true"
+    SQL_SLOW_QUERY_MS: int = int(os.getenv("SQL_SLOW_QUERY_MS", "200"))
+    # Veces que una misma sentencia puede repetirse en una petición antes de considerarse N+1
+    SQL_REPEATED_STATEMENT_THRESHOLD: int = int(os.getenv("SQL_REPEATED_STATEMENT_THRESHOLD", "5"))
+    # Modo estricto (desarrollo/tests): superar el umbral lanza RepeatedStatementError
+    SQL_STRICT_MODE: bool = os.getenv("SQL_STRICT_MODE", "false").lower() == "true"
     # Superuser inicial
     FIRST_SUPERUSER_EMAIL: str = os.getenv("FIRST_SUPERUSER_EMAIL", "admin@talana.com")
     FIRST_SUPERUSER_PASSWORD: str = os.getenv("FIRST_SUPERUSER_PASSWORD", "admin123")
@@ -25,6 +44,35 @@ class Settings:
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+    # Hashing de contraseñas (pool de procesos dedicado)
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+    # Si BCRYPT_ROUNDS no se define, se calibra al arrancar para tardar ~BCRYPT_TARGET_MS
+    BCRYPT_ROUNDS: int | None = int(os.getenv("BCRYPT_ROUNDS")) if os.getenv("BCRYPT_ROUNDS") else None
+    BCRYPT_TARGET_MS: int = int(os.getenv("BCRYPT_TARGET_MS", "250"))
+
+    # Cachés en memoria (por worker)
+    ANSWER_KEY_CACHE_SIZE: int = int(os.getenv("ANSWER_KEY_CACHE_SIZE", "256"))
+    ANSWER_KEY_CACHE_TTL_SECONDS: int = int(os.getenv("ANSWER_KEY_CACHE_TTL_SECONDS", "300"))
+    PLAY_PAYLOAD_CACHE_SIZE: int = int(os.getenv("PLAY_PAYLOAD_CACHE_SIZE", "256"))
+    PLAY_PAYLOAD_CACHE_TTL_SECONDS: int = int(os.getenv("PLAY_PAYLOAD_CACHE_TTL_SECONDS", "300"))
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    # Cada cuánto se recarga el leaderboard desde la DB (cambios de otros workers)
+    LEADERBOARD_REFRESH_SECONDS: int = int(os.getenv("LEADERBOARD_REFRESH_SECONDS", "60"))
+
+    # Importación masiva de preguntas: filas por transacción
+    QUESTION_IMPORT_BATCH_SIZE: int = int(os.getenv("QUESTION_IMPORT_BATCH_SIZE", "500"))
+    # Búsqueda sin PostgreSQL: cada cuánto se recarga el índice en memoria (cambios de otros workers)
+    QUESTION_SEARCH_REFRESH_SECONDS: int = int(os.getenv("QUESTION_SEARCH_REFRESH_SECONDS", "60"))
+
+    # Workers en segundo plano
+    SUBMISSION_WORKERS: int = int(os.getenv("SUBMISSION_WORKERS", "4"))
+    # Creación de asignaciones: usuarios por INSERT ... SELECT y tope para hacerlo en la petición
+    ASSIGNMENT_WORKERS: int = int(os.getenv("ASSIGNMENT_WORKERS", "2"))
+    ASSIGNMENT_CHUNK_SIZE: int = int(os.getenv("ASSIGNMENT_CHUNK_SIZE", "5000"))
+    ASSIGNMENT_INLINE_LIMIT: int = int(os.getenv("ASSIGNMENT_INLINE_LIMIT", "500"))
+
     @property
     def DATABASE_URL(self) -> str:
         
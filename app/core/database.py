@@ -1,12 +1,278 @@
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, declarative_base
+import bisect
+import itertools
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Callable, Generic, List, Optional, TypeVar
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.datastructures import MutableHeaders
 from app.core.config import settings
 from app.core.logger import LoggerSetup # <--- Importamos nuestro centralizador
 
 # Obtenemos el logger con el nombre de este archivo
 logger = LoggerSetup.get_logger(__name__)
 
-engine = create_engine(settings.DATABASE_URL)
+
+class PoolStats:
+    """Métricas acumuladas del pool de conexiones (espera al pedir conexión y fallos)."""
+    # Límites superiores (ms) de los buckets del histograma de espera
+    WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.connections_created = 0
+            self.invalidations = 0
+            self.wait_total_ms = 0.0
+            self.wait_max_ms = 0.0
+            self.wait_histogram = [0] * (len(self.WAIT_BUCKETS_MS) + 1)
+
+    def record_wait(self, wait_ms: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            self.wait_histogram[bisect.bisect_left(self.WAIT_BUCKETS_MS, wait_ms)] += 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.checkout_failures += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connections_created += 1
+
+    def record_invalidation(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            labels = [f"<={b}ms" for b in self.WAIT_BUCKETS_MS] + [f">{self.WAIT_BUCKETS_MS[-1]}ms"]
+            return {
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "connections_created": self.connections_created,
+                "invalidations": self.invalidations,
+                "wait_avg_ms": round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max_ms, 3),
+                "wait_histogram": dict(zip(labels, self.wait_histogram)),
+            }
+
+
+pool_stats = PoolStats()  # Engine síncrono (y réplicas)
+async_pool_stats = PoolStats()  # Engine asíncrono (y réplicas)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mide cuánto espera cada checkout y cuenta los timeouts."""
+
+    stats = pool_stats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_failure()
+            raise
+        self.stats.record_wait((time.perf_counter() - start) * 1000)
+        return conn
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """Versión para el engine asíncrono (AsyncAdaptedQueuePool), con sus propias métricas."""
+
+    stats = async_pool_stats
+
+
+def instrument_pool(sync_engine, stats: PoolStats) -> None:
+    """Cuenta las conexiones nuevas e invalidadas del pool del engine."""
+    event.listen(sync_engine, "connect", lambda dbapi_connection, connection_record: stats.record_connect())
+    event.listen(
+        sync_engine, "invalidate",
+        lambda dbapi_connection, connection_record, exception: stats.record_invalidation()
+    )
+
+
+def _engine_options(url: str) -> dict:
+    """Opciones del pool según Settings (SQLite en memoria usa su propio pool)."""
+    if url.startswith("sqlite") and ":memory:" in url:
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+# --- Métricas SQL por petición ---
+
+class RepeatedStatementError(RuntimeError):
+    """Modo estricto: la petición repitió la misma sentencia SQL (posible N+1)."""
+
+
+class QueryStats:
+    """Consultas ejecutadas durante una petición: cantidad, tiempo total y la más lenta."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.statements: Counter = Counter()
+
+    def before(self, statement: str) -> None:
+        with self._lock:
+            self.statements[statement] += 1
+            repeated = self.statements[statement]
+        if settings.SQL_STRICT_MODE and repeated > settings.SQL_REPEATED_STATEMENT_THRESHOLD:
+            raise RepeatedStatementError(
+                f"Sentencia ejecutada {repeated} veces en la misma petición: {statement}"
+            )
+
+    def after(self, statement: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            if elapsed_ms > self.slowest_ms:
+                self.slowest_ms = elapsed_ms
+                self.slowest_statement = statement
+
+    def repeated(self) -> dict:
+        """Sentencias que superaron el umbral de repeticiones."""
+        threshold = settings.SQL_REPEATED_STATEMENT_THRESHOLD
+        return {sql: n for sql, n in self.statements.items() if n > threshold}
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_ms:.1f};desc="{self.count} queries"'
+
+
+_current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_query_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_query_stats.get()
+    if stats is None:
+        return
+    stats.before(statement)
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_query_stats.get()
+    start = getattr(context, "_query_start", None)
+    if stats is None or start is None:
+        return
+    stats.after(statement, (time.perf_counter() - start) * 1000)
+
+
+def instrument_engine(sync_engine) -> None:
+    """Registra las consultas del engine en las métricas de la petición en curso."""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryMetricsMiddleware:
+    """
+    Middleware ASGI que mide las consultas SQL de cada petición.
+
+    Agrega `Server-Timing` (tiempo total en DB) y `X-DB-Query-Count` a la
+    respuesta, y registra en el log la sentencia más lenta si supera
+    SQL_SLOW_QUERY_MS y las sentencias repetidas (posibles N+1).
+
+    Las rutas síncronas (threadpool) y `AsyncSession.run_sync` copian el
+    contexto, así que ven el mismo QueryStats.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.SQL_METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_query_stats.set(stats)
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing())
+                headers.append("X-DB-Query-Count", str(stats.count))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _current_query_stats.reset(token)
+            self._report(scope, stats)
+
+    @staticmethod
+    def _report(scope, stats: QueryStats) -> None:
+        route = f"{scope.get('method')} {scope.get('path')}"
+        logger.debug(f"{route}: {stats.count} consultas, {stats.total_ms:.1f} ms en DB")
+        if stats.slowest_ms > settings.SQL_SLOW_QUERY_MS:
+            logger.warning(f"{route}: consulta lenta ({stats.slowest_ms:.1f} ms): {stats.slowest_statement}")
+        for statement, times in stats.repeated().items():
+            logger.warning(f"{route}: sentencia repetida {times} veces (posible N+1): {statement}")
+
+
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL))
+instrument_engine(engine)
+instrument_pool(engine, pool_stats)
+
+
+def get_pool_status() -> dict:
+    """
+    Estado actual de los pools del primario más las métricas acumuladas:
+    `sync` (rutas síncronas) y `async` (rutas `async def`: juego, ranking, autenticación).
+    """
+    return {
+        "sync": _pool_status(engine.pool, pool_stats),
+        "async": _pool_status(async_engine.sync_engine.pool, async_pool_stats),
+    }
+
+
+def _pool_status(pool, stats: PoolStats) -> dict:
+    status = {
+        "pool_class": type(pool).__name__,
+        "size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "timeout_seconds": settings.DB_POOL_TIMEOUT,
+        "recycle_seconds": settings.DB_POOL_RECYCLE,
+        "pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if isinstance(pool, QueuePool):
+        status.update({
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+        })
+    status.update(stats.snapshot())
+    return status
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -17,6 +283,171 @@ def get_db():
     finally:
         db.close()
 
+
+# --- Acceso asíncrono (rutas `async def`) ---
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_database_url(url: str) -> str:
+    """Misma base de datos con el driver asíncrono (asyncpg / aiosqlite)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise NotImplementedError(f"Sin driver asíncrono para el motor '{backend}'")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def _async_engine_options(url: str) -> dict:
+    options = _engine_options(url)
+    if "poolclass" in options:
+        options["poolclass"] = InstrumentedAsyncQueuePool  # El engine asíncrono requiere un pool asyncio
+    return options
+
+
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL), **_async_engine_options(settings.DATABASE_URL)
+)
+instrument_engine(async_engine.sync_engine)
+instrument_pool(async_engine.sync_engine, async_pool_stats)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+T = TypeVar("T")
+S = TypeVar("S")
+
+
+class AsyncServiceRunner(Generic[S]):
+    """
+    Ejecuta un servicio (repositorios síncronos) sobre una AsyncSession.
+
+    `AsyncSession.run_sync` corre la función con una Session síncrona cuyas
+    consultas usan el driver asíncrono, así que la ruta no ocupa un hilo del
+    threadpool mientras espera a la base de datos y la lógica de negocio no
+    se duplica. Lo que se devuelva debe estar ya cargado (no lazy loads).
+
+        result = await runner(lambda service: service.get_my_trivias(user_id))
+    """
+
+    def __init__(self, db: AsyncSession, factory: Callable[[Session], S]):
+        self.db = db
+        self.factory = factory
+
+    async def __call__(self, fn: Callable[[S], T]) -> T:
+        return await self.db.run_sync(lambda session: fn(self.factory(session)))
+
+# --- Réplicas de lectura ---
+
+# Cookie con el instante (epoch) hasta el que el cliente debe leer del primario
+PRIMARY_STICKY_COOKIE = "db_primary_until"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class ReplicaRouter:
+    """
+    Reparte las lecturas entre las réplicas configuradas (round-robin).
+
+    Para no perder lecturas propias (read-after-write) por el lag de
+    replicación, tras una escritura exitosa el cliente recibe la cookie
+    PRIMARY_STICKY_COOKIE y sus lecturas vuelven al primario durante
+    `sticky_seconds` (ver `sticky_primary_middleware`).
+    """
+
+    def __init__(self, urls: List[str], sticky_seconds: int):
+        self.urls = urls
+        self.sticky_seconds = sticky_seconds
+        self._engines = [create_engine(url, **_engine_options(url)) for url in urls]
+        self._async_engines = [
+            create_async_engine(async_database_url(url), **_async_engine_options(url)) for url in urls
+        ]
+        for e in self._engines:
+            instrument_engine(e)
+            instrument_pool(e, pool_stats)
+        for e in self._async_engines:
+            instrument_engine(e.sync_engine)
+            instrument_pool(e.sync_engine, async_pool_stats)
+        self._factories = [
+            sessionmaker(autocommit=False, autoflush=False, bind=e) for e in self._engines
+        ]
+        self._async_factories = [
+            async_sessionmaker(e, autoflush=False, expire_on_commit=False) for e in self._async_engines
+        ]
+        self._counter = itertools.count()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._factories)
+
+    def _next(self) -> int:
+        return next(self._counter) % len(self._factories)
+
+    def session(self) -> Session:
+        return self._factories[self._next()]()
+
+    def async_session(self) -> AsyncSession:
+        return self._async_factories[self._next()]()
+
+    def wants_primary(self, request: Request) -> bool:
+        """True si el cliente escribió hace menos de `sticky_seconds`."""
+        until = request.cookies.get(PRIMARY_STICKY_COOKIE)
+        try:
+            return until is not None and float(until) > time.time()
+        except ValueError:
+            return False
+
+    async def dispose(self) -> None:
+        for e in self._engines:
+            e.dispose()
+        for e in self._async_engines:
+            await e.dispose()
+
+
+replicas = ReplicaRouter(settings.DATABASE_REPLICA_URLS, settings.REPLICA_STICKY_SECONDS)
+
+
+def get_read_db(request: Request, primary: Session = Depends(get_db)):
+    """
+    Sesión para endpoints de solo lectura: una réplica si hay configuradas,
+    o el primario (sin réplicas, o si el cliente acaba de escribir).
+    """
+    if not replicas.enabled or replicas.wants_primary(request):
+        yield primary
+        return
+    db = replicas.session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request, primary: AsyncSession = Depends(get_async_db)):
+    """Versión asíncrona de `get_read_db`."""
+    if not replicas.enabled or replicas.wants_primary(request):
+        yield primary
+        return
+    async with replicas.async_session() as db:
+        yield db
+
+
+async def sticky_primary_middleware(request: Request, call_next):
+    """Tras una escritura exitosa, fija las lecturas del cliente al primario por unos segundos."""
+    response = await call_next(request)
+    if replicas.enabled and request.method in WRITE_METHODS and response.status_code < 400:
+        response.set_cookie(
+            PRIMARY_STICKY_COOKIE,
+            str(time.time() + replicas.sticky_seconds),
+            max_age=replicas.sticky_seconds,
+            httponly=True,
+            samesite="lax"
+        )
+    return response
+
+
 def check_db_connection():
     try:
         with engine.connect() as connection:
@@ -24,4 +455,17 @@ def check_db_connection():
             logger.info("Conexión a la Base de Datos exitosa.")
     except Exception as e:
         logger.error(f" Error conectando a la Base de Datos: {e}")
-        raise e
\ No newline at end of file
+        raise e
+def dialect_insert(db: Session, model):
+    """
+    INSERT con soporte de `ON CONFLICT` (upsert) según el motor de la sesión.
+    Soporta PostgreSQL (producción) y SQLite (desarrollo y tests).
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upsert no soportado para el motor '{dialect}'")
+    return insert(model)
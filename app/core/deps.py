@@ -1,20 +1,24 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import APIKeyCookie # <--- Usamos este esquema
 from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.modules.users.repository import UserRepository
-from app.modules.users.models import User
+from app.modules.users.cache import Principal, principal_cache
 
 # Esto le dice a Swagger UI que la seguridad depende de una cookie llamada "access_token"
 cookie_scheme = APIKeyCookie(name="access_token")
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(cookie_scheme), 
-    db: Session = Depends(get_db)
-) -> User:
-    
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """
+    Resuelve el usuario del token. Devuelve un `Principal` (id, email, rol)
+    cacheado por unos segundos para no consultar la DB en cada petición.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudieron validar las credenciales",
@@ -29,14 +33,22 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
         
-    user_repo = UserRepository(db)
-    user = user_repo.get_by_email(email)
-    if user is None:
+    principal = principal_cache.get(email)
+    if principal is not None:
+        return principal
+
+    principal = await db.run_sync(lambda session: _load_principal(session, email))
+    if principal is None:
         raise credentials_exception
-        
-    return user
 
-def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    principal_cache.set(email, principal)
+    return principal
+
+def _load_principal(db: Session, email: str) -> Principal | None:
+    user = UserRepository(db).get_by_email(email)
+    return Principal.from_user(user) if user else None
+
+def get_current_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
     if current_user.role != "admin":
         raise HTTPException(
             status_code=403, 
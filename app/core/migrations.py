@@ -0,0 +1,343 @@
+"""
+Migraciones versionadas del esquema.
+
+Reemplazan el `create_all` + bootstrap que se ejecutaba en cada arranque:
+
+- Cada migración aplicada queda registrada en `schema_migrations`. Si la base
+  ya está en la última versión, el arranque solo hace una consulta.
+- En PostgreSQL, la ejecución está protegida por un advisory lock: si varios
+  workers arrancan a la vez, uno migra y el resto espera y luego no hace nada.
+- Cada migración corre en su propia transacción junto con su registro.
+
+Las migraciones deben ser idempotentes (usar `checkfirst` / verificar columnas),
+porque una base creada antes de este sistema no tiene `schema_migrations`.
+
+Las migraciones de datos que usan los modelos ORM (`uses_models=True`) se
+ejecutan después de las de esquema pendientes: los modelos reflejan el
+esquema final, no el de su versión.
+
+Para cambiar el esquema, agrega una `Migration` al final de `MIGRATIONS`.
+
+Uso:
+    python -m app.core.migrations upgrade
+    python -m app.core.migrations status
+"""
+import argparse
+import sys
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, bindparam, func, inspect, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from app.core.database import Base
+from app.core.logger import LoggerSetup
+# Registrar todos los modelos en Base.metadata
+from app.modules.users import models as user_models  # noqa: F401
+from app.modules.questions import models as question_models  # noqa: F401
+from app.modules.trivias import models as trivia_models  # noqa: F401
+from app.modules.game import models as game_models  # noqa: F401
+from app.modules.ranking import models as ranking_models  # noqa: F401
+
+logger = LoggerSetup.get_logger(__name__)
+
+# Clave arbitraria (64 bits) del advisory lock de migraciones
+MIGRATION_LOCK_KEY = 727_001
+
+# Filas por lote en los backfills de datos
+BACKFILL_BATCH_SIZE = 1000
+
+_meta = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _meta,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+    uses_models: bool = False
+
+
+# --- Helpers para migraciones ---
+
+def add_column_if_missing(conn: Connection, table: str, column: Column) -> bool:
+    """ALTER TABLE ... ADD COLUMN si la columna aún no existe."""
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column.name in existing:
+        return False
+    column_type = column.type.compile(dialect=conn.dialect)
+    default = f" DEFAULT {column.server_default.arg}" if column.server_default is not None else ""
+    nullable = "" if column.nullable else " NOT NULL"
+    conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column.name} {column_type}{default}{nullable}")
+    return True
+
+
+def create_missing_indexes(conn: Connection, names: Optional[Iterable[str]] = None) -> None:
+    """
+    Crea los índices declarados en los modelos que aún no existen.
+    Con `names`, solo esos: una migración no debe crear índices que
+    introduce una migración posterior (p. ej. uno único que requiere limpiar datos antes).
+    """
+    wanted = set(names) if names is not None else None
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if wanted is None or index.name in wanted:
+                index.create(bind=conn, checkfirst=True)
+
+
+# --- Migraciones ---
+
+def _baseline(conn: Connection) -> None:
+    """Tablas del modelo (no toca las existentes)."""
+    Base.metadata.create_all(bind=conn)
+
+
+def _hot_query_indexes(conn: Connection) -> None:
+    """Índices compuestos y parciales para bases creadas antes de declararlos."""
+    create_missing_indexes(conn, {
+        "ix_users_active_id",
+        "ix_questions_active_id",
+        "ix_trivias_active_id",
+        "ix_trivia_questions_question_id",
+        "ix_trivia_assignments_user_status",
+        "ix_trivia_assignments_trivia_status",
+        "ix_user_answers_assignment_id",
+        "ix_options_question_id",
+    })
+
+
+def _bootstrap_data(conn: Connection) -> None:
+    """Superusuario, preguntas demo y backfill del ranking (una sola vez)."""
+    from app.core.bootstrap import create_initial_data
+
+    # Los commit() del bootstrap no cierran la transacción de la migración
+    db = Session(bind=conn, join_transaction_mode="rollback_only")
+    try:
+        create_initial_data(db)
+    finally:
+        db.close()
+
+
+def _assignment_jobs(conn: Connection) -> None:
+    """Tabla de trabajos de creación de asignaciones en segundo plano."""
+    trivia_models.AssignmentJob.__table__.create(bind=conn, checkfirst=True)
+
+
+def _unique_assignments(conn: Connection) -> None:
+    """
+    Índice único (user_id, trivia_id) en las asignaciones. Antes se resuelven
+    los duplicados: se conserva la asignación completada de mayor puntaje (o,
+    si ninguna se completó, la más antigua) y se eliminan las demás con sus
+    respuestas; sus envíos encolados pasan a la conservada. Si se eliminó
+    alguna completada, se recalcula `player_scores` de esos jugadores.
+    """
+    assignments = trivia_models.TriviaAssignment.__table__
+    answers = trivia_models.UserAnswer.__table__
+    submissions = game_models.SubmissionJob.__table__
+    scores = ranking_models.PlayerScore.__table__
+    completed = trivia_models.AssignmentStatus.COMPLETED
+
+    duplicated = select(assignments.c.user_id, assignments.c.trivia_id).group_by(
+        assignments.c.user_id, assignments.c.trivia_id
+    ).having(func.count() > 1).subquery()
+    rows = conn.execute(
+        select(assignments.c.id, assignments.c.user_id, assignments.c.trivia_id,
+               assignments.c.status, assignments.c.total_score)
+        .join(duplicated, (assignments.c.user_id == duplicated.c.user_id)
+              & (assignments.c.trivia_id == duplicated.c.trivia_id))
+    ).all()
+
+    groups = {}
+    for row in rows:
+        groups.setdefault((row.user_id, row.trivia_id), []).append(row)
+    rescored_users = set()
+    for (user_id, trivia_id), group in groups.items():
+        keep = min(group, key=lambda r: (r.status != completed, -(r.total_score or 0), r.id))
+        removed = [r.id for r in group if r.id != keep.id]
+        if any(r.status == completed for r in group if r.id != keep.id):
+            rescored_users.add(user_id)
+        logger.warning(
+            f"Asignaciones duplicadas (usuario {user_id}, trivia {trivia_id}): "
+            f"se conserva {keep.id}, se eliminan {removed}"
+        )
+        conn.execute(submissions.update().where(submissions.c.assignment_id.in_(removed))
+                     .values(assignment_id=keep.id))
+        conn.execute(answers.delete().where(answers.c.assignment_id.in_(removed)))
+        conn.execute(assignments.delete().where(assignments.c.id.in_(removed)))
+
+    if rescored_users:
+        conn.execute(scores.delete().where(scores.c.user_id.in_(rescored_users)))
+        conn.execute(scores.insert().from_select(
+            ["user_id", "total_score", "trivias_played"],
+            select(assignments.c.user_id, func.coalesce(func.sum(assignments.c.total_score), 0), func.count())
+            .where(assignments.c.status == completed, assignments.c.user_id.in_(rescored_users))
+            .group_by(assignments.c.user_id)
+        ))
+
+    add_column_if_missing(conn, "assignment_jobs", trivia_models.AssignmentJob.__table__.c.inserted)
+    create_missing_indexes(conn, {"uq_trivia_assignments_user_trivia"})
+
+
+def _question_normalized_text(conn: Connection) -> None:
+    """
+    Columna `questions.normalized_text` (backfill por lotes en Python: quitar
+    tildes no es portable en SQL) y su índice único parcial. Si ya había
+    preguntas activas que solo difieren en tildes/mayúsculas, se conserva la
+    más antigua y las demás quedan sin normalizar (se registran en el log).
+    """
+    questions = question_models.Question.__table__
+    add_column_if_missing(conn, "questions", questions.c.normalized_text)
+
+    seen = set(conn.execute(
+        select(questions.c.normalized_text).where(
+            questions.c.normalized_text.is_not(None), questions.c.is_active == True
+        )
+    ).scalars())
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(questions.c.id, questions.c.text, questions.c.is_active)
+            .where(questions.c.normalized_text.is_(None), questions.c.id > last_id)
+            .order_by(questions.c.id).limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        updates = []
+        for question_id, text, is_active in rows:
+            normalized = question_models.normalize_question_text(text)
+            if is_active and normalized in seen:
+                logger.warning(f"Pregunta {question_id} duplicada (texto normalizado '{normalized}'), se omite")
+                continue
+            if is_active:
+                seen.add(normalized)
+            updates.append({"question_id": question_id, "normalized": normalized})
+        if updates:
+            conn.execute(
+                questions.update().where(questions.c.id == bindparam("question_id"))
+                .values(normalized_text=bindparam("normalized")),
+                updates
+            )
+        last_id = rows[-1].id
+
+    create_missing_indexes(conn, {"uq_questions_normalized_text"})
+
+
+def _question_search_index(conn: Connection) -> None:
+    """Índice GIN de búsqueda de texto (solo PostgreSQL; en otros motores no se crea)."""
+    create_missing_indexes(conn, {"ix_questions_search"})
+
+
+def _usage_counters(conn: Connection) -> None:
+    """Contador de asignaciones pendientes por usuario (con backfill)."""
+    from app.modules.trivias.repository import TriviaRepository
+
+    add_column_if_missing(conn, "users", user_models.User.__table__.c.pending_assignments)
+    db = Session(bind=conn, join_transaction_mode="rollback_only")
+    try:
+        TriviaRepository(db).rebuild_usage_counters()
+    finally:
+        db.close()
+
+
+def _ranking_index_order(conn: Connection) -> None:
+    """
+    Recrea `ix_player_scores_ranking` como (total_score DESC, user_id): el
+    índice original (ASC, ASC) no sirve al orden mixto del ranking.
+    """
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_player_scores_ranking")
+    create_missing_indexes(conn, {"ix_player_scores_ranking"})
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline", _baseline),
+    Migration(2, "hot_query_indexes", _hot_query_indexes),
+    Migration(3, "bootstrap_data", _bootstrap_data, uses_models=True),
+    Migration(4, "assignment_jobs", _assignment_jobs),
+    Migration(5, "unique_assignments", _unique_assignments),
+    Migration(6, "question_normalized_text", _question_normalized_text),
+    Migration(7, "question_search_index", _question_search_index),
+    Migration(8, "usage_counters", _usage_counters),
+    Migration(9, "ranking_index_order", _ranking_index_order),
+]
+
+
+# --- Runner ---
+
+def _applied_versions(conn: Connection) -> set:
+    if not inspect(conn).has_table("schema_migrations"):
+        return set()
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def pending_migrations(engine: Engine) -> List[Migration]:
+    """Migraciones pendientes en orden de ejecución (las que usan modelos ORM al final)."""
+    with engine.connect() as conn:
+        applied = _applied_versions(conn)
+    pending = [m for m in MIGRATIONS if m.version not in applied]
+    return sorted(pending, key=lambda m: m.uses_models)
+
+
+def run_migrations(engine: Engine) -> int:
+    """Aplica las migraciones pendientes. Devuelve cuántas se aplicaron."""
+    # Camino rápido: nada pendiente, sin lock
+    if not pending_migrations(engine):
+        logger.info(f"Esquema al día (versión {latest_version()}).")
+        return 0
+
+    is_postgres = engine.dialect.name == "postgresql"
+    with engine.connect() as lock_conn:
+        if is_postgres:
+            lock_conn.exec_driver_sql(f"SELECT pg_advisory_lock({MIGRATION_LOCK_KEY})")
+            lock_conn.commit()
+        try:
+            with engine.begin() as conn:
+                _meta.create_all(bind=conn)
+
+            applied = 0
+            # Se vuelve a leer bajo el lock: otro worker pudo haber migrado mientras esperábamos
+            for migration in pending_migrations(engine):
+                logger.info(f"Aplicando migración {migration.version}: {migration.name}")
+                with engine.begin() as conn:
+                    migration.upgrade(conn)
+                    conn.execute(schema_migrations.insert().values(
+                        version=migration.version, name=migration.name
+                    ))
+                applied += 1
+            logger.info(f"Migraciones aplicadas: {applied} (versión {latest_version()}).")
+            return applied
+        finally:
+            if is_postgres:
+                lock_conn.exec_driver_sql(f"SELECT pg_advisory_unlock({MIGRATION_LOCK_KEY})")
+                lock_conn.commit()
+
+
+def main(argv: List[str] | None = None) -> int:
+    from app.core.database import engine
+
+    parser = argparse.ArgumentParser(prog="python -m app.core.migrations")
+    parser.add_argument("command", choices=["upgrade", "status"])
+    args = parser.parse_args(argv)
+
+    if args.command == "upgrade":
+        run_migrations(engine)
+        return 0
+
+    pending = pending_migrations(engine)
+    for migration in MIGRATIONS:
+        mark = "pendiente" if migration in pending else "aplicada"
+        print(f"{migration.version:>4}  {migration.name:<24} {mark}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, DateTime, Boolean
+from sqlalchemy import Column, Integer, DateTime, Boolean, Index, text
+from sqlalchemy.orm import declared_attr
 from sqlalchemy.sql import func
 
 class TimestampMixin:
@@ -18,6 +19,10 @@ class SoftDeleteMixin:
     """
     is_active = Column(Boolean, default=True, nullable=False, index=True)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
+
+    @declared_attr
+    def __table_args__(cls):
+        return soft_delete_indexes(cls.__tablename__)
     
     def soft_delete(self):
         """Marca el registro como eliminado."""
@@ -27,4 +32,23 @@ class SoftDeleteMixin:
     def restore(self):
         """Restaura un registro eliminado."""
         self.is_active = True
-        self.deleted_at = None
\ No newline at end of file
+        self.deleted_at = None
+
+def active_only(column: str = "is_active") -> dict:
+    """
+    Predicado de índice parcial "solo registros activos" por motor.
+    En SQLite debe coincidir con lo que genera `Model.is_active == True`
+    para que el planificador lo use.
+    """
+    return {
+        "postgresql_where": text(column),
+        "sqlite_where": text(f"{column} = 1"),
+    }
+
+
+def soft_delete_indexes(tablename: str) -> tuple:
+    """
+    Índice parcial sobre `id` de los registros activos: sirve los listados
+    (filtrados por `is_active` y ordenados por id) sin recorrer los eliminados.
+    """
+    return (Index(f"ix_{tablename}_active_id", "id", **active_only()),)
@@ -1,8 +1,18 @@
 """
 Esquemas y utilidades para paginación consistente.
+
+- Por páginas (`PaginatedResponse`): page/per_page con OFFSET y COUNT(*).
+- Por cursor (`CursorPage`): keyset sobre (clave de orden, id). Cada página
+  continúa desde la última fila de la anterior, así que su costo no depende
+  de cuán profunda sea; el total es opcional.
 """
-from typing import Generic, TypeVar, List
+import base64
+import json
+from typing import Any, Callable, Generic, Optional, Sequence, Tuple, TypeVar, List
+from fastapi import HTTPException
 from pydantic import BaseModel, Field, ConfigDict
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
 from math import ceil
 
 T = TypeVar('T')
@@ -81,3 +91,90 @@ def calculate_skip(page: int, per_page: int) -> int:
         Offset para la query
     """
     return (page - 1) * per_page
+
+
+
+class CursorPage(BaseModel, Generic[T]):
+    """
+    Página de una paginación por cursor.
+
+    Example:
+        {
+            "items": [...],
+            "next_cursor": "WzEwXQ",
+            "per_page": 10,
+            "total": null
+        }
+    """
+    items: List[T] = Field(..., description="Lista de elementos en esta página")
+    next_cursor: Optional[str] = Field(None, description="Cursor para pedir la página siguiente (null si es la última)")
+    per_page: int = Field(..., description="Cantidad máxima de elementos por página")
+    total: Optional[int] = Field(None, description="Total de elementos (solo si se pidió `include_total`)")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "items": [],
+                "next_cursor": "WzEwXQ",
+                "per_page": 10,
+                "total": None
+            }
+        }
+    )
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Codifica los valores de la última fila (clave de orden, id) como cursor opaco."""
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[Tuple[Any, ...]]:
+    """Decodifica un cursor de `size` enteros (ids). Lanza 400 si no es válido."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if not isinstance(values, list) or len(values) != size or not all(
+        isinstance(v, int) and not isinstance(v, bool) for v in values
+    ):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return tuple(values)
+
+
+def apply_keyset(query: Query, columns: Sequence[Any], after: Optional[Tuple[Any, ...]], limit: int) -> Query:
+    """
+    Ordena por `columns` (la última debe ser única, p. ej. el id) y, si hay
+    cursor, filtra las filas posteriores con una comparación de tuplas.
+    Pide `limit + 1` filas para saber si existe una página siguiente.
+    """
+    if after is not None:
+        if len(columns) == 1:
+            query = query.filter(columns[0] > after[0])
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*after))
+    return query.order_by(*columns).limit(limit + 1)
+
+
+def cursor_paginate(
+    rows: List[T],
+    per_page: int,
+    key: Callable[[T], Sequence[Any]],
+    total: Optional[int] = None
+) -> CursorPage[T]:
+    """
+    Arma la página a partir de las `per_page + 1` filas de `apply_keyset`.
+
+    Args:
+        rows: Filas obtenidas (a lo sumo per_page + 1)
+        per_page: Elementos por página
+        key: Valores de orden de una fila (los mismos `columns` de `apply_keyset`)
+        total: Total de elementos, si se pidió
+    """
+    has_more = len(rows) > per_page
+    items = rows[:per_page]
+    next_cursor = encode_cursor(key(items[-1])) if has_more else None
+    return CursorPage(items=items, next_cursor=next_cursor, per_page=per_page, total=total)
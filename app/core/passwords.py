@@ -0,0 +1,161 @@
+"""
+Hashing de contraseñas (bcrypt) fuera del hilo de la petición.
+
+bcrypt es deliberadamente costoso (~250 ms por operación): si se ejecuta en el
+threadpool de la API, un pico de logins deja sin hilos al resto de endpoints.
+Aquí el trabajo se envía a un pool de procesos dedicado y acotado:
+
+- `max_pending` limita las operaciones encoladas + en curso; al superarlo se
+  responde 503 en vez de acumular latencia.
+- `calibrate()` elige al arrancar los rounds de bcrypt que tardan ~`target_ms`
+  en este hardware (salvo que BCRYPT_ROUNDS esté fijado).
+- `needs_rehash()` detecta hashes con un costo menor al configurado para
+  re-hashearlos al hacer login. Nunca se baja el costo: si los workers
+  calibran distinto, un hash no rebota entre ellos en cada login.
+"""
+import asyncio
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Optional
+from fastapi import HTTPException, status
+from passlib.hash import bcrypt
+from app.core.config import settings
+from app.core.logger import LoggerSetup
+
+logger = LoggerSetup.get_logger(__name__)
+
+MIN_ROUNDS = 10
+MAX_ROUNDS = 15
+
+
+# Funciones ejecutadas en los procesos del pool (deben ser importables a nivel módulo)
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.using(rounds=rounds).hash(password)
+
+
+def _verify(password: str, hashed_password: str) -> bool:
+    return bcrypt.verify(password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Pool de procesos para bcrypt.
+    Con `workers=0` las operaciones se ejecutan en el hilo que llama.
+    """
+
+    def __init__(self, workers: int, max_pending: int, rounds: Optional[int] = None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds or bcrypt.default_rounds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = 0
+        self.rejected = 0
+
+    # --- Pool ---
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None and self.workers > 0:
+                # "spawn" evita heredar hilos y conexiones del proceso de la API
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info(f"Pool de hashing iniciado con {self.workers} proceso(s).")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servidor ocupado, intente nuevamente en unos segundos",
+                headers={"Retry-After": "1"}
+            )
+        with self._lock:
+            self._pending += 1
+
+        if self.workers > 0:
+            self.start()
+            try:
+                future = self._executor.submit(fn, *args)
+            except Exception:
+                self._release(None)
+                raise
+        else:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future: Optional[Future]) -> None:
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    # --- Operaciones ---
+
+    def hash(self, password: str) -> str:
+        return self._submit(_hash, password, self.rounds).result()
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self._submit(_verify, password, hashed_password).result()
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(_hash, password, self.rounds))
+
+    async def verify_async(self, password: str, hashed_password: str) -> bool:
+        return await asyncio.wrap_future(self._submit(_verify, password, hashed_password))
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True si el hash se generó con un costo menor al configurado (o no es bcrypt)."""
+        try:
+            return bcrypt.from_string(hashed_password).rounds < self.rounds
+        except ValueError:
+            return True
+
+    def calibrate(self, target_ms: float) -> int:
+        """
+        Mide un hash con MIN_ROUNDS y elige los rounds cuya duración estimada
+        (cada round extra duplica el costo) queda más cerca de `target_ms`.
+        """
+        start = time.perf_counter()
+        _hash("calibration-password", MIN_ROUNDS)
+        elapsed_ms = max((time.perf_counter() - start) * 1000, 0.001)
+
+        extra = round(math.log2(target_ms / elapsed_ms))
+        self.rounds = min(max(MIN_ROUNDS + extra, MIN_ROUNDS), MAX_ROUNDS)
+        logger.info(
+            f"bcrypt calibrado: {self.rounds} rounds "
+            f"(~{elapsed_ms * 2 ** (self.rounds - MIN_ROUNDS):.0f} ms, objetivo {target_ms:.0f} ms)"
+        )
+        return self.rounds
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    rounds=settings.BCRYPT_ROUNDS
+)
@@ -0,0 +1,144 @@
+"""
+Verificación de planes de ejecución de las consultas más frecuentes.
+
+Ejecuta EXPLAIN sobre cada "forma" de consulta caliente y reporta las que
+recorren la tabla completa (sequential scan) en lugar de usar un índice, y
+las marcadas `index_order` que ordenan en memoria en lugar de leer el
+índice en orden.
+
+- PostgreSQL: `EXPLAIN (FORMAT JSON)` con `enable_seqscan = off` dentro de
+  la transacción, para que con tablas chicas (donde un seq scan es lo más
+  barato) igual se compruebe que existe un índice que sirve a la consulta.
+- SQLite: `EXPLAIN QUERY PLAN`; un paso `SCAN <tabla>` sin `USING ... INDEX`
+  es un recorrido completo, y `USE TEMP B-TREE FOR ORDER BY` un ordenamiento.
+
+Uso:
+    python -m app.core.query_plans
+"""
+import sys
+from dataclasses import dataclass
+from typing import Callable, List
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from app.modules.questions.models import Option, Question
+from app.modules.ranking.models import PlayerScore
+from app.modules.trivias.models import (
+    AssignmentStatus, Trivia, TriviaAssignment, UserAnswer, trivia_questions
+)
+from app.modules.users.models import User
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    name: str
+    table: str
+    build: Callable[[], Select]
+    index_order: bool = False  # El ORDER BY debe resolverse con el índice (sin sort)
+
+
+# Marca de "el plan ordena en memoria" en la salida de los EXPLAIN
+SORT = "<sort>"
+
+
+HOT_QUERIES: List[HotQuery] = [
+    HotQuery("assignments_by_user_status", "trivia_assignments", lambda: select(TriviaAssignment.id).where(
+        TriviaAssignment.user_id == 1, TriviaAssignment.status == AssignmentStatus.PENDING)),
+    HotQuery("assignments_by_trivia_status", "trivia_assignments", lambda: select(TriviaAssignment.id).where(
+        TriviaAssignment.trivia_id == 1, TriviaAssignment.status == AssignmentStatus.PENDING)),
+    HotQuery("answers_by_assignment", "user_answers", lambda: select(UserAnswer.id).where(
+        UserAnswer.assignment_id == 1)),
+    HotQuery("options_by_question", "options", lambda: select(Option.id).where(
+        Option.question_id == 1)),
+    HotQuery("trivia_questions_by_question", "trivia_questions", lambda: select(trivia_questions.c.trivia_id).where(
+        trivia_questions.c.question_id == 1)),
+    HotQuery("question_by_normalized_text", "questions", lambda: select(Question.id).where(
+        Question.normalized_text == "x", Question.is_active == True)),
+    HotQuery("active_users_page", "users", lambda: select(User.id).where(
+        User.is_active == True).order_by(User.id).limit(10)),
+    HotQuery("active_questions_page", "questions", lambda: select(Question.id).where(
+        Question.is_active == True).order_by(Question.id).limit(10)),
+    HotQuery("active_trivias_page", "trivias", lambda: select(Trivia.id).where(
+        Trivia.is_active == True).order_by(Trivia.id).limit(10)),
+    HotQuery("ranking_top", "player_scores", lambda: select(PlayerScore.user_id).order_by(
+        PlayerScore.total_score.desc(), PlayerScore.user_id).limit(10), index_order=True),
+]
+
+
+def _sql(db: Session, stmt: Select) -> str:
+    return str(stmt.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}))
+
+
+def _postgres_seq_scans(db: Session, sql: str) -> List[str]:
+    conn = db.connection()
+    conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+    found = []
+
+    def walk(node: dict):
+        if node.get("Node Type") == "Seq Scan":
+            found.append(node.get("Relation Name"))
+        elif node.get("Node Type") in ("Sort", "Incremental Sort"):
+            found.append(SORT)
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return found
+
+
+def _sqlite_seq_scans(db: Session, sql: str) -> List[str]:
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+    found = []
+    for row in rows:
+        detail = row[-1]
+        if detail.startswith("SCAN ") and " USING " not in detail:
+            found.append(detail.split()[1])
+        elif detail.startswith("USE TEMP B-TREE FOR") and "ORDER BY" in detail:
+            found.append(SORT)
+    return found
+
+
+def find_sequential_scans(db: Session) -> List[dict]:
+    """
+    Devuelve las consultas calientes cuyo plan recorre completa la tabla
+    objetivo o, si son `index_order`, ordena en memoria.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        explain = _postgres_seq_scans
+    elif dialect == "sqlite":
+        explain = _sqlite_seq_scans
+    else:
+        raise NotImplementedError(f"EXPLAIN no soportado para el motor '{dialect}'")
+
+    findings = []
+    try:
+        for query in HOT_QUERIES:
+            sql = _sql(db, query.build())
+            found = explain(db, sql)
+            if query.table in found or (query.index_order and SORT in found):
+                findings.append({"query": query.name, "table": query.table, "sql": sql})
+    finally:
+        db.rollback()  # Descarta el SET LOCAL
+    return findings
+
+
+def main() -> int:
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        findings = find_sequential_scans(db)
+    finally:
+        db.close()
+
+    for f in findings:
+        print(f"SEQ SCAN/SORT en {f['table']} ({f['query']}): {f['sql']}")
+    if not findings:
+        print(f"OK: {len(HOT_QUERIES)} consultas calientes usan índices.")
+    return 1 if findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,18 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import jwt
-from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.passwords import password_hasher
 
-# Configuración de hashing (bcrypt es el estándar robusto)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt se ejecuta en el pool de procesos de `password_hasher` (ver app/core/passwords.py)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica si la contraseña plana coincide con el hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Genera un hash seguro de la contraseña."""
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Genera un JWT firmado."""
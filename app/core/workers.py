@@ -0,0 +1,60 @@
+"""
+Pool de workers en segundo plano (hilos) para trabajos que no deben
+ejecutarse dentro del hilo de la petición HTTP.
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+from app.core.logger import LoggerSetup
+
+logger = LoggerSetup.get_logger(__name__)
+
+
+class WorkerPool:
+    """
+    Envoltorio de ThreadPoolExecutor con arranque perezoso y apagado ordenado.
+    Los errores no capturados por la tarea se registran en el log.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=self.name
+                )
+                logger.info(f"Pool '{self.name}' iniciado con {self.max_workers} worker(s).")
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        self.start()
+        with self._lock:
+            self._in_flight += 1
+        future = self._executor.submit(fn, *args, **kwargs)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Error en tarea del pool '{self.name}': {future.exception()}")
+
+    @property
+    def in_flight(self) -> int:
+        """Tareas encoladas o en ejecución."""
+        return self._in_flight
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Detiene el pool. Las tareas aún no iniciadas se cancelan."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+            logger.info(f"Pool '{self.name}' detenido.")
@@ -4,20 +4,31 @@ from fastapi.middleware.cors import CORSMiddleware
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from app.core.database import check_db_connection, SessionLocal
+from app.core.database import (
+    check_db_connection, SessionLocal, async_engine, replicas, sticky_primary_middleware, QueryMetricsMiddleware
+)
 from app.core.logger import LoggerSetup
+from app.core.config import settings
+from app.core.passwords import password_hasher
 from app.modules.users import models as user_models
 from app.modules.questions import models as question_models
 from app.modules.trivias import models as trivia_models
-from app.core.database import engine, Base
+from app.modules.game import models as game_models
+from app.modules.ranking import models as ranking_models
+from app.core.database import engine
 from app.modules.users.router import router as users_router
 from app.modules.auth.router import router as auth_router
-from app.core.bootstrap import create_initial_data
+from app.core.migrations import run_migrations
 from app.modules.questions.router import router as questions_router
 from app.modules.trivias.router import router as trivia_router
 from app.modules.game.router import router as game_router
 from app.modules.testing.router import router as testing_router
 from app.modules.ranking.router import router as ranking_router
+from app.modules.monitoring.router import router as monitoring_router
+from app.modules.game.queue import submission_queue
+from app.modules.trivias.jobs import assignment_queue
+from app.modules.testing.generator import generation_pool
+from app.modules.ranking.leaderboard import leaderboard, load_entries, refresh_pool
 
 # 1. Configurar logs ANTES de que arranque la app
 LoggerSetup.configure_logging()
@@ -30,28 +41,43 @@ limiter = Limiter(key_func=get_remote_address)
 async def lifespan(app: FastAPI):
     logger.info("Iniciando la app")
     
-    # 1. Crear Tablas (Si no existen)
-    logger.info("Creando tablas en la base de datos...")
-    Base.metadata.create_all(bind=engine)
-    
-    # 2. Verificar Conexión
+    # 1. Verificar Conexión
     try:
         check_db_connection()
     except Exception as e:
         logger.critical(f"Deteniendo inicio por fallo crítico en DB: {e}")
         raise e
 
-    # 3. BOOTSTRAP: Crear datos iniciales (Admin)
-    # Creamos una sesión temporal solo para esto
+    # 2. Calibrar el costo de bcrypt (si no se fijó BCRYPT_ROUNDS)
+    if settings.BCRYPT_ROUNDS is None:
+        password_hasher.calibrate(settings.BCRYPT_TARGET_MS)
+
+    # 3. Migraciones versionadas (tablas, índices y datos iniciales).
+    # Si el esquema ya está al día es una sola consulta.
+    if settings.RUN_MIGRATIONS_ON_STARTUP:
+        run_migrations(engine)
+
+    # 4. Precargar el leaderboard en memoria desde `player_scores`
     db = SessionLocal()
     try:
-        create_initial_data(db)
+        leaderboard.load(load_entries(db))
     finally:
         db.close() # Importante cerrar la sesión manual
+
+    # 5. Retomar envíos asíncronos que quedaron pendientes
+    submission_queue.recover()
+    assignment_queue.recover()
     
     yield
     
     logger.info("Cerrando TalaTrivia API...")
+    submission_queue.shutdown()
+    assignment_queue.shutdown()
+    generation_pool.shutdown()
+    refresh_pool.shutdown()
+    password_hasher.shutdown()
+    await async_engine.dispose()
+    await replicas.dispose()
 
 app = FastAPI(
     title="TalaTrivia API",
@@ -101,6 +127,9 @@ app = FastAPI(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# Lecturas propias tras escribir: el cliente vuelve al primario unos segundos
+app.middleware("http")(sticky_primary_middleware)
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -116,6 +145,9 @@ app.add_middleware(
     allow_headers=["*"],  # Authorization, Content-Type, etc.
 )
 
+# Métricas SQL por petición (se agrega al final para envolver a los demás middlewares)
+app.add_middleware(QueryMetricsMiddleware)
+
 @app.get("/")
 @limiter.limit("10/minute")
 def health_check(request: Request):
@@ -128,4 +160,5 @@ app.include_router(questions_router)
 app.include_router(trivia_router)
 app.include_router(game_router)
 app.include_router(ranking_router)
-app.include_router(testing_router)
\ No newline at end of file
+app.include_router(testing_router)
+app.include_router(monitoring_router)
\ No newline at end of file
@@ -1,33 +1,46 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Response, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from app.core.database import get_db
-from app.core.security import verify_password, create_access_token
+from app.core.security import create_access_token
 from app.core.config import settings
+from app.core.logger import LoggerSetup
+from app.core.passwords import password_hasher
 from app.modules.users.repository import UserRepository
 from app.modules.auth.schemas import LoginRequest
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 limiter = Limiter(key_func=get_remote_address)
+logger = LoggerSetup.get_logger(__name__)
 
 @router.post("/login")
 @limiter.limit("5/minute")
-def login(
+async def login(
     request: Request,
     response: Response,
     credentials: LoginRequest,
     db: Session = Depends(get_db)
 ):
+    # bcrypt corre en el pool de procesos: mientras tanto no se ocupa ningún hilo de la API
     user_repo = UserRepository(db)
-    user = user_repo.get_by_email(credentials.email)
+    user = await run_in_threadpool(user_repo.get_by_email, credentials.email)
     
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    if not user or not await password_hasher.verify_async(credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenciales inválidas"
         )
+
+    # Si subió el costo configurado de bcrypt, se aprovecha la contraseña en claro para re-hashear
+    if password_hasher.needs_rehash(user.hashed_password):
+        try:
+            new_hash = await password_hasher.hash_async(credentials.password)
+            await run_in_threadpool(user_repo.update_password_hash, user, new_hash)
+        except HTTPException:
+            logger.warning(f"Re-hash de contraseña pospuesto para {user.email}: pool ocupado")
     
     # Crear Token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
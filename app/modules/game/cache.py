@@ -0,0 +1,157 @@
+"""
+Cachés del módulo de juego.
+
+- La "hoja de respuestas" compilada de cada trivia permite puntuar un envío sin
+  volver a leer `questions`/`options`.
+- El contenido de juego (preguntas y opciones) de cada trivia se serializa una
+  sola vez a JSON; por petición solo se arma el sobre de la asignación.
+
+Ambas se invalidan cuando cambian las preguntas o la trivia (ver
+QuestionRepository y TriviaRepository); el TTL acota cuánto puede quedar
+desactualizado un worker que no recibió la invalidación.
+"""
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, Tuple
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.modules.game.scoring import POINTS_BY_DIFFICULTY
+from app.modules.questions.models import DifficultyLevel
+
+
+@dataclass(frozen=True)
+class AnswerKeyEntry:
+    option_ids: FrozenSet[int]
+    correct_option_ids: FrozenSet[int]
+    points: int
+
+
+# question_id -> AnswerKeyEntry
+AnswerKey = Dict[int, AnswerKeyEntry]
+
+
+def compile_answer_key(rows: Iterable[Tuple[int, DifficultyLevel, int, bool]]) -> AnswerKey:
+    """
+    Compila la hoja de respuestas a partir de filas
+    (question_id, difficulty, option_id, is_correct).
+    """
+    options: Dict[int, set] = {}
+    correct: Dict[int, set] = {}
+    points: Dict[int, int] = {}
+
+    for question_id, difficulty, option_id, is_correct in rows:
+        options.setdefault(question_id, set()).add(option_id)
+        correct.setdefault(question_id, set())
+        if is_correct:
+            correct[question_id].add(option_id)
+        points[question_id] = POINTS_BY_DIFFICULTY.get(difficulty, 0)
+
+    return {
+        question_id: AnswerKeyEntry(
+            option_ids=frozenset(option_ids),
+            correct_option_ids=frozenset(correct[question_id]),
+            points=points[question_id],
+        )
+        for question_id, option_ids in options.items()
+    }
+
+
+class AnswerKeyCache:
+    """Caché LRU de hojas de respuestas, indexada por trivia_id."""
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self._cache = LRUCache("answer_keys", maxsize=maxsize, ttl=ttl)
+
+    def get_or_load(self, trivia_id: int, loader: Callable[[], Iterable[tuple]]) -> AnswerKey:
+        return self._cache.get_or_set(trivia_id, lambda: compile_answer_key(loader()))
+
+    def invalidate_trivia(self, trivia_id: int) -> None:
+        self._cache.invalidate(trivia_id)
+
+    def invalidate_question(self, question_id: int) -> None:
+        """Descarta las hojas de todas las trivias que incluyen la pregunta."""
+        self._cache.invalidate_where(lambda _, key: question_id in key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+@dataclass(frozen=True)
+class PlayPayload:
+    """Contenido de juego pre-serializado de una trivia."""
+    trivia_name: str
+    questions_json: bytes
+    question_ids: FrozenSet[int]
+    version: str
+
+    def render(self, assignment_id: int) -> bytes:
+        """Arma el JSON de `GamePlayResponse` para una asignación."""
+        return b"".join((
+            b'{"assignment_id":', str(assignment_id).encode(),
+            b',"trivia_name":', json.dumps(self.trivia_name, ensure_ascii=False).encode(),
+            b',"questions":', self.questions_json,
+            b"}",
+        ))
+
+    def etag(self, assignment_id: int) -> str:
+        return f'"{self.version}-{assignment_id}"'
+
+
+def build_play_payload(trivia_name: str, questions_json: bytes, question_ids: Iterable[int]) -> PlayPayload:
+    # La versión del contenido es un hash de lo que ve el jugador
+    digest = hashlib.sha1(trivia_name.encode() + b"\0" + questions_json).hexdigest()[:16]
+    return PlayPayload(
+        trivia_name=trivia_name,
+        questions_json=questions_json,
+        question_ids=frozenset(question_ids),
+        version=digest,
+    )
+
+
+class PlayPayloadCache:
+    """Caché LRU de contenido de juego pre-serializado, indexada por trivia_id."""
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self._cache = LRUCache("play_payloads", maxsize=maxsize, ttl=ttl)
+
+    def get_or_load(self, trivia_id: int, loader: Callable[[], PlayPayload]) -> PlayPayload:
+        return self._cache.get_or_set(trivia_id, loader)
+
+    def invalidate_trivia(self, trivia_id: int) -> None:
+        self._cache.invalidate(trivia_id)
+
+    def invalidate_question(self, question_id: int) -> None:
+        self._cache.invalidate_where(lambda _, payload: question_id in payload.question_ids)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+answer_key_cache = AnswerKeyCache(
+    maxsize=settings.ANSWER_KEY_CACHE_SIZE,
+    ttl=settings.ANSWER_KEY_CACHE_TTL_SECONDS or None,
+)
+
+play_payload_cache = PlayPayloadCache(
+    maxsize=settings.PLAY_PAYLOAD_CACHE_SIZE,
+    ttl=settings.PLAY_PAYLOAD_CACHE_TTL_SECONDS or None,
+)
+
+
+def invalidate_trivia(trivia_id: int) -> None:
+    """Invalida las cachés derivadas de una trivia."""
+    answer_key_cache.invalidate_trivia(trivia_id)
+    play_payload_cache.invalidate_trivia(trivia_id)
+
+
+def invalidate_question(question_id: int) -> None:
+    """Invalida las cachés de todas las trivias que contienen la pregunta."""
+    answer_key_cache.invalidate_question(question_id)
+    play_payload_cache.invalidate_question(question_id)
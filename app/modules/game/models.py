@@ -0,0 +1,29 @@
+import enum
+from sqlalchemy import Column, ForeignKey, Integer, Enum, JSON, String
+from app.core.database import Base
+from app.core.models import IDMixin, TimestampMixin
+
+class SubmissionStatus(str, enum.Enum):
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+
+class SubmissionJob(Base, IDMixin, TimestampMixin):
+    """
+    Envío de respuestas encolado para ser puntuado en segundo plano.
+    El `id` es el ticket que el jugador usa para consultar el resultado.
+    """
+    __tablename__ = "submission_jobs"
+
+    assignment_id = Column(Integer, ForeignKey("trivia_assignments.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    status = Column(Enum(SubmissionStatus), default=SubmissionStatus.QUEUED, nullable=False, index=True)
+
+    # GameSubmission original y GameResult final (JSON)
+    payload = Column(JSON, nullable=False)
+    result = Column(JSON, nullable=True)
+
+    # Si falla, se guarda el error HTTP que habría devuelto el modo síncrono
+    error_status = Column(Integer, nullable=True)
+    error_detail = Column(String, nullable=True)
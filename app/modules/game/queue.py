@@ -0,0 +1,139 @@
+"""
+Cola durable de envíos de respuestas.
+
+En el modo asíncrono de `POST /game/{assignment_id}/submit` el envío se guarda
+en la tabla `submission_jobs` y se puntúa en un pool de workers en segundo
+plano. Como la cola vive en la base de datos, los trabajos que quedaron
+pendientes al reiniciar se retoman al arrancar (`recover`).
+"""
+from datetime import datetime, timedelta
+from typing import Callable
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logger import LoggerSetup
+from app.core.workers import WorkerPool
+from app.modules.game.cache import answer_key_cache
+from app.modules.game.models import SubmissionJob, SubmissionStatus
+from app.modules.game.repository import GameRepository
+from app.modules.game.schemas import GameResult, GameSubmission
+from app.modules.game.service import GameService
+from app.modules.trivias.models import AssignmentStatus
+
+logger = LoggerSetup.get_logger(__name__)
+
+ACTIVE_STATUSES = (SubmissionStatus.QUEUED, SubmissionStatus.PROCESSING)
+
+
+class SubmissionQueue:
+    def __init__(self, session_factory: Callable[[], Session], workers: int, stale_after_seconds: int = 300):
+        self.session_factory = session_factory
+        self.pool = WorkerPool("submissions", max_workers=workers)
+        self.stale_after = timedelta(seconds=stale_after_seconds)
+
+    def enqueue(self, db: Session, assignment_id: int, user_id: int, submission: GameSubmission) -> SubmissionJob:
+        """
+        Valida la asignación, persiste el envío y lo agenda para puntuarse.
+        Si ya hay un envío en curso para la asignación, devuelve ese mismo ticket.
+        """
+        assignment = GameRepository(db).get_assignment(assignment_id, user_id)
+        if not assignment:
+            raise HTTPException(status_code=404, detail="Asignación no encontrada.")
+        if assignment.status == AssignmentStatus.COMPLETED:
+            raise HTTPException(status_code=409, detail="Esta trivia ya fue completada.")
+
+        existing = db.query(SubmissionJob).filter(
+            SubmissionJob.assignment_id == assignment_id,
+            SubmissionJob.status.in_(ACTIVE_STATUSES)
+        ).first()
+        if existing:
+            return existing
+
+        job = SubmissionJob(
+            assignment_id=assignment_id,
+            user_id=user_id,
+            status=SubmissionStatus.QUEUED,
+            payload=submission.model_dump()
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        self.pool.submit(self.process, job.id)
+        return job
+
+    def get_job(self, db: Session, job_id: int, user_id: int) -> SubmissionJob | None:
+        return db.query(SubmissionJob).filter(
+            SubmissionJob.id == job_id,
+            SubmissionJob.user_id == user_id
+        ).first()
+
+    def process(self, job_id: int) -> None:
+        """Puntúa un envío encolado (se ejecuta en un worker del pool)."""
+        db = self.session_factory()
+        try:
+            # Reclamar el trabajo de forma atómica (evita que dos workers lo procesen)
+            claimed = db.query(SubmissionJob).filter(
+                SubmissionJob.id == job_id,
+                SubmissionJob.status == SubmissionStatus.QUEUED
+            ).update({"status": SubmissionStatus.PROCESSING}, synchronize_session=False)
+            db.commit()
+            if not claimed:
+                return
+
+            job = db.get(SubmissionJob, job_id)
+            service = GameService(GameRepository(db), answer_keys=answer_key_cache)
+            try:
+                result = service.submit_answers(
+                    job.assignment_id, job.user_id, GameSubmission(**job.payload)
+                )
+                job.status = SubmissionStatus.DONE
+                job.result = GameResult(**result).model_dump()
+            except HTTPException as e:
+                job.status = SubmissionStatus.FAILED
+                job.error_status = e.status_code
+                job.error_detail = str(e.detail)
+
+            db.commit()
+            logger.info(f"Envío {job_id} procesado: {job.status.value}")
+        finally:
+            db.close()
+
+    def recover(self) -> int:
+        """
+        Re-agenda los envíos pendientes (p. ej. tras un reinicio).
+        Los que quedaron en `processing` por más de `stale_after` vuelven a la cola.
+        """
+        db = self.session_factory()
+        try:
+            cutoff = datetime.utcnow() - self.stale_after
+            db.query(SubmissionJob).filter(
+                SubmissionJob.status == SubmissionStatus.PROCESSING,
+                SubmissionJob.updated_at < cutoff
+            ).update({"status": SubmissionStatus.QUEUED}, synchronize_session=False)
+            db.commit()
+
+            job_ids = [
+                job_id for (job_id,) in db.query(SubmissionJob.id).filter(
+                    SubmissionJob.status == SubmissionStatus.QUEUED
+                ).order_by(SubmissionJob.id).all()
+            ]
+        finally:
+            db.close()
+
+        for job_id in job_ids:
+            self.pool.submit(self.process, job_id)
+        if job_ids:
+            logger.info(f"Re-agendados {len(job_ids)} envío(s) pendiente(s).")
+        return len(job_ids)
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=True)
+
+
+submission_queue = SubmissionQueue(SessionLocal, workers=settings.SUBMISSION_WORKERS)
+
+
+def get_submission_queue() -> SubmissionQueue:
+    return submission_queue
@@ -1,6 +1,11 @@
-from sqlalchemy.orm import Session, joinedload
-from app.modules.trivias.models import TriviaAssignment, AssignmentStatus, UserAnswer, Trivia
+from typing import Iterable, List
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, contains_eager, selectinload
+from app.modules.trivias.models import TriviaAssignment, AssignmentStatus, UserAnswer, Trivia, trivia_questions
 from app.modules.questions.models import Question, Option, DifficultyLevel
+from app.modules.ranking.leaderboard import record_completion
+from app.modules.ranking.repository import RankingRepository
+from app.modules.trivias.repository import TriviaRepository
 
 class GameRepository:
     def __init__(self, db: Session):
@@ -14,37 +19,72 @@ class GameRepository:
         ).first()
 
     def get_pending_assignments(self, user_id: int):
-        """Lista trivias asignadas al usuario."""
-        return self.db.query(TriviaAssignment).join(Trivia).filter(
+        """Lista trivias asignadas al usuario (con la trivia cargada en el mismo JOIN)."""
+        return self.db.query(TriviaAssignment).join(Trivia).options(
+            contains_eager(TriviaAssignment.trivia)
+        ).filter(
             TriviaAssignment.user_id == user_id,
             TriviaAssignment.status == AssignmentStatus.PENDING
         ).all()
 
-    def get_assignment_with_details(self, assignment_id: int, user_id: int):
-        """Carga la Trivia, Preguntas y Opciones para jugar."""
-        return self.db.query(TriviaAssignment).options(
-            joinedload(TriviaAssignment.trivia)
-            .joinedload(Trivia.questions)
-            .joinedload(Question.options)
+    def get_trivia_content(self, trivia_id: int) -> Trivia | None:
+        """
+        Carga la Trivia con sus Preguntas y Opciones para jugar.
+        Usa `selectinload` (una consulta por nivel) para evitar el producto
+        cartesiano trivia x preguntas x opciones de un JOIN encadenado.
+        """
+        return self.db.query(Trivia).options(
+            selectinload(Trivia.questions).selectinload(Question.options)
         ).filter(
-            TriviaAssignment.id == assignment_id,
-            TriviaAssignment.user_id == user_id
+            Trivia.id == trivia_id
         ).first()
 
-    def get_option(self, option_id: int) -> Option | None:
-        return self.db.query(Option).filter(Option.id == option_id).first()
+    def get_options_by_ids(self, option_ids: Iterable[int]) -> List[Option]:
+        """Carga todas las opciones referenciadas en una sola consulta."""
+        ids = set(option_ids)
+        if not ids:
+            return []
+        return self.db.query(Option).filter(Option.id.in_(ids)).all()
 
-    def get_question(self, question_id: int) -> Question | None:
-        return self.db.query(Question).filter(Question.id == question_id).first()
+    def get_questions_by_ids(self, question_ids: Iterable[int]) -> List[Question]:
+        """Carga todas las preguntas referenciadas en una sola consulta."""
+        ids = set(question_ids)
+        if not ids:
+            return []
+        return self.db.query(Question).filter(Question.id.in_(ids)).all()
 
-    def save_answer(self, answer: UserAnswer):
-        self.db.add(answer)
+    def get_answer_key_rows(self, trivia_id: int):
+        """
+        Filas (question_id, difficulty, option_id, is_correct) de todas las
+        preguntas de la trivia, para compilar su hoja de respuestas.
+        """
+        return self.db.query(
+            Question.id, Question.difficulty, Option.id, Option.is_correct
+        ).join(
+            trivia_questions, trivia_questions.c.question_id == Question.id
+        ).join(
+            Option, Option.question_id == Question.id
+        ).filter(
+            trivia_questions.c.trivia_id == trivia_id
+        ).all()
+
+    def save_answers(self, answer_rows: List[dict]):
+        """Inserta todas las respuestas del envío en un único INSERT masivo."""
+        if answer_rows:
+            self.db.execute(insert(UserAnswer), answer_rows)
 
     def complete_assignment(self, assignment: TriviaAssignment, score: int):
         assignment.status = AssignmentStatus.COMPLETED
         assignment.total_score = score
         self.db.add(assignment)
+        # Mantener el ranking materializado y el contador de pendientes del jugador en la misma transacción
+        RankingRepository(self.db).add_score(assignment.user_id, score)
+        TriviaRepository(self.db).release_assignment(assignment)
     
+    def sync_leaderboard(self, user_id: int, score: int):
+        """Refleja la partida (ya confirmada) en el leaderboard en memoria."""
+        record_completion(self.db, user_id, score)
+
     def commit(self):
         """Confirma la transacción actual."""
         self.db.commit()
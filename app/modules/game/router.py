@@ -1,60 +1,102 @@
 from typing import List
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Depends, Body, Query, Request, Response, status, HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import AsyncServiceRunner, get_async_db, get_async_read_db
 from app.core.deps import get_current_user
-from app.modules.users.models import User
+from app.modules.users.cache import Principal
 from app.modules.game import schemas
+from app.modules.game.cache import answer_key_cache, play_payload_cache
 from app.modules.game.repository import GameRepository
 from app.modules.game.service import GameService
+from app.modules.game.models import SubmissionStatus
+from app.modules.game.queue import SubmissionQueue, get_submission_queue
 
 router = APIRouter(prefix="/game", tags=["Game (Jugadores)"])
 
-def get_service(db: Session = Depends(get_db)) -> GameService:
-    return GameService(GameRepository(db))
+def build_service(db: Session) -> GameService:
+    return GameService(
+        GameRepository(db),
+        answer_keys=answer_key_cache,
+        play_payloads=play_payload_cache
+    )
+
+def get_service(db: AsyncSession = Depends(get_async_db)) -> AsyncServiceRunner[GameService]:
+    return AsyncServiceRunner(db, build_service)
+
+def get_read_service(db: AsyncSession = Depends(get_async_read_db)) -> AsyncServiceRunner[GameService]:
+    """Servicio sobre una réplica de lectura (listado y validación de asignaciones)."""
+    return AsyncServiceRunner(db, build_service)
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Compara el header If-None-Match (puede traer varios ETags o `*`)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
 
 @router.get(
     "/my-trivias", 
     response_model=List[schemas.MyTriviaResponse],
     summary="Listar mis trivias pendientes"
 )
-def list_my_pending_trivias(
-    current_user: User = Depends(get_current_user),
-    service: GameService = Depends(get_service)
+async def list_my_pending_trivias(
+    current_user: Principal = Depends(get_current_user),
+    service: AsyncServiceRunner[GameService] = Depends(get_read_service)
 ):
     """
     Devuelve la lista de trivias asignadas que el usuario aún debe responder.
     Usa el `id` de la respuesta para invocar los endpoints de juego.
     """
-    return service.get_my_trivias(current_user.id)
+    return await service(lambda s: s.get_my_trivias(current_user.id))
 
 @router.get(
     "/{assignment_id}/play", 
     response_model=schemas.GamePlayResponse,
     summary="Obtener el examen (Preguntas y Opciones)"
 )
-def get_trivia_content(
+async def get_trivia_content(
     assignment_id: int,
-    current_user: User = Depends(get_current_user),
-    service: GameService = Depends(get_service)
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    service: AsyncServiceRunner[GameService] = Depends(get_read_service),
+    primary: AsyncServiceRunner[GameService] = Depends(get_service)
 ):
     """
     Descarga las preguntas y opciones para una trivia específica.
     * **Nota:** El campo `is_correct` se oculta intencionalmente.
+    * **Caché:** La respuesta incluye `ETag`. Si el cliente envía `If-None-Match`
+      con el mismo valor, se responde `304 Not Modified` sin cuerpo.
     """
-    return service.get_game_details(assignment_id, current_user.id)
+    trivia_id = await service(lambda s: s.get_playable_trivia(assignment_id, current_user.id))
+    # El contenido llena una caché compartida: se lee del primario para no
+    # guardar (y servir a todos) una versión atrasada de una réplica
+    rendered = await primary(lambda s: s.render_play(assignment_id, trivia_id))
+    headers = {"ETag": rendered.etag, "Cache-Control": "private, no-cache"}
+
+    if _etag_matches(request.headers.get("if-none-match"), rendered.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=rendered.body, media_type="application/json", headers=headers)
 
 @router.post(
     "/{assignment_id}/submit", 
     response_model=schemas.GameResult,
     summary="Enviar respuestas y finalizar",
-    status_code=200
+    status_code=200,
+    responses={
+        202: {"model": schemas.SubmissionTicket, "description": "Envío encolado (modo asíncrono)"}
+    }
 )
-def submit_trivia(
+async def submit_trivia(
     assignment_id: int,
     submission: schemas.GameSubmission,
-    current_user: User = Depends(get_current_user),
-    service: GameService = Depends(get_service)
+    async_mode: bool = Query(False, alias="async", description="Encolar el envío y puntuarlo en segundo plano"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+    service: AsyncServiceRunner[GameService] = Depends(get_service),
+    queue: SubmissionQueue = Depends(get_submission_queue)
 ):
     """
     Recibe las respuestas del usuario, calcula el puntaje y cierra la trivia.
@@ -84,5 +126,58 @@ def submit_trivia(
     3. **Cálculo:** * Fácil: 1 punto
        * Medio: 2 puntos
        * Difícil: 3 puntos
+
+    ### Modo asíncrono (`?async=true`)
+    El envío se guarda en una cola y se responde `202` con un `ticket_id`.
+    El resultado se consulta en `GET /game/submissions/{ticket_id}`.
     """
-    return service.submit_answers(assignment_id, current_user.id, submission)
\ No newline at end of file
+    if async_mode:
+        ticket = await db.run_sync(
+            lambda session: _ticket(queue.enqueue(session, assignment_id, current_user.id, submission))
+        )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=ticket.model_dump(mode="json")
+        )
+
+    return await service(lambda s: s.submit_answers(assignment_id, current_user.id, submission))
+
+@router.get(
+    "/submissions/{ticket_id}",
+    response_model=schemas.GameResult,
+    summary="Consultar resultado de un envío asíncrono",
+    responses={
+        202: {"model": schemas.SubmissionTicket, "description": "El envío aún se está procesando"}
+    }
+)
+async def get_submission_result(
+    ticket_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+    queue: SubmissionQueue = Depends(get_submission_queue)
+):
+    """
+    Devuelve el `GameResult` cuando el envío ya fue puntuado.
+    * **202:** Aún en cola o procesándose (reintentar más tarde).
+    * **4xx:** El envío fue rechazado (mismo error que en el modo síncrono).
+    """
+    job = await db.run_sync(lambda session: queue.get_job(session, ticket_id, current_user.id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Envío no encontrado.")
+
+    if job.status == SubmissionStatus.DONE:
+        return job.result
+    if job.status == SubmissionStatus.FAILED:
+        raise HTTPException(status_code=job.error_status or 500, detail=job.error_detail)
+
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=_ticket(job).model_dump(mode="json")
+    )
+
+def _ticket(job) -> schemas.SubmissionTicket:
+    return schemas.SubmissionTicket(
+        ticket_id=job.id,
+        status=job.status,
+        result_url=f"/game/submissions/{job.id}"
+    )
\ No newline at end of file
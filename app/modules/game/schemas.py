@@ -1,6 +1,7 @@
 from typing import List
 from pydantic import BaseModel, Field, ConfigDict
 from app.modules.trivias.models import AssignmentStatus
+from app.modules.game.models import SubmissionStatus
 
 # --- Para listar trivias pendientes ---
 class MyTriviaResponse(BaseModel):
@@ -54,4 +55,10 @@ class GameSubmission(BaseModel):
 class GameResult(BaseModel):
     total_score: int = Field(..., description="Puntaje total obtenido (suma de dificultades)")
     correct_count: int = Field(..., description="Cantidad de respuestas correctas")
-    message: str
\ No newline at end of file
+    message: str
+
+# --- Modo asíncrono: ticket de envío ---
+class SubmissionTicket(BaseModel):
+    ticket_id: int = Field(..., description="ID del envío encolado (úsalo para consultar el resultado)")
+    status: SubmissionStatus = Field(..., description="Estado del envío (queued/processing/done/failed)")
+    result_url: str = Field(..., description="Endpoint para consultar el resultado")
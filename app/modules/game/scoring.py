@@ -0,0 +1,116 @@
+"""
+Motor de puntaje de trivias.
+
+Valida y puntúa un envío completo en memoria a partir de las opciones y
+preguntas ya cargadas, de modo que el servicio solo necesita un par de
+consultas por lote (en lugar de dos consultas por respuesta).
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from fastapi import HTTPException
+from app.modules.game.schemas import AnswerSubmit
+from app.modules.questions.models import Question, Option, DifficultyLevel
+
+# Regla de Negocio: Puntaje por dificultad
+POINTS_BY_DIFFICULTY = {
+    DifficultyLevel.EASY: 1,
+    DifficultyLevel.MEDIUM: 2,
+    DifficultyLevel.HARD: 3,
+}
+
+
+@dataclass
+class ScoredSubmission:
+    """Resultado de puntuar un envío: totales y filas listas para insertar."""
+    total_score: int = 0
+    correct_count: int = 0
+    answer_rows: List[dict] = field(default_factory=list)
+
+
+def points_for(difficulty: DifficultyLevel, is_correct: bool) -> int:
+    """Puntos que otorga una respuesta según la dificultad de la pregunta."""
+    if not is_correct:
+        return 0
+    return POINTS_BY_DIFFICULTY.get(difficulty, 0)
+
+
+def score_answers(
+    assignment_id: int,
+    answers: List[AnswerSubmit],
+    options_by_id: Dict[int, Option],
+    questions_by_id: Dict[int, Question],
+) -> ScoredSubmission:
+    """
+    Valida y puntúa las respuestas en el mismo orden en que fueron enviadas.
+
+    Las validaciones (y sus códigos de error) son las mismas que se hacían
+    respuesta por respuesta: opción inexistente (404), pregunta inexistente (404)
+    y opción que no pertenece a la pregunta (422).
+    """
+    result = ScoredSubmission()
+
+    for ans_input in answers:
+        option = options_by_id.get(ans_input.option_id)
+        question = questions_by_id.get(ans_input.question_id)
+
+        if not option:
+            raise HTTPException(status_code=404, detail=f"Opción {ans_input.option_id} no encontrada.")
+        if not question:
+            raise HTTPException(status_code=404, detail=f"Pregunta {ans_input.question_id} no encontrada.")
+        if option.question_id != question.id:
+            raise HTTPException(status_code=422, detail=f"La opción {option.id} no pertenece a la pregunta {question.id}.")
+
+        is_correct = option.is_correct
+        points = points_for(question.difficulty, is_correct)
+
+        if is_correct:
+            result.correct_count += 1
+        result.total_score += points
+
+        # Respuesta individual (Auditoría)
+        result.answer_rows.append({
+            "assignment_id": assignment_id,
+            "question_id": question.id,
+            "selected_option_id": option.id,
+            "is_correct": is_correct,
+            "points_awarded": points,
+        })
+
+    return result
+
+
+def score_with_answer_key(
+    assignment_id: int,
+    answers: List[AnswerSubmit],
+    answer_key: dict,
+) -> Optional[ScoredSubmission]:
+    """
+    Puntúa usando la hoja de respuestas compilada de la trivia (sin consultas).
+
+    Devuelve None si alguna respuesta no se puede resolver con la hoja
+    (pregunta fuera de la trivia u opción ajena); en ese caso se debe usar
+    `score_answers`, que entrega el error exacto.
+    """
+    result = ScoredSubmission()
+
+    for ans_input in answers:
+        entry = answer_key.get(ans_input.question_id)
+        if entry is None or ans_input.option_id not in entry.option_ids:
+            return None
+
+        is_correct = ans_input.option_id in entry.correct_option_ids
+        points = entry.points if is_correct else 0
+
+        if is_correct:
+            result.correct_count += 1
+        result.total_score += points
+
+        result.answer_rows.append({
+            "assignment_id": assignment_id,
+            "question_id": ans_input.question_id,
+            "selected_option_id": ans_input.option_id,
+            "is_correct": is_correct,
+            "points_awarded": points,
+        })
+
+    return result
@@ -1,12 +1,36 @@
+from dataclasses import dataclass
+from typing import List
 from fastapi import HTTPException
+from pydantic import TypeAdapter
+from app.core.logger import LoggerSetup
 from app.modules.game.repository import GameRepository
-from app.modules.game.schemas import GameSubmission
-from app.modules.trivias.models import UserAnswer, AssignmentStatus
-from app.modules.questions.models import DifficultyLevel
+from app.modules.game.schemas import GameSubmission, GameQuestion, GameOption
+from app.modules.game.cache import AnswerKeyCache, PlayPayload, PlayPayloadCache, build_play_payload
+from app.modules.game.scoring import score_answers, score_with_answer_key
+from app.modules.trivias.models import AssignmentStatus
+
+logger = LoggerSetup.get_logger(__name__)
+
+_questions_adapter = TypeAdapter(List[GameQuestion])
+
+
+@dataclass
+class RenderedPlay:
+    """JSON listo de `GamePlayResponse` y su ETag."""
+    body: bytes
+    etag: str
+
 
 class GameService:
-    def __init__(self, repository: GameRepository):
+    def __init__(
+        self,
+        repository: GameRepository,
+        answer_keys: AnswerKeyCache | None = None,
+        play_payloads: PlayPayloadCache | None = None
+    ):
         self.repository = repository
+        self.answer_keys = answer_keys
+        self.play_payloads = play_payloads
 
     def get_my_trivias(self, user_id: int):
         # Mapeamos manualmente para devolver estructura plana
@@ -16,27 +40,55 @@ class GameService:
             for a in assignments
         ]
 
-    def get_game_details(self, assignment_id: int, user_id: int):
-        assignment = self.repository.get_assignment_with_details(assignment_id, user_id)
+    def get_playable_trivia(self, assignment_id: int, user_id: int) -> int:
+        """Valida que el jugador pueda jugar la asignación y devuelve su trivia_id."""
+        assignment = self.repository.get_assignment(assignment_id, user_id)
         if not assignment:
             raise HTTPException(status_code=404, detail="Trivia no encontrada o no asignada.")
         
         if assignment.status == AssignmentStatus.COMPLETED:
             raise HTTPException(status_code=400, detail="Ya completaste esta trivia.")
+        return assignment.trivia_id
 
-        # Mapeo manual para asegurar que NO se envíen campos prohibidos
-        return {
-            "assignment_id": assignment.id,
-            "trivia_name": assignment.trivia.name,
-            "questions": [
-                {
-                    "id": q.id,
-                    "text": q.text,
-                    "options": [{"id": o.id, "text": o.text} for o in q.options]
-                }
-                for q in assignment.trivia.questions
-            ]
-        }
+    def render_play(self, assignment_id: int, trivia_id: int) -> RenderedPlay:
+        """
+        Contenido de juego de la trivia para la asignación.
+        La caché es compartida: llamar con un servicio sobre el primario, no
+        sobre una réplica (guardaría contenido atrasado para todos).
+        """
+        # El contenido es el mismo para todos los jugadores: se serializa una vez
+        if self.play_payloads is not None:
+            payload = self.play_payloads.get_or_load(
+                trivia_id,
+                lambda: self._build_play_payload(trivia_id)
+            )
+        else:
+            payload = self._build_play_payload(trivia_id)
+
+        return RenderedPlay(
+            body=payload.render(assignment_id),
+            etag=payload.etag(assignment_id)
+        )
+
+    def _build_play_payload(self, trivia_id: int) -> PlayPayload:
+        trivia = self.repository.get_trivia_content(trivia_id)
+        if not trivia:
+            raise HTTPException(status_code=404, detail="Trivia no encontrada o no asignada.")
+
+        # Mapeo manual para asegurar que NO se envíen campos prohibidos (is_correct)
+        questions = [
+            GameQuestion(
+                id=q.id,
+                text=q.text,
+                options=[GameOption(id=o.id, text=o.text) for o in sorted(q.options, key=lambda o: o.id)]
+            )
+            for q in sorted(trivia.questions, key=lambda q: q.id)
+        ]
+        return build_play_payload(
+            trivia.name,
+            _questions_adapter.dump_json(questions),
+            (q.id for q in questions)
+        )
 
     def submit_answers(self, assignment_id: int, user_id: int, submission: GameSubmission):
         assignment = self.repository.get_assignment(assignment_id, user_id)
@@ -45,61 +97,55 @@ class GameService:
         if assignment.status == AssignmentStatus.COMPLETED:
             raise HTTPException(status_code=409, detail="Esta trivia ya fue completada.")
 
-        total_score = 0
-        correct_count = 0
-        
         try:
-            # Procesar cada respuesta
-            for ans_input in submission.answers:
-                # Validar que la opción pertenezca a la pregunta (seguridad)
-                option = self.repository.get_option(ans_input.option_id)
-                question = self.repository.get_question(ans_input.question_id)
-                
-                if not option:
-                    raise HTTPException(status_code=404, detail=f"Opción {ans_input.option_id} no encontrada.")
-                if not question:
-                    raise HTTPException(status_code=404, detail=f"Pregunta {ans_input.question_id} no encontrada.")
-                if option.question_id != question.id:
-                    raise HTTPException(status_code=422, detail=f"La opción {option.id} no pertenece a la pregunta {question.id}.")
-
-                # Calcular puntos
-                points = 0
-                is_correct = option.is_correct
-                
-                if is_correct:
-                    correct_count += 1
-                    # Regla de Negocio: Puntaje por dificultad
-                    if question.difficulty == DifficultyLevel.EASY:
-                        points = 1
-                    elif question.difficulty == DifficultyLevel.MEDIUM:
-                        points = 2
-                    elif question.difficulty == DifficultyLevel.HARD:
-                        points = 3
-                
-                total_score += points
-
-                # Guardar respuesta individual (Auditoría)
-                user_answer = UserAnswer(
-                    assignment_id=assignment.id,
-                    question_id=question.id,
-                    selected_option_id=option.id,
-                    is_correct=is_correct,
-                    points_awarded=points
-                )
-                self.repository.save_answer(user_answer)
+            scored = self._score(assignment, submission)
+
+            # Guardar respuestas individuales (Auditoría) en un solo INSERT
+            self.repository.save_answers(scored.answer_rows)
 
             # Finalizar la trivia
-            self.repository.complete_assignment(assignment, total_score)
+            self.repository.complete_assignment(assignment, scored.total_score)
             self.repository.commit()  # Commit explícito
-            
-            return {
-                "total_score": total_score,
-                "correct_count": correct_count,
-                "message": "¡Trivia completada con éxito!"
-            }
         except HTTPException:
             self.repository.rollback()
             raise
         except Exception as e:
             self.repository.rollback()
-            raise HTTPException(status_code=500, detail=f"Error procesando respuestas: {str(e)}")
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=f"Error procesando respuestas: {str(e)}")
+
+        # La partida ya está guardada: si falla el leaderboard en memoria no se
+        # reporta error (se corrige solo en la próxima recarga)
+        try:
+            self.repository.sync_leaderboard(user_id, scored.total_score)
+        except Exception:
+            logger.exception("No se pudo actualizar el leaderboard del usuario %s", user_id)
+
+        return {
+            "total_score": scored.total_score,
+            "correct_count": scored.correct_count,
+            "message": "¡Trivia completada con éxito!"
+        }
+
+    def _score(self, assignment, submission: GameSubmission):
+        answers = submission.answers
+
+        # Camino rápido: hoja de respuestas cacheada de la trivia (sin consultas)
+        if self.answer_keys is not None:
+            answer_key = self.answer_keys.get_or_load(
+                assignment.trivia_id,
+                lambda: self.repository.get_answer_key_rows(assignment.trivia_id)
+            )
+            scored = score_with_answer_key(assignment.id, answers, answer_key)
+            if scored is not None:
+                return scored
+
+        # Cargar en lote todas las opciones y preguntas referenciadas
+        options_by_id = {
+            o.id: o for o in self.repository.get_options_by_ids(a.option_id for a in answers)
+        }
+        questions_by_id = {
+            q.id: q for q in self.repository.get_questions_by_ids(a.question_id for a in answers)
+        }
+
+        # Validar y calcular puntos en memoria
+        return score_answers(assignment.id, answers, options_by_id, questions_by_id)
\ No newline at end of file
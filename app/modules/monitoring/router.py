@@ -0,0 +1,51 @@
+from typing import List
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.core.cache import get_cache_stats
+from app.core.database import get_db, get_pool_status
+from app.core.query_plans import find_sequential_scans
+from app.core.deps import get_current_admin
+
+router = APIRouter(prefix="/monitoring", tags=["Monitoring"])
+
+@router.get(
+    "/caches",
+    response_model=List[dict],
+    summary="Estadísticas de cachés en memoria (Solo Admin)"
+)
+def list_cache_stats(current_admin = Depends(get_current_admin)):
+    """
+    Tamaño, aciertos, fallos, expulsiones y tasa de aciertos de cada caché
+    del worker que atiende la petición.
+    """
+    return get_cache_stats()
+
+
+@router.get(
+    "/db-pool",
+    response_model=dict,
+    summary="Estado del pool de conexiones (Solo Admin)"
+)
+def db_pool_status(current_admin = Depends(get_current_admin)):
+    """
+    Conexiones en uso, overflow, histograma del tiempo de espera al pedir
+    una conexión y cantidad de checkouts que fallaron por timeout, para el
+    pool síncrono (`sync`) y el del engine asíncrono (`async`).
+    """
+    return get_pool_status()
+
+
+@router.get(
+    "/query-plans",
+    response_model=List[dict],
+    summary="Consultas calientes sin índice (Solo Admin)"
+)
+def query_plan_findings(
+    db: Session = Depends(get_db),
+    current_admin = Depends(get_current_admin)
+):
+    """
+    Ejecuta EXPLAIN sobre las consultas más frecuentes y devuelve las que
+    recorren la tabla completa (lista vacía = todas usan índices).
+    """
+    return find_sequential_scans(db)
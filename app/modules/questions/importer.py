@@ -0,0 +1,75 @@
+"""
+Lectura de archivos de importación masiva de preguntas.
+
+Los registros se leen línea a línea (el archivo nunca se carga completo en
+memoria) y se entregan como `(fila, datos)` o `(fila, error)` para que
+QuestionService los valide e inserte por lotes.
+
+Formatos:
+- JSONL: un objeto por línea, con el mismo esquema que `POST /questions/`:
+    {"text": "...", "difficulty": "easy", "options": [{"text": "...", "is_correct": true}, ...]}
+- CSV (con encabezado): `text,difficulty,correct,option_1,option_2,...`
+  donde `correct` es el número (desde 1) de la opción correcta.
+"""
+import csv
+import json
+from typing import IO, Iterator, Tuple, Union
+
+Record = Tuple[int, Union[dict, str]]
+
+SUPPORTED_FORMATS = ("csv", "jsonl")
+
+
+def detect_format(filename: str | None, content_type: str | None) -> str | None:
+    """Formato según la extensión del archivo o su content-type."""
+    name = (filename or "").lower()
+    if name.endswith(".csv") or content_type == "text/csv":
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")) or content_type in ("application/jsonl", "application/x-ndjson"):
+        return "jsonl"
+    return None
+
+
+def iter_jsonl_records(stream: IO[str]) -> Iterator[Record]:
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, f"JSON inválido: {e.msg}"
+            continue
+        if not isinstance(data, dict):
+            yield line_number, "Cada línea debe ser un objeto JSON"
+            continue
+        yield line_number, data
+
+
+def iter_csv_records(stream: IO[str]) -> Iterator[Record]:
+    reader = csv.DictReader(stream)
+    option_columns = sorted(
+        (c for c in (reader.fieldnames or []) if c.startswith("option_")),
+        key=lambda c: int(c.split("_", 1)[1]) if c.split("_", 1)[1].isdigit() else 0
+    )
+    for row in reader:
+        line_number = reader.line_num
+        options = [(row.get(c) or "").strip() for c in option_columns]
+        options = [text for text in options if text]
+        correct = (row.get("correct") or "").strip()
+        if not correct.isdigit():
+            yield line_number, "La columna 'correct' debe ser el número de la opción correcta"
+            continue
+        yield line_number, {
+            "text": row.get("text") or "",
+            "difficulty": (row.get("difficulty") or "").strip().lower(),
+            "options": [
+                {"text": text, "is_correct": i == int(correct)}
+                for i, text in enumerate(options, start=1)
+            ],
+        }
+
+
+def iter_records(stream: IO[str], fmt: str) -> Iterator[Record]:
+    if fmt == "csv":
+        return iter_csv_records(stream)
+    return iter_jsonl_records(stream)
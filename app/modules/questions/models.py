@@ -1,30 +1,73 @@
 import enum
-from sqlalchemy import Column, String, Enum, Boolean, ForeignKey, Integer
-from sqlalchemy.orm import relationship
+import re
+import unicodedata
+import sqlalchemy.dialects.postgresql  # noqa: F401 (registra to_tsvector/to_tsquery)
+from sqlalchemy import Column, String, Enum, Boolean, ForeignKey, Integer, Index, func, literal_column, text
+from sqlalchemy.orm import relationship, validates
 from app.core.database import Base
-from app.core.models import IDMixin, TimestampMixin, SoftDeleteMixin
+from app.core.models import IDMixin, TimestampMixin, SoftDeleteMixin, active_only, soft_delete_indexes
 
 class DifficultyLevel(str, enum.Enum):
     EASY = "easy"     # 1 punto
     MEDIUM = "medium" # 2 puntos
     HARD = "hard"     # 3 puntos
 
+def normalize_question_text(text: str) -> str:
+    """
+    Forma canónica para detectar preguntas duplicadas: sin tildes ni
+    diacríticos, en minúsculas (casefold) y con los espacios colapsados.
+    Ej: "  ¿Qué   es PYTHON? " -> "¿que es python?"
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return re.sub(r"\s+", " ", without_accents).strip().casefold()
+
+
 # Preguntas
 class Question(Base, IDMixin, TimestampMixin, SoftDeleteMixin):
     __tablename__ = "questions"
+    __table_args__ = soft_delete_indexes("questions") + (
+        # Una sola pregunta activa por texto normalizado
+        Index("uq_questions_normalized_text", "normalized_text", unique=True, **active_only()),
+        # Búsqueda de texto (solo PostgreSQL; en otros motores se usa el
+        # índice en memoria de `app.modules.questions.search`). Misma expresión que `search_vector`.
+        Index(
+            "ix_questions_search",
+            text("to_tsvector('simple'::regconfig, normalized_text)"),
+            postgresql_using="gin",
+            postgresql_where=text("is_active"),
+        ).ddl_if(dialect="postgresql"),
+    )
 
     text = Column(String, nullable=False)
+    # Se mantiene sincronizado con `text` (ver `_sync_normalized_text`)
+    normalized_text = Column(String, nullable=True)
     difficulty = Column(Enum(DifficultyLevel), nullable=False)
     
     # Relación One-to-Many: Una pregunta tiene muchas opciones
     options = relationship("Option", back_populates="question", cascade="all, delete-orphan")
 
+    @validates("text")
+    def _sync_normalized_text(self, key, value):
+        self.normalized_text = normalize_question_text(value) if value is not None else None
+        return value
+
+
+# Configuración de búsqueda de PostgreSQL. Es literal (no parámetro) para que
+# la expresión de las consultas coincida con la del índice `ix_questions_search`.
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+
+
+def search_vector(column):
+    """`normalized_text` ya está sin tildes y en minúsculas: basta la configuración 'simple'."""
+    return func.to_tsvector(SEARCH_CONFIG, column)
+
 #  Opciones de respuesta para las preguntas
 class Option(Base, IDMixin):
     __tablename__ = "options"
 
     text = Column(String, nullable=False)
     is_correct = Column(Boolean, default=False, nullable=False) # Solo una debe ser True [cite: 29]
-    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False, index=True)
     
     question = relationship("Question", back_populates="options")
\ No newline at end of file
@@ -1,18 +1,86 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.modules.questions.models import Question, Option
-from app.modules.questions.schemas import QuestionCreate, QuestionUpdate
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Set, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.exc import IntegrityError
+from app.core.pagination import apply_keyset
+from app.modules.questions.models import (
+    Question, Option, DifficultyLevel, SEARCH_CONFIG, normalize_question_text, search_vector
+)
+from app.modules.questions.search import SearchTerm, search_index, to_tsquery
+from app.modules.game.cache import invalidate_question
+from app.modules.questions.schemas import OptionUpdate, QuestionCreate, QuestionUpdate
+from app.modules.trivias.models import AssignmentStatus, TriviaAssignment, UserAnswer, trivia_questions
+
+
+def _option_key(text: str) -> str:
+    return text.strip().casefold()
+
+
+@dataclass
+class OptionDiff:
+    """Cambios mínimos para llevar las opciones actuales al conjunto pedido."""
+    update: List[Tuple[Option, OptionUpdate]] = field(default_factory=list)
+    insert: List[OptionUpdate] = field(default_factory=list)
+    delete: List[Option] = field(default_factory=list)
+    unknown_ids: List[int] = field(default_factory=list)
+
+
+def diff_options(current: List[Option], wanted: List[OptionUpdate]) -> OptionDiff:
+    """
+    Empareja cada opción pedida con una actual por `id` o, si no trae id, por
+    texto (sin distinguir mayúsculas ni espacios). Las emparejadas conservan su
+    id (las respuestas históricas siguen apuntando a ellas) y solo se
+    actualizan si cambian; las demás se insertan y las actuales sin pareja se eliminan.
+    """
+    diff = OptionDiff()
+    by_id = {o.id: o for o in current}
+    unmatched = dict(by_id)
+    pending = []
+    for opt in wanted:
+        if opt.id is None:
+            pending.append(opt)
+        elif opt.id in unmatched:
+            diff.update.append((unmatched.pop(opt.id), opt))
+        else:
+            diff.unknown_ids.append(opt.id)
+
+    by_text = {}
+    for o in unmatched.values():
+        by_text.setdefault(_option_key(o.text), o)
+    for opt in pending:
+        match = by_text.pop(_option_key(opt.text), None)
+        if match is not None:
+            unmatched.pop(match.id)
+            diff.update.append((match, opt))
+        else:
+            diff.insert.append(opt)
+
+    diff.update = [
+        (o, opt) for o, opt in diff.update
+        if o.text != opt.text.strip() or o.is_correct != opt.is_correct
+    ]
+    diff.delete = list(unmatched.values())
+    return diff
+
 
 class QuestionRepository:
     def __init__(self, db: Session):
         self.db = db
 
     def get_all(self, skip: int = 0, limit: int = 100, include_deleted: bool = False):
-        query = self.db.query(Question)
+        # Las opciones van en la respuesta: cargarlas en una sola consulta (evita N+1)
+        query = self.db.query(Question).options(selectinload(Question.options))
         if not include_deleted:
             query = query.filter(Question.is_active == True)
         return query.offset(skip).limit(limit).all()
+
+    def get_page_after(self, after: Optional[tuple] = None, limit: int = 100, include_deleted: bool = False):
+        """Página por keyset (id): las `limit + 1` preguntas siguientes al cursor."""
+        query = self.db.query(Question).options(selectinload(Question.options))
+        if not include_deleted:
+            query = query.filter(Question.is_active == True)
+        return apply_keyset(query, (Question.id,), after, limit).all()
     
     def count_all(self, include_deleted: bool = False) -> int:
         """Cuenta el total de preguntas."""
@@ -29,17 +97,142 @@ class QuestionRepository:
 
     def get_by_text(self, text: str, include_deleted: bool = False) -> Question | None:
         """
-        Busca una pregunta ignorando mayúsculas/minúsculas y espacios.
-        Ej: "HOLA" encuentra "Hola "
+        Busca una pregunta ignorando mayúsculas/minúsculas, tildes y espacios
+        (por la columna indexada `normalized_text`).
+        Ej: "¿QUE es  python?" encuentra "¿Qué es Python?"
         """
-        search_text = text.strip().lower()
         query = self.db.query(Question).filter(
-            func.lower(Question.text) == search_text
+            Question.normalized_text == normalize_question_text(text)
         )
         if not include_deleted:
             query = query.filter(Question.is_active == True)
         return query.first()
 
+    def get_existing_normalized(self, normalized_texts: Iterable[str]) -> Set[str]:
+        """Cuáles de los textos normalizados ya existen entre las preguntas activas (una consulta)."""
+        texts = list(set(normalized_texts))
+        if not texts:
+            return set()
+        rows = self.db.query(Question.normalized_text).filter(
+            Question.normalized_text.in_(texts),
+            Question.is_active == True
+        ).all()
+        return {text for (text,) in rows}
+
+    def search(
+        self,
+        terms: List[SearchTerm],
+        difficulty: Optional[DifficultyLevel] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Tuple[List[Tuple[Question, float]], int]:
+        """
+        Preguntas activas que contienen todos los términos, por relevancia.
+        Devuelve la página de `(pregunta, puntaje)` y el total de coincidencias.
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            return self._search_postgres(terms, difficulty, limit, offset)
+
+        search_index.ensure_fresh(lambda: self.db.query(
+            Question.id, Question.text, Question.difficulty
+        ).filter(Question.is_active == True).all())
+        matches = search_index.search(terms, difficulty)
+        page = matches[offset:offset + limit]
+        if not page:
+            return [], len(matches)
+        questions = {
+            q.id: q for q in self.db.query(Question).options(selectinload(Question.options)).filter(
+                Question.id.in_([question_id for question_id, _ in page])
+            )
+        }
+        return [(questions[qid], score) for qid, score in page if qid in questions], len(matches)
+
+    def _search_postgres(self, terms, difficulty, limit, offset):
+        # Misma expresión que el índice GIN `ix_questions_search`
+        vector = search_vector(Question.normalized_text)
+        tsquery = func.to_tsquery(SEARCH_CONFIG, to_tsquery(terms))
+        query = self.db.query(Question).filter(
+            Question.is_active == True,
+            vector.bool_op("@@")(tsquery)
+        )
+        if difficulty is not None:
+            query = query.filter(Question.difficulty == difficulty)
+
+        total = query.count()
+        rank = func.ts_rank(vector, tsquery)
+        rows = query.add_columns(rank.label("score")).options(
+            selectinload(Question.options)
+        ).order_by(rank.desc(), Question.id).offset(offset).limit(limit).all()
+        return [(question, round(float(score), 4)) for question, score in rows], total
+
+    def _build(self, question_data: QuestionCreate) -> Question:
+        return Question(
+            text=question_data.text.strip(),
+            difficulty=question_data.difficulty,
+            options=[
+                Option(text=opt.text.strip(), is_correct=opt.is_correct)
+                for opt in question_data.options
+            ]
+        )
+
+    def bulk_create(self, questions: List[QuestionCreate]) -> None:
+        """Inserta un lote de preguntas con sus opciones en una sola transacción."""
+        created = [self._build(q) for q in questions]
+        self.db.add_all(created)
+        self.db.flush()
+        indexed = [(q.id, q.text, q.difficulty) for q in created]
+        self.db.commit()
+        for row in indexed:
+            search_index.upsert(*row)
+
+    def create_each(self, questions: List[QuestionCreate]) -> List[bool]:
+        """
+        Inserta el lote pregunta por pregunta (un SAVEPOINT cada una) para
+        aislar las que violan el índice único. Devuelve si cada una se insertó.
+        """
+        inserted, indexed = [], []
+        for question_data in questions:
+            question = self._build(question_data)
+            try:
+                with self.db.begin_nested():
+                    self.db.add(question)
+                inserted.append(True)
+                indexed.append((question.id, question.text, question.difficulty))
+            except IntegrityError:
+                inserted.append(False)
+        self.db.commit()
+        for row in indexed:
+            search_index.upsert(*row)
+        return inserted
+
+    def get_usage(self, question_ids: Iterable[int]) -> List[Tuple[int, int]]:
+        """
+        (id, asignaciones pendientes) de las preguntas activas indicadas.
+        Se cuentan al consultar (trivia_questions -> trivia_assignments por
+        trivia y estado, ambos indexados): eliminar es poco frecuente y así
+        completar una trivia no tiene que actualizar cada una de sus preguntas.
+        """
+        ids = list(set(question_ids))
+        if not ids:
+            return []
+        pending = select(
+            trivia_questions.c.question_id, func.count(TriviaAssignment.id).label("pending")
+        ).join(
+            TriviaAssignment, TriviaAssignment.trivia_id == trivia_questions.c.trivia_id
+        ).where(
+            trivia_questions.c.question_id.in_(ids),
+            TriviaAssignment.status == AssignmentStatus.PENDING
+        ).group_by(trivia_questions.c.question_id).subquery()
+        return self.db.query(Question.id, func.coalesce(pending.c.pending, 0)).outerjoin(
+            pending, pending.c.question_id == Question.id
+        ).filter(
+            Question.id.in_(ids),
+            Question.is_active == True
+        ).all()
+
+    def rollback(self) -> None:
+        self.db.rollback()
+
     def create(self, question_data: QuestionCreate) -> Question:
         clean_text = question_data.text.strip()
         
@@ -60,39 +253,53 @@ class QuestionRepository:
             
         self.db.commit()
         self.db.refresh(db_question)
+        search_index.upsert(db_question.id, db_question.text, db_question.difficulty)
         return db_question
     
-    def update(self, question: Question, update_data: QuestionUpdate) -> Question:
-        """Actualiza solo los campos proporcionados."""
-        update_dict = update_data.model_dump(exclude_unset=True)
-        
-        # Si se actualizan opciones, eliminar las anteriores y crear nuevas
-        if 'options' in update_dict and update_dict['options']:
-            # Eliminar opciones anteriores
-            self.db.query(Option).filter(Option.question_id == question.id).delete()
-            
-            # Crear nuevas opciones
-            for opt_data in update_dict.pop('options'):
-                db_option = Option(
-                    text=opt_data.text.strip(),
-                    is_correct=opt_data.is_correct,
-                    question_id=question.id
-                )
-                self.db.add(db_option)
+    def get_answered_option_ids(self, option_ids: Iterable[int]) -> Set[int]:
+        """Cuáles de las opciones ya fueron elegidas en alguna respuesta."""
+        ids = list(option_ids)
+        if not ids:
+            return set()
+        rows = self.db.query(UserAnswer.selected_option_id).filter(
+            UserAnswer.selected_option_id.in_(ids)
+        ).distinct().all()
+        return {option_id for (option_id,) in rows}
+
+    def update(self, question: Question, update_data: QuestionUpdate, option_diff: Optional[OptionDiff] = None) -> Question:
+        """
+        Actualiza solo los campos proporcionados.
+        Las opciones se modifican según `option_diff` (ver `diff_options`):
+        todos los INSERT/UPDATE/DELETE van en un único flush.
+        """
+        update_dict = update_data.model_dump(exclude_unset=True, exclude={"options"})
+
+        if option_diff is not None:
+            for option, opt_data in option_diff.update:
+                option.text = opt_data.text.strip()
+                option.is_correct = opt_data.is_correct
+            for option in option_diff.delete:
+                question.options.remove(option)  # delete-orphan
+            for opt_data in option_diff.insert:
+                question.options.append(Option(text=opt_data.text.strip(), is_correct=opt_data.is_correct))
         
         # Actualizar campos restantes
-        for field, value in update_dict.items():
-            if field == 'text':
+        for field_name, value in update_dict.items():
+            if field_name == 'text':
                 value = value.strip()
-            setattr(question, field, value)
+            setattr(question, field_name, value)
         
         self.db.commit()
+        invalidate_question(question.id)
         self.db.refresh(question)
+        search_index.upsert(question.id, question.text, question.difficulty)
         return question
     
     def soft_delete(self, question: Question) -> Question:
         """Marca la pregunta como eliminada (soft delete)."""
         question.soft_delete()
         self.db.commit()
+        invalidate_question(question.id)
+        search_index.remove(question.id)
         self.db.refresh(question)
         return question
\ No newline at end of file
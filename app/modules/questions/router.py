@@ -1,10 +1,13 @@
-from typing import List
+import io
+from typing import List, Optional
 from app.core.deps import get_current_admin
-from fastapi import APIRouter, Depends, status, Query
+from fastapi import APIRouter, Depends, File, HTTPException, status, Query, UploadFile
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.pagination import PaginatedResponse
+from app.core.database import get_db, get_read_db
+from app.core.pagination import CursorPage, PaginatedResponse
 from app.modules.questions import schemas
+from app.modules.questions.importer import SUPPORTED_FORMATS, detect_format
+from app.modules.questions.models import DifficultyLevel
 from app.modules.questions.repository import QuestionRepository
 from app.modules.questions.service import QuestionService
 
@@ -15,6 +18,10 @@ def get_service(db: Session = Depends(get_db)) -> QuestionService:
     repository = QuestionRepository(db)
     return QuestionService(repository)
 
+def get_read_service(db: Session = Depends(get_read_db)) -> QuestionService:
+    """Servicio sobre una réplica de lectura (solo para listados)."""
+    return QuestionService(QuestionRepository(db))
+
 @router.get(
     "/",
     response_model=PaginatedResponse[schemas.QuestionResponse],
@@ -28,12 +35,62 @@ def get_service(db: Session = Depends(get_db)) -> QuestionService:
 def list_questions(
     page: int = Query(1, ge=1, description="Número de página (1-indexed)"),
     per_page: int = Query(10, ge=1, le=100, description="Elementos por página"),
-    service: QuestionService = Depends(get_service),
+    service: QuestionService = Depends(get_read_service),
     current_admin = Depends(get_current_admin)
 ):
     """Lista todas las preguntas con paginación."""
     return service.get_questions(page=page, per_page=per_page)
 
+@router.get(
+    "/cursor",
+    response_model=CursorPage[schemas.QuestionResponse],
+    summary="Listar preguntas por cursor",
+    responses={
+        200: {"description": "Página de preguntas obtenida exitosamente"},
+        400: {"description": "Cursor inválido"},
+        401: {"description": "No autenticado"},
+        403: {"description": "No tienes permisos de administrador"}
+    }
+)
+def list_questions_cursor(
+    cursor: Optional[str] = Query(None, description="`next_cursor` de la página anterior (vacío = primera página)"),
+    per_page: int = Query(100, ge=1, le=1000, description="Elementos por página"),
+    include_total: bool = Query(False, description="Incluir el total de elementos (agrega un COUNT)"),
+    service: QuestionService = Depends(get_read_service),
+    current_admin = Depends(get_current_admin)
+):
+    """
+    Lista preguntas con paginación por cursor (keyset).
+    El costo de cada página no depende de su profundidad: recomendado para exportar.
+    """
+    return service.get_questions_cursor(cursor=cursor, per_page=per_page, include_total=include_total)
+
+@router.get(
+    "/search",
+    response_model=schemas.QuestionSearchResponse,
+    summary="Buscar preguntas",
+    responses={
+        200: {"description": "Preguntas que coinciden, ordenadas por relevancia"},
+        400: {"description": "Búsqueda sin términos"},
+        401: {"description": "No autenticado"},
+        403: {"description": "No tienes permisos de administrador"}
+    }
+)
+def search_questions(
+    q: str = Query(..., min_length=1, max_length=200, description="Términos a buscar; `term*` busca por prefijo"),
+    difficulty: Optional[DifficultyLevel] = Query(None, description="Filtrar por dificultad"),
+    limit: int = Query(20, ge=1, le=100, description="Máximo de resultados"),
+    offset: int = Query(0, ge=0, description="Resultados a omitir"),
+    service: QuestionService = Depends(get_read_service),
+    current_admin = Depends(get_current_admin)
+):
+    """
+    Búsqueda de texto sobre las preguntas activas (sin distinguir mayúsculas ni tildes).
+    Todas las palabras deben aparecer; una palabra terminada en `*` busca por prefijo
+    (`constitu*` encuentra "constitución"). Usa el índice GIN de PostgreSQL.
+    """
+    return service.search_questions(q, difficulty=difficulty, limit=limit, offset=offset)
+
 @router.post(
     "/",
     response_model=schemas.QuestionResponse,
@@ -61,6 +118,68 @@ def create_question(
       - medium: 2 puntos
       - hard: 3 puntos
     """
+    return service.create_question(question)
+
+@router.post(
+    "/import",
+    response_model=schemas.QuestionImportReport,
+    summary="Importar preguntas (CSV / JSONL)",
+    responses={
+        200: {"description": "Importación procesada; `errors` detalla las filas rechazadas"},
+        400: {"description": "Formato de archivo no soportado"},
+        401: {"description": "No autenticado"},
+        403: {"description": "No tienes permisos de administrador"}
+    }
+)
+def import_questions(
+    file: UploadFile = File(..., description="Archivo .csv o .jsonl (UTF-8)"),
+    format: Optional[str] = Query(None, description="csv o jsonl (por defecto, según la extensión)"),
+    service: QuestionService = Depends(get_service),
+    current_admin = Depends(get_current_admin)
+):
+    """
+    Importa preguntas en lote aplicando las mismas validaciones que `POST /questions/`
+    (exactamente una opción correcta, texto no duplicado).
+
+    - JSONL: un objeto por línea con `text`, `difficulty` y `options`.
+    - CSV: encabezado `text,difficulty,correct,option_1,option_2,...`
+      (`correct` = número de la opción correcta).
+
+    El archivo se procesa línea a línea e inserta por lotes; las filas inválidas
+    no detienen la importación y se devuelven en `errors`. Si el archivo no es
+    UTF-8 válido, se importa lo leído hasta ese punto y el error se informa en
+    `errors` con la primera fila no procesada.
+    """
+    fmt = (format or detect_format(file.filename, file.content_type) or "").lower()
+    if fmt not in SUPPORTED_FORMATS:
+        raise HTTPException(status_code=400, detail="Formato no soportado: usa un archivo .csv o .jsonl")
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return service.import_questions(stream, fmt)
+    finally:
+        stream.detach()
+
+@router.post(
+    "/deletable",
+    response_model=schemas.QuestionDeletableReport,
+    summary="Verificar qué preguntas se pueden eliminar",
+    responses={
+        200: {"description": "Preguntas clasificadas en eliminables, bloqueadas e inexistentes"},
+        401: {"description": "No autenticado"},
+        403: {"description": "No tienes permisos de administrador"}
+    }
+)
+def check_deletable_questions(
+    request: schemas.QuestionIdsRequest,
+    service: QuestionService = Depends(get_service),
+    current_admin = Depends(get_current_admin)
+):
+    """
+    Indica, para hasta 1000 preguntas, cuáles se pueden eliminar: las que
+    tienen asignaciones pendientes en trivias activas quedan en `blocked`.
+    """
+    return service.get_deletable(request.question_ids)
+
 @router.get(
     "/{question_id}",
     response_model=schemas.QuestionResponse,
@@ -87,7 +206,7 @@ def get_question(
     responses={
         200: {"description": "Pregunta actualizada exitosamente"},
         404: {"description": "Pregunta no encontrada"},
-        409: {"description": "Ya existe una pregunta con ese texto"},
+        409: {"description": "Ya existe una pregunta con ese texto o se eliminaría una opción ya respondida"},
         422: {"description": "Validación fallida (debe tener exactamente 1 respuesta correcta)"},
         401: {"description": "No autenticado"},
         403: {"description": "No tienes permisos de administrador"}
@@ -101,7 +220,9 @@ def update_question(
 ):
     """
     Actualiza una pregunta. Todos los campos son opcionales.
-    Si se actualizan opciones, se reemplazan todas las anteriores.
+    Si se envían opciones, son el conjunto final: las existentes se emparejan por
+    `id` o texto y conservan su id; las nuevas se insertan y las que falten se
+    eliminan (409 si alguna ya tiene respuestas registradas).
     """
     return service.update_question(question_id, update_data)
 
@@ -119,12 +240,11 @@ def update_question(
 )
 def delete_question(
     question_id: int,
-    db: Session = Depends(get_db),
     service: QuestionService = Depends(get_service),
     current_admin = Depends(get_current_admin)
 ):
     """
     Elimina una pregunta (soft delete). Solo admin.
-    Valida que no esté en trivias activas antes de eliminar.
+    Valida que no esté en trivias con asignaciones pendientes antes de eliminar.
     """
-    return service.delete_question(question_id, db)
\ No newline at end of file
+    return service.delete_question(question_id)
\ No newline at end of file
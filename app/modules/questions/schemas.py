@@ -9,6 +9,9 @@ class OptionBase(BaseModel):
 class OptionCreate(OptionBase):
     is_correct: bool = Field(False, description="Marca si esta es la opción correcta")
 
+class OptionUpdate(OptionCreate):
+    id: Optional[int] = Field(None, description="ID de la opción existente (si se omite, se busca por texto)")
+
 class OptionResponse(OptionBase):
     id: int
     # Nota: En el futuro, para el jugador, ocultaremos 'is_correct'.
@@ -30,10 +33,51 @@ class QuestionUpdate(BaseModel):
     """Schema para actualizar preguntas. Todos los campos son opcionales."""
     text: Optional[str] = Field(None, json_schema_extra={"example": "¿Cuál es la capital de Perú?"})
     difficulty: Optional[DifficultyLevel] = Field(None, json_schema_extra={"example": "medium"})
-    options: Optional[List[OptionCreate]] = Field(None, min_length=2, description="Reemplaza todas las opciones")
+    options: Optional[List[OptionUpdate]] = Field(
+        None, min_length=2,
+        description="Conjunto final de opciones: se emparejan con las actuales por id o texto; las que falten se eliminan"
+    )
 
 class QuestionResponse(QuestionBase):
     id: int
     options: List[OptionResponse]
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# --- Búsqueda ---
+class QuestionSearchHit(QuestionResponse):
+    score: float = Field(..., description="Relevancia (mayor = más relevante)")
+
+class QuestionSearchResponse(BaseModel):
+    items: List[QuestionSearchHit]
+    total: int
+    limit: int
+    offset: int
+
+# --- Eliminación masiva ---
+class QuestionIdsRequest(BaseModel):
+    question_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+class QuestionUsage(BaseModel):
+    id: int
+    pending_assignments: int
+
+class QuestionDeletableReport(BaseModel):
+    deletable: List[int] = []
+    blocked: List[QuestionUsage] = Field([], description="Preguntas con asignaciones pendientes en trivias activas")
+    not_found: List[int] = Field([], description="Inexistentes o ya eliminadas")
+
+# --- Importación masiva ---
+class QuestionImportError(BaseModel):
+    row: int = Field(..., description="Fila del archivo (línea en JSONL, registro en CSV)")
+    error: str
+
+class QuestionImportReport(BaseModel):
+    total_rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: List[QuestionImportError] = []
+
+    def add_error(self, row: int, error: str) -> None:
+        self.failed += 1
+        self.errors.append(QuestionImportError(row=row, error=error))
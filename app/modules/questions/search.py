@@ -0,0 +1,159 @@
+"""
+Búsqueda de texto sobre el banco de preguntas.
+
+- PostgreSQL: índice GIN sobre `to_tsvector('simple', normalized_text)`
+  (el texto ya está sin tildes y en minúsculas) y `ts_rank` para ordenar.
+- Otros motores (SQLite en desarrollo/tests): índice invertido en memoria
+  (por worker), cargado desde la base, actualizado en cada escritura del
+  repositorio y recargado cada QUESTION_SEARCH_REFRESH_SECONDS para
+  incorporar lo escrito por otros workers.
+
+Consulta: términos separados por espacios, todos obligatorios; un término
+terminado en `*` busca por prefijo (`constitu*`).
+"""
+import bisect
+import math
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.modules.questions.models import DifficultyLevel, normalize_question_text
+
+_TOKEN = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class SearchTerm:
+    text: str
+    prefix: bool
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(normalize_question_text(text))
+
+
+def parse_query(query: str) -> List[SearchTerm]:
+    terms = []
+    for raw in query.split():
+        tokens = tokenize(raw)
+        for i, token in enumerate(tokens):
+            terms.append(SearchTerm(token, prefix=raw.endswith("*") and i == len(tokens) - 1))
+    return terms
+
+
+def to_tsquery(terms: List[SearchTerm]) -> str:
+    """Consulta para `to_tsquery('simple', ...)` (los tokens son solo \\w+)."""
+    return " & ".join(f"{t.text}:*" if t.prefix else t.text for t in terms)
+
+
+class QuestionSearchIndex:
+    """Índice invertido término -> {pregunta: frecuencia}, thread-safe."""
+
+    def __init__(self, refresh_seconds: float = 0):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._vocabulary: List[str] = []  # Términos ordenados (búsqueda por prefijo)
+        self._docs: Dict[int, Tuple[DifficultyLevel, Counter]] = {}
+        self._loaded_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._loaded_at is not None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+    def ensure_fresh(self, loader: Callable[[], Iterable[Tuple[int, str, DifficultyLevel]]]) -> None:
+        loaded_at = self._loaded_at
+        if loaded_at is not None and not (
+            self.refresh_seconds and time.monotonic() - loaded_at > self.refresh_seconds
+        ):
+            return
+        with self._lock:
+            if self._loaded_at == loaded_at:
+                self.load(loader())
+
+    def load(self, rows: Iterable[Tuple[int, str, DifficultyLevel]]) -> None:
+        with self._lock:
+            self._postings, self._docs = {}, {}
+            for question_id, text, difficulty in rows:
+                self._add(question_id, text, difficulty)
+            self._vocabulary = sorted(self._postings)
+            self._loaded_at = time.monotonic()
+
+    def _add(self, question_id: int, text: str, difficulty: DifficultyLevel) -> List[str]:
+        """Indexa la pregunta y devuelve los términos que no estaban en el índice."""
+        counts = Counter(tokenize(text))
+        self._docs[question_id] = (difficulty, counts)
+        new_terms = []
+        for term, tf in counts.items():
+            if term not in self._postings:
+                self._postings[term] = {}
+                new_terms.append(term)
+            self._postings[term][question_id] = tf
+        return new_terms
+
+    def upsert(self, question_id: int, text: str, difficulty: DifficultyLevel) -> None:
+        with self._lock:
+            if not self.ready:
+                return
+            self._remove(question_id)
+            for term in self._add(question_id, text, difficulty):
+                # Los términos que quedan sin preguntas se filtran en `_expand`
+                index = bisect.bisect_left(self._vocabulary, term)
+                if index == len(self._vocabulary) or self._vocabulary[index] != term:
+                    self._vocabulary.insert(index, term)
+
+    def remove(self, question_id: int) -> None:
+        with self._lock:
+            if self.ready:
+                self._remove(question_id)
+
+    def _remove(self, question_id: int) -> None:
+        _, counts = self._docs.pop(question_id, (None, Counter()))
+        for term in counts:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(question_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def _expand(self, term: SearchTerm) -> List[str]:
+        if not term.prefix:
+            return [term.text] if term.text in self._postings else []
+        start = bisect.bisect_left(self._vocabulary, term.text)
+        end = bisect.bisect_left(self._vocabulary, term.text + "\uffff")
+        return [t for t in self._vocabulary[start:end] if t in self._postings]
+
+    def search(self, terms: List[SearchTerm], difficulty: Optional[DifficultyLevel] = None) -> List[Tuple[int, float]]:
+        """(id, puntaje) de las preguntas que contienen todos los términos, mejor puntaje primero."""
+        with self._lock:
+            total_docs = max(len(self._docs), 1)
+            scores: Optional[Dict[int, float]] = None
+            for term in terms:
+                term_scores: Dict[int, float] = {}
+                for expanded in self._expand(term):
+                    postings = self._postings[expanded]
+                    idf = math.log(1 + total_docs / len(postings))
+                    for question_id, tf in postings.items():
+                        term_scores[question_id] = term_scores.get(question_id, 0.0) + tf * idf
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {q: s + term_scores[q] for q, s in scores.items() if q in term_scores}
+                if not scores:
+                    return []
+
+            matches = [
+                (question_id, round(score, 4)) for question_id, score in (scores or {}).items()
+                if difficulty is None or self._docs[question_id][0] == difficulty
+            ]
+        return sorted(matches, key=lambda m: (-m[1], m[0]))
+
+
+search_index = QuestionSearchIndex(refresh_seconds=settings.QUESTION_SEARCH_REFRESH_SECONDS)
@@ -1,9 +1,17 @@
+from typing import IO, List, Optional, Tuple
 from fastapi import HTTPException
-from app.modules.questions.schemas import QuestionCreate, QuestionUpdate
-from app.modules.questions.repository import QuestionRepository
-from app.core.pagination import paginate, calculate_skip
-from sqlalchemy.orm import Session
-from app.modules.trivias.models import TriviaAssignment, AssignmentStatus
+from pydantic import ValidationError
+from app.core.config import settings
+from app.modules.questions.importer import iter_records
+from app.modules.questions.models import DifficultyLevel, normalize_question_text
+from app.modules.questions.schemas import (
+    QuestionCreate, QuestionUpdate, QuestionImportReport, QuestionResponse, QuestionSearchHit, QuestionSearchResponse,
+    QuestionDeletableReport, QuestionUsage
+)
+from app.modules.questions.repository import QuestionRepository, diff_options
+from app.modules.questions.search import parse_query
+from app.core.pagination import paginate, calculate_skip, cursor_paginate, decode_cursor
+from sqlalchemy.exc import IntegrityError
 
 class QuestionService:
     def __init__(self, repository: QuestionRepository):
@@ -15,7 +23,35 @@ class QuestionService:
         items = self.repository.get_all(skip=skip, limit=per_page)
         total = self.repository.count_all()
         return paginate(items, total, page, per_page)
+
+    def get_questions_cursor(self, cursor: str | None = None, per_page: int = 10, include_total: bool = False):
+        """Obtiene preguntas con paginación por cursor (keyset por id)."""
+        rows = self.repository.get_page_after(decode_cursor(cursor, 1), limit=per_page)
+        total = self.repository.count_all() if include_total else None
+        return cursor_paginate(rows, per_page, key=lambda q: (q.id,), total=total)
     
+    def search_questions(
+        self,
+        query: str,
+        difficulty: Optional[DifficultyLevel] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> QuestionSearchResponse:
+        """Busca preguntas por términos (todos obligatorios, `term*` = prefijo), ordenadas por relevancia."""
+        terms = parse_query(query)
+        if not terms:
+            raise HTTPException(status_code=400, detail="La búsqueda debe incluir al menos un término")
+        hits, total = self.repository.search(terms, difficulty=difficulty, limit=limit, offset=offset)
+        return QuestionSearchResponse(
+            items=[
+                QuestionSearchHit(**QuestionResponse.model_validate(question).model_dump(), score=score)
+                for question, score in hits
+            ],
+            total=total,
+            limit=limit,
+            offset=offset
+        )
+
     def get_question_by_id(self, question_id: int):
         question = self.repository.get_by_id(question_id)
         if not question:
@@ -31,6 +67,20 @@ class QuestionService:
             )
 
         # Validar exactamente 1 respuesta correcta
+        self._validate_correct_options(question_data)
+            
+        try:
+            return self.repository.create(question_data)
+        except IntegrityError:
+            # Otra petición creó la misma pregunta entre la validación y el commit
+            self.repository.rollback()
+            raise HTTPException(
+                status_code=409,
+                detail=f"La pregunta '{question_data.text}' ya existe en el sistema."
+            )
+    
+    @staticmethod
+    def _validate_correct_options(question_data: QuestionCreate) -> None:
         correct_answers = sum(1 for opt in question_data.options if opt.is_correct)
         
         if correct_answers == 0:
@@ -38,9 +88,88 @@ class QuestionService:
         
         if correct_answers > 1:
             raise HTTPException(status_code=422, detail="La pregunta solo puede tener UNA respuesta correcta.")
-            
-        return self.repository.create(question_data)
-    
+
+    def import_questions(self, stream: IO[str], fmt: str) -> QuestionImportReport:
+        """
+        Importa preguntas desde un archivo CSV/JSONL con las mismas reglas que
+        `create_question`. Las filas válidas se insertan en lotes de
+        QUESTION_IMPORT_BATCH_SIZE (una transacción por lote); las inválidas
+        se reportan con su número de fila y no detienen la importación.
+
+        Si el archivo deja de ser UTF-8 válido, la lectura se detiene: lo ya
+        leído se importa igual y el resto se informa como error en la primera
+        fila no procesada (los lotes anteriores ya están confirmados).
+        """
+        report = QuestionImportReport()
+        batch: List[Tuple[int, QuestionCreate]] = []
+        seen = set()  # Textos normalizados ya aceptados en este archivo
+        last_row = 0
+
+        try:
+            for row, record in iter_records(stream, fmt):
+                report.total_rows += 1
+                last_row = row
+                if isinstance(record, str):
+                    report.add_error(row, record)
+                    continue
+                try:
+                    question_data = QuestionCreate(**record)
+                    self._validate_correct_options(question_data)
+                except ValidationError as e:
+                    report.add_error(row, "; ".join(
+                        f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+                    ))
+                    continue
+                except HTTPException as e:
+                    report.add_error(row, e.detail)
+                    continue
+
+                normalized = normalize_question_text(question_data.text)
+                if normalized in seen:
+                    report.add_error(row, "Pregunta duplicada dentro del archivo.")
+                    continue
+                seen.add(normalized)
+                batch.append((row, question_data))
+
+                if len(batch) >= settings.QUESTION_IMPORT_BATCH_SIZE:
+                    self._import_batch(batch, report)
+                    batch = []
+        except UnicodeDecodeError:
+            report.add_error(
+                last_row + 1,
+                "El archivo no está codificado en UTF-8 desde esta fila; no se procesaron las filas restantes."
+            )
+
+        if batch:
+            self._import_batch(batch, report)
+        report.errors.sort(key=lambda e: e.row)
+        return report
+
+    def _import_batch(self, batch: List[Tuple[int, QuestionCreate]], report: QuestionImportReport) -> None:
+        existing = self.repository.get_existing_normalized(
+            normalize_question_text(q.text) for _, q in batch
+        )
+        new = []
+        for row, question_data in batch:
+            if normalize_question_text(question_data.text) in existing:
+                report.add_error(row, f"La pregunta '{question_data.text}' ya existe en el sistema.")
+            else:
+                new.append((row, question_data))
+        if not new:
+            return
+
+        try:
+            self.repository.bulk_create([q for _, q in new])
+            report.imported += len(new)
+        except IntegrityError:
+            # Otra petición insertó alguna de estas preguntas: se reintenta una por una
+            self.repository.rollback()
+            for (row, question_data), inserted in zip(new, self.repository.create_each([q for _, q in new])):
+                if inserted:
+                    report.imported += 1
+                else:
+                    report.add_error(row, f"La pregunta '{question_data.text}' ya existe en el sistema.")
+
     def update_question(self, question_id: int, update_data: QuestionUpdate):
         question = self.repository.get_by_id(question_id)
         if not question:
@@ -53,38 +182,60 @@ class QuestionService:
                 raise HTTPException(status_code=409, detail="Ya existe una pregunta con ese texto")
         
         # Validar opciones si se actualizan
+        option_diff = None
         if update_data.options:
             correct_answers = sum(1 for opt in update_data.options if opt.is_correct)
             if correct_answers == 0:
                 raise HTTPException(status_code=422, detail="Debe haber al menos una respuesta correcta")
             if correct_answers > 1:
                 raise HTTPException(status_code=422, detail="Solo puede haber UNA respuesta correcta")
+
+            option_diff = diff_options(question.options, update_data.options)
+            if option_diff.unknown_ids:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"Las opciones {option_diff.unknown_ids} no pertenecen a esta pregunta"
+                )
+            # Eliminar una opción ya respondida rompería el historial de respuestas
+            answered = self.repository.get_answered_option_ids(o.id for o in option_diff.delete)
+            if answered:
+                texts = [o.text for o in option_diff.delete if o.id in answered]
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"No se pueden eliminar opciones que ya tienen respuestas registradas: {texts}"
+                )
         
-        return self.repository.update(question, update_data)
+        try:
+            return self.repository.update(question, update_data, option_diff)
+        except IntegrityError:
+            self.repository.rollback()
+            raise HTTPException(status_code=409, detail="Ya existe una pregunta con ese texto")
     
-    def delete_question(self, question_id: int, db: Session):
+    def get_deletable(self, question_ids: List[int]) -> QuestionDeletableReport:
+        """Clasifica las preguntas según se puedan eliminar (una sola consulta)."""
+        usage = dict(self.repository.get_usage(question_ids))
+        report = QuestionDeletableReport()
+        for question_id in dict.fromkeys(question_ids):
+            if question_id not in usage:
+                report.not_found.append(question_id)
+            elif usage[question_id] > 0:
+                report.blocked.append(QuestionUsage(id=question_id, pending_assignments=usage[question_id]))
+            else:
+                report.deletable.append(question_id)
+        return report
+
+    def delete_question(self, question_id: int):
         """Soft delete con validación de integridad."""
         question = self.repository.get_by_id(question_id)
         if not question:
             raise HTTPException(status_code=404, detail="Pregunta no encontrada")
         
-        # Validar que no esté en trivias activas
-        # Buscamos trivias con esta pregunta que tengan assignments pendientes
-        from app.modules.trivias.models import Trivia, trivia_questions
-        active_trivias = db.query(Trivia).join(
-            trivia_questions, Trivia.id == trivia_questions.c.trivia_id
-        ).join(
-            TriviaAssignment, Trivia.id == TriviaAssignment.trivia_id
-        ).filter(
-            trivia_questions.c.question_id == question_id,
-            Trivia.is_active == True,
-            TriviaAssignment.status == AssignmentStatus.PENDING
-        ).count()
-        
-        if active_trivias > 0:
+        # No eliminar preguntas de trivias con asignaciones pendientes
+        pending = dict(self.repository.get_usage([question.id])).get(question.id, 0)
+        if pending > 0:
             raise HTTPException(
                 status_code=409,
-                detail=f"No se puede eliminar pregunta usada en {active_trivias} trivia(s) activa(s)"
+                detail=f"No se puede eliminar pregunta con {pending} asignación(es) pendiente(s) en trivias activas"
             )
         
-        return self.repository.soft_delete(question)
\ No newline at end of file
+        return self.repository.soft_delete(question)
@@ -0,0 +1,42 @@
+"""
+Comandos de mantenimiento del ranking.
+
+Uso:
+    python -m app.modules.ranking.commands rebuild-scores
+"""
+import argparse
+from app.core.database import SessionLocal
+from app.core.logger import LoggerSetup
+from app.modules.ranking.repository import RankingRepository
+
+# Registrar todos los modelos en el metadata antes de consultar
+from app.modules.users import models as user_models  # noqa: F401
+from app.modules.questions import models as question_models  # noqa: F401
+from app.modules.trivias import models as trivia_models  # noqa: F401
+
+logger = LoggerSetup.get_logger(__name__)
+
+
+def rebuild_scores() -> int:
+    """Recalcula `player_scores` a partir de las asignaciones completadas."""
+    db = SessionLocal()
+    try:
+        players = RankingRepository(db).rebuild_player_scores()
+        logger.info(f"player_scores reconstruido: {players} jugador(es).")
+        return players
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mantenimiento del ranking")
+    parser.add_argument("command", choices=["rebuild-scores"])
+    args = parser.parse_args()
+
+    LoggerSetup.configure_logging()
+    if args.command == "rebuild-scores":
+        rebuild_scores()
+
+
+if __name__ == "__main__":
+    main()
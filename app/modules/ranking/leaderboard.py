@@ -0,0 +1,430 @@
+"""
+Leaderboard ordenado en memoria (por worker).
+
+Mantiene a los jugadores activos en una skip list indexable ordenada por
+(-total_score, user_id), lo que permite en O(log n):
+- obtener el TOP N (o cualquier página del ranking),
+- conocer la posición absoluta de un jugador,
+- listar los jugadores alrededor de una posición.
+
+Se carga desde `player_scores` al arrancar, se actualiza en cada partida
+completada y se recarga periódicamente para incorporar lo que otros workers
+hayan escrito en la base de datos. La recarga periódica corre en un hilo en
+segundo plano (las rutas del ranking son `async def`: hacerla en la petición
+bloquearía el event loop) y construye la lista en O(n) a partir de las filas
+ya ordenadas por la consulta; mientras tanto se sirven los datos actuales.
+La primera carga (o la que sigue a `invalidate`) la hace la ruta sobre el
+primario; hasta que termina, el ranking se consulta en la base de datos.
+"""
+import random
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Collection, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logger import LoggerSetup
+from app.core.workers import WorkerPool
+from app.modules.ranking.repository import RankingRepository
+
+logger = LoggerSetup.get_logger(__name__)
+
+RankKey = Tuple[int, int]  # (-total_score, user_id)
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key: Optional[RankKey], level: int):
+        self.key = key
+        self.next: List[Optional["_Node"]] = [None] * level
+        self.width: List[int] = [1] * level
+
+
+class IndexableSkipList:
+    """
+    Skip list con anchos por nivel: además de insertar/eliminar en O(log n),
+    permite acceder por posición y calcular la posición de una clave en O(log n).
+    Posiciones 0-indexed.
+    """
+    MAX_LEVEL = 24
+
+    def __init__(self):
+        self._head = _Node(None, self.MAX_LEVEL)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @classmethod
+    def from_sorted(cls, keys: Iterable[RankKey]) -> "IndexableSkipList":
+        """
+        Construye la lista en O(n) a partir de claves en orden estrictamente
+        creciente: cada nodo se enlaza al final de sus niveles, sin búsquedas.
+        """
+        skiplist = cls()
+        last = [skiplist._head] * cls.MAX_LEVEL  # Último nodo de cada nivel
+        last_pos = [0] * cls.MAX_LEVEL
+        pos = 0
+        for key in keys:
+            pos += 1
+            node = _Node(key, cls._random_level())
+            for level in range(len(node.next)):
+                last[level].next[level] = node
+                last[level].width[level] = pos - last_pos[level]
+                last[level], last_pos[level] = node, pos
+        for level in range(cls.MAX_LEVEL):
+            last[level].width[level] = pos + 1 - last_pos[level]
+        skiplist._size = pos
+        return skiplist
+
+    @staticmethod
+    def _random_level() -> int:
+        level = 1
+        while level < IndexableSkipList.MAX_LEVEL and random.random() < 0.5:
+            level += 1
+        return level
+
+    def _predecessors(self, key: RankKey) -> Tuple[List[_Node], List[int]]:
+        """Último nodo < key en cada nivel y la posición de cada uno (head = 0)."""
+        chain: List[_Node] = [self._head] * self.MAX_LEVEL
+        positions = [0] * self.MAX_LEVEL
+        node, pos = self._head, 0
+        for level in reversed(range(self.MAX_LEVEL)):
+            nxt = node.next[level]
+            while nxt is not None and nxt.key < key:
+                pos += node.width[level]
+                node = nxt
+                nxt = node.next[level]
+            chain[level] = node
+            positions[level] = pos
+        return chain, positions
+
+    def insert(self, key: RankKey) -> None:
+        chain, positions = self._predecessors(key)
+        level_count = self._random_level()
+        new_node = _Node(key, level_count)
+        new_pos = positions[0] + 1
+
+        for level in range(self.MAX_LEVEL):
+            prev = chain[level]
+            if level < level_count:
+                new_node.next[level] = prev.next[level]
+                prev.next[level] = new_node
+                distance = new_pos - positions[level]
+                new_node.width[level] = prev.width[level] - distance + 1
+                prev.width[level] = distance
+            else:
+                prev.width[level] += 1
+        self._size += 1
+
+    def remove(self, key: RankKey) -> None:
+        chain, _ = self._predecessors(key)
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+
+        for level in range(self.MAX_LEVEL):
+            prev = chain[level]
+            if prev.next[level] is target:
+                prev.width[level] += target.width[level] - 1
+                prev.next[level] = target.next[level]
+            else:
+                prev.width[level] -= 1
+        self._size -= 1
+
+    def index(self, key: RankKey) -> int:
+        chain, positions = self._predecessors(key)
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        return positions[0]
+
+    def iter_from(self, index: int) -> Iterator[RankKey]:
+        """Recorre las claves en orden a partir de la posición `index`."""
+        if index >= self._size:
+            return
+        node, remaining = self._head, index + 1
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+
+@dataclass(frozen=True)
+class LeaderboardEntry:
+    user_id: int
+    full_name: str
+    total_score: int
+    trivias_played: int
+
+    @property
+    def key(self) -> RankKey:
+        return (-self.total_score, self.user_id)
+
+
+# Filas del ranking: todas en orden de ranking (None) o solo las de esos jugadores
+LeaderboardSource = Callable[[Optional[Collection[int]]], List[LeaderboardEntry]]
+
+
+class Leaderboard:
+    """
+    Ranking en memoria thread-safe. Las posiciones devueltas son 1-indexed.
+
+    Con `background_source` y `refresher`, la recarga periódica se hace en
+    segundo plano con esa fuente (no puede usar la sesión de la petición).
+    """
+
+    # Rondas de re-sincronización de los jugadores modificados durante una recarga
+    MAX_RESYNC_ROUNDS = 3
+
+    def __init__(self, refresh_seconds: float = 0, background_source: Optional[LeaderboardSource] = None,
+                 refresher: Optional[WorkerPool] = None):
+        self.refresh_seconds = refresh_seconds
+        self.background_source = background_source
+        self.refresher = refresher
+        self._lock = threading.RLock()
+        self._reload_lock = threading.Lock()
+        self._list = IndexableSkipList()
+        self._entries: Dict[int, LeaderboardEntry] = {}
+        self._loaded_at: Optional[float] = None
+        self._touched: Optional[Set[int]] = None  # Jugadores modificados durante una recarga
+        self._generation = 0  # Cambia con `invalidate`: descarta las recargas ya en curso
+        self._loading: Optional[Future] = None  # Primera carga en curso (para esperarla)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def ready(self) -> bool:
+        return self._loaded_at is not None
+
+    @staticmethod
+    def _build(entries: Iterable[LeaderboardEntry]) -> Tuple[IndexableSkipList, Dict[int, LeaderboardEntry]]:
+        """Lista y entradas a partir de filas en orden de ranking."""
+        new_entries: Dict[int, LeaderboardEntry] = {}
+
+        def keys():
+            for entry in entries:
+                new_entries[entry.user_id] = entry
+                yield entry.key
+
+        return IndexableSkipList.from_sorted(keys()), new_entries
+
+    def load(self, entries: Iterable[LeaderboardEntry]) -> None:
+        """
+        Reemplaza todo el contenido con `entries` (en orden de ranking). Se
+        construye fuera del lock y se intercambia.
+        """
+        new_list, new_entries = self._build(entries)
+        with self._lock:
+            self._list, self._entries = new_list, new_entries
+            self._loaded_at = time.monotonic()
+
+    def reload(self, source: LeaderboardSource) -> None:
+        """
+        Recarga completa sin perder lo que cambie mientras tanto: los jugadores
+        modificados (upsert/remove/add_score) durante la carga se vuelven a leer
+        con `source` y se aplican a la lista nueva antes del intercambio.
+        """
+        with self._lock:
+            self._touched = set()
+            generation = self._generation
+        try:
+            new_list, new_entries = self._build(source(None))
+            for round_ in range(self.MAX_RESYNC_ROUNDS + 1):
+                with self._lock:
+                    touched, self._touched = self._touched, set()
+                    if touched and round_ == self.MAX_RESYNC_ROUNDS:
+                        # Escrituras continuas: la última ronda se hace bajo el lock
+                        self._resync(new_list, new_entries, touched, source)
+                        touched = None
+                    if self._generation != generation:
+                        return
+                    if not touched:
+                        self._list, self._entries = new_list, new_entries
+                        self._loaded_at = time.monotonic()
+                        return
+                self._resync(new_list, new_entries, touched, source)
+        finally:
+            with self._lock:
+                self._touched = None
+
+    @staticmethod
+    def _resync(skiplist: IndexableSkipList, entries: Dict[int, LeaderboardEntry],
+                user_ids: Set[int], source: LeaderboardSource) -> None:
+        fresh = {entry.user_id: entry for entry in source(user_ids)}
+        for user_id in user_ids:
+            previous = entries.pop(user_id, None)
+            if previous is not None:
+                skiplist.remove(previous.key)
+            entry = fresh.get(user_id)
+            if entry is not None:
+                entries[user_id] = entry
+                skiplist.insert(entry.key)
+
+    def invalidate(self) -> None:
+        """Fuerza una recarga completa en la próxima lectura."""
+        with self._lock:
+            self._loaded_at = None
+            self._generation += 1
+
+    def ensure_fresh(self, source: LeaderboardSource) -> Optional[Future]:
+        """
+        Carga (o recarga si venció `refresh_seconds`) desde la base de datos.
+        La primera carga usa `source` en el hilo que llama; las recargas
+        periódicas van en segundo plano si hay `background_source`.
+
+        Nunca bloquea: las rutas corren esto en el hilo del event loop, donde
+        esperar un lock tomado por otra petición (que a su vez espera a la DB
+        en ese mismo loop) lo dejaría colgado. Si otra petición ya está
+        haciendo la primera carga, se devuelve su Future para esperarla.
+        """
+        loaded_at = self._loaded_at
+        stale = loaded_at is None or (
+            self.refresh_seconds and time.monotonic() - loaded_at > self.refresh_seconds
+        )
+        if not stale:
+            return None
+        if not self._reload_lock.acquire(blocking=False):
+            return self._loading
+        if self._loaded_at != loaded_at:  # Otra petición terminó de recargar entretanto
+            self._reload_lock.release()
+            return None
+        if self.ready and self.background_source is not None and self.refresher is not None:
+            try:
+                future = self.refresher.submit(self.reload, self.background_source)
+            except Exception:
+                self._reload_lock.release()
+                raise
+            future.add_done_callback(lambda _: self._reload_lock.release())
+            return None
+        loading = self._loading = Future()
+        try:
+            self.reload(source)
+            loading.set_result(None)
+        except BaseException as exc:
+            loading.set_exception(exc)
+            raise
+        finally:
+            self._loading = None
+            self._reload_lock.release()
+        return None
+
+    def upsert(self, entry: LeaderboardEntry) -> None:
+        with self._lock:
+            if self._touched is not None:
+                self._touched.add(entry.user_id)
+            previous = self._entries.get(entry.user_id)
+            if previous is not None:
+                self._list.remove(previous.key)
+            self._entries[entry.user_id] = entry
+            self._list.insert(entry.key)
+
+    def remove(self, user_id: int) -> None:
+        with self._lock:
+            if self._touched is not None:
+                self._touched.add(user_id)
+            previous = self._entries.pop(user_id, None)
+            if previous is not None:
+                self._list.remove(previous.key)
+
+    def add_score(self, user_id: int, score: int) -> bool:
+        """
+        Suma una partida a un jugador ya presente.
+        Devuelve False si el jugador no está en el leaderboard.
+        """
+        with self._lock:
+            previous = self._entries.get(user_id)
+            if previous is None:
+                return False
+            self.upsert(LeaderboardEntry(
+                user_id=user_id,
+                full_name=previous.full_name,
+                total_score=previous.total_score + score,
+                trivias_played=previous.trivias_played + 1
+            ))
+            return True
+
+    def get(self, user_id: int) -> Optional[LeaderboardEntry]:
+        return self._entries.get(user_id)
+
+    def rank_of(self, user_id: int) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            return self._list.index(entry.key) + 1
+
+    def page(self, offset: int, limit: int) -> List[Tuple[int, LeaderboardEntry]]:
+        """Entradas desde la posición `offset + 1`, con su posición."""
+        with self._lock:
+            result = []
+            for i, (_, user_id) in enumerate(self._list.iter_from(offset)):
+                if i >= limit:
+                    break
+                result.append((offset + i + 1, self._entries[user_id]))
+            return result
+
+    def top(self, limit: int = 10, offset: int = 0) -> List[Tuple[int, LeaderboardEntry]]:
+        return self.page(max(offset, 0), limit)
+
+    def around(self, user_id: int, radius: int = 5) -> List[Tuple[int, LeaderboardEntry]]:
+        """Jugadores alrededor del usuario (radius por arriba y por abajo)."""
+        with self._lock:
+            position = self.rank_of(user_id)
+            if position is None:
+                return []
+            start = max(position - 1 - radius, 0)
+            return self.page(start, (position - 1 - start) + radius + 1)
+
+
+def load_entries(db: Session, user_ids: Optional[Collection[int]] = None) -> List[LeaderboardEntry]:
+    """Filas del ranking (todas en orden de ranking, o solo las de `user_ids`)."""
+    return [LeaderboardEntry(*row) for row in RankingRepository(db).get_leaderboard_rows(user_ids)]
+
+
+def _load_from_primary(user_ids: Optional[Collection[int]] = None) -> List[LeaderboardEntry]:
+    """Fuente de las recargas en segundo plano (sesión propia, fuera de cualquier petición)."""
+    db = SessionLocal()
+    try:
+        return load_entries(db, user_ids)
+    finally:
+        db.close()
+
+
+# Recargas periódicas del leaderboard (de a una)
+refresh_pool = WorkerPool("leaderboard", max_workers=1)
+
+leaderboard = Leaderboard(
+    refresh_seconds=settings.LEADERBOARD_REFRESH_SECONDS,
+    background_source=_load_from_primary,
+    refresher=refresh_pool
+)
+
+
+def sync_player(db: Session, user_id: int) -> None:
+    """Relee al jugador desde la base de datos y actualiza (o quita) su entrada."""
+    if not leaderboard.ready:
+        return
+    row = RankingRepository(db).get_leaderboard_row(user_id)
+    if row is None:
+        leaderboard.remove(user_id)
+    else:
+        leaderboard.upsert(LeaderboardEntry(*row))
+
+
+def record_completion(db: Session, user_id: int, score: int) -> None:
+    """
+    Refleja una partida completada (ya confirmada en la DB).
+    Si el jugador aún no estaba en el leaderboard se lee su fila.
+    """
+    if not leaderboard.ready:
+        return
+    if not leaderboard.add_score(user_id, score):
+        sync_player(db, user_id)
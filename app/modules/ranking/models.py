@@ -0,0 +1,25 @@
+from sqlalchemy import Column, ForeignKey, Integer, Index
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+from app.core.models import TimestampMixin
+
+class PlayerScore(Base, TimestampMixin):
+    """
+    Agregado materializado del ranking: puntaje total y partidas por jugador.
+    Se actualiza en la misma transacción que completa cada asignación
+    (ver GameRepository.complete_assignment), así el ranking no recorre
+    todo el historial de `trivia_assignments` en cada lectura.
+    """
+    __tablename__ = "player_scores"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_score = Column(Integer, default=0, nullable=False)
+    trivias_played = Column(Integer, default=0, nullable=False)
+
+    user = relationship("User")
+
+    __table_args__ = (
+        # El TOP N se resuelve recorriendo este índice en orden: debe tener el mismo
+        # orden mixto que la consulta (total_score DESC, user_id ASC) para evitar el sort
+        Index("ix_player_scores_ranking", total_score.desc(), user_id),
+    )
@@ -1,6 +1,9 @@
+from typing import Collection, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import joinedload
+from app.core.database import dialect_insert
+from app.modules.ranking.models import PlayerScore
 from app.modules.users.models import User
 from app.modules.trivias.models import TriviaAssignment, AssignmentStatus
 
@@ -8,26 +11,99 @@ class RankingRepository:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_global_ranking(self, limit: int = 10):
-        """
-        Calcula el puntaje total sumando todas las asignaciones COMPLETADAS.
-        Filtra a los usuarios eliminados (Soft Delete).
-        """
+    def _active_players(self):
+        """`player_scores` de usuarios activos con rol jugador, en orden de ranking."""
         return self.db.query(
+            PlayerScore.user_id,
             User.full_name,
-            func.sum(TriviaAssignment.total_score).label("total_score"),
-            func.count(TriviaAssignment.id).label("trivias_played")
+            PlayerScore.total_score,
+            PlayerScore.trivias_played
         ).join(
-            TriviaAssignment, User.id == TriviaAssignment.user_id
+            User, User.id == PlayerScore.user_id
         ).filter(
-            TriviaAssignment.status == AssignmentStatus.COMPLETED,
-            User.is_active == True,   
-            User.role == "player"     
+            User.is_active == True,
+            User.role == "player"
+        )
+
+    def get_global_ranking(self, limit: int = 10, offset: int = 0):
+        """
+        Lee el TOP N desde el agregado materializado `player_scores`.
+        Filtra a los usuarios eliminados (Soft Delete).
+        """
+        return self._active_players().order_by(
+            PlayerScore.total_score.desc(),
+            PlayerScore.user_id
+        ).offset(offset).limit(limit).all()
+
+    def get_leaderboard_rows(self, user_ids: Optional[Collection[int]] = None):
+        """
+        Filas del ranking para el leaderboard en memoria: todas, en orden de
+        ranking (recorre `ix_player_scores_ranking`), o solo las de `user_ids`.
+        """
+        query = self._active_players()
+        if user_ids is not None:
+            return query.filter(PlayerScore.user_id.in_(list(user_ids))).all()
+        return query.order_by(PlayerScore.total_score.desc(), PlayerScore.user_id).all()
+
+    def get_leaderboard_row(self, user_id: int):
+        """Fila de un jugador, o None si no tiene partidas o no está activo."""
+        return self._active_players().filter(PlayerScore.user_id == user_id).first()
+
+    def count_players_ahead(self, total_score: int, user_id: int) -> int:
+        """Jugadores activos por delante (más puntaje, o igual puntaje y menor id)."""
+        return self._active_players().filter(
+            (PlayerScore.total_score > total_score) |
+            ((PlayerScore.total_score == total_score) & (PlayerScore.user_id < user_id))
+        ).count()
+
+    def count_ranked_players(self) -> int:
+        return self._active_players().count()
+
+    def add_score(self, user_id: int, score: int):
+        """
+        Suma una partida completada al agregado del jugador (upsert).
+        No hace commit: debe ejecutarse en la misma transacción que completa la asignación.
+        """
+        stmt = dialect_insert(self.db, PlayerScore).values(
+            user_id=user_id,
+            total_score=score,
+            trivias_played=1
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PlayerScore.user_id],
+            set_={
+                "total_score": PlayerScore.total_score + stmt.excluded.total_score,
+                "trivias_played": PlayerScore.trivias_played + 1,
+                "updated_at": func.now()
+            }
+        )
+        self.db.execute(stmt)
+
+    def count_player_scores(self) -> int:
+        return self.db.query(PlayerScore).count()
+
+    def rebuild_player_scores(self) -> int:
+        """
+        Recalcula `player_scores` desde cero a partir de las asignaciones
+        COMPLETADAS (backfill o reparación). Devuelve la cantidad de jugadores.
+        """
+        self.db.query(PlayerScore).delete()
+        aggregate = select(
+            TriviaAssignment.user_id,
+            func.coalesce(func.sum(TriviaAssignment.total_score), 0),
+            func.count(TriviaAssignment.id)
+        ).where(
+            TriviaAssignment.status == AssignmentStatus.COMPLETED
         ).group_by(
-            User.id
-        ).order_by(
-            desc("total_score")   
-        ).limit(limit).all()
+            TriviaAssignment.user_id
+        )
+        self.db.execute(
+            insert(PlayerScore).from_select(
+                ["user_id", "total_score", "trivias_played"], aggregate
+            )
+        )
+        self.db.commit()
+        return self.count_player_scores()
         
     
     def get_user_performance(self, user_id: int):
@@ -1,36 +1,85 @@
+import asyncio
 from typing import List
 from app.modules.users.repository import UserRepository
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import AsyncServiceRunner, get_async_db, get_async_read_db
+from app.core.logger import LoggerSetup
 from app.core.deps import get_current_user # Cualquier usuario autenticado puede ver el ranking
 from app.modules.ranking import schemas
+from app.modules.ranking.leaderboard import leaderboard, load_entries
 from app.modules.ranking.repository import RankingRepository
 from app.modules.ranking.service import RankingService
 from app.core.deps import get_current_admin
 
+logger = LoggerSetup.get_logger(__name__)
+
 router = APIRouter(prefix="/ranking", tags=["Stats & Ranking"])
 
-def get_service(db: Session = Depends(get_db)) -> RankingService:
+def build_service(db: Session) -> RankingService:
     ranking_repo = RankingRepository(db)
     user_repo = UserRepository(db)
-    return RankingService(ranking_repo, user_repo)
+    return RankingService(ranking_repo, user_repo, leaderboard=leaderboard)
+
+def get_service(db: AsyncSession = Depends(get_async_read_db)) -> AsyncServiceRunner[RankingService]:
+    return AsyncServiceRunner(db, build_service)
+
+async def load_leaderboard(db: AsyncSession = Depends(get_async_db)) -> None:
+    """
+    Primera carga del leaderboard (o tras `invalidate`), sobre el primario:
+    una réplica atrasada dejaría el ranking desactualizado hasta la próxima
+    recarga. Si otra petición ya lo está cargando se espera sin bloquear el
+    event loop; si la carga falla, el servicio consulta la base de datos.
+    """
+    if leaderboard.ready:
+        return
+    try:
+        pending = await db.run_sync(
+            lambda session: leaderboard.ensure_fresh(lambda user_ids=None: load_entries(session, user_ids))
+        )
+    except Exception:
+        logger.exception("No se pudo cargar el leaderboard; se consulta la base de datos")
+        await db.rollback()
+        return
+    if pending is not None:
+        await asyncio.wait([asyncio.wrap_future(pending)])
 
 @router.get(
     "/global",
     response_model=List[schemas.RankingEntry],
     summary="Obtener Tabla de Posiciones Global",
+    dependencies=[Depends(load_leaderboard)],
     description="Muestra los mejores jugadores basados en la suma de puntajes de todas sus trivias completadas."
 )
-def get_global_ranking(
-    limit: int = 10,
-    service: RankingService = Depends(get_service),
+async def get_global_ranking(
+    limit: int = Query(10, ge=1),
+    offset: int = Query(0, ge=0),
+    service: AsyncServiceRunner[RankingService] = Depends(get_service),
     current_user = Depends(get_current_user) 
 ):
     """
     Retorna el TOP 10 (por defecto) de jugadores activos.
+    Con `offset` se puede paginar el resto de la tabla.
+    """
+    return await service(lambda s: s.get_top_players(limit, offset))
+
+
+@router.get(
+    "/my-rank",
+    response_model=schemas.MyRankResponse,
+    summary="Mi Posición en el Ranking",
+    dependencies=[Depends(load_leaderboard)]
+)
+async def get_my_rank(
+    radius: int = Query(5, ge=0, le=50, description="Jugadores a mostrar por encima y por debajo"),
+    service: AsyncServiceRunner[RankingService] = Depends(get_service),
+    current_user = Depends(get_current_user)
+):
+    """
+    Devuelve la posición absoluta del usuario logueado y los jugadores a su alrededor.
     """
-    return service.get_top_players(limit)
+    return await service(lambda s: s.get_my_rank(current_user.id, radius))
 
 
 @router.get(
@@ -38,26 +87,26 @@ def get_global_ranking(
     response_model=schemas.PlayerStatsResponse,
     summary="Mi Rendimiento"
 )
-def get_my_stats(
-    service: RankingService = Depends(get_service),
+async def get_my_stats(
+    service: AsyncServiceRunner[RankingService] = Depends(get_service),
     current_user = Depends(get_current_user)
 ):
     """
     Muestra el historial y estadísticas del usuario logueado.
     """
-    return service.get_player_stats(current_user.id)
+    return await service(lambda s: s.get_player_stats(current_user.id))
 
 @router.get(
     "/users/{user_id}",
     response_model=schemas.PlayerStatsResponse,
     summary="Rendimiento de un Jugador (Solo Admin)"
 )
-def get_user_stats(
+async def get_user_stats(
     user_id: int,
-    service: RankingService = Depends(get_service),
+    service: AsyncServiceRunner[RankingService] = Depends(get_service),
     admin = Depends(get_current_admin)
 ):
     """
     Permite al administrador auditar el rendimiento de cualquier jugador específico.
     """
-    return service.get_player_stats(user_id)
\ No newline at end of file
+    return await service(lambda s: s.get_player_stats(user_id))
\ No newline at end of file
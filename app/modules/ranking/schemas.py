@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 class RankingEntry(BaseModel):
     position: int = Field(..., description="Lugar en el ranking (1, 2, 3...)")
@@ -21,6 +21,31 @@ class RankingEntry(BaseModel):
     )
  
 
+# Posición del jugador logueado y su entorno en el ranking
+class MyRankResponse(BaseModel):
+    position: Optional[int] = Field(None, description="Lugar en el ranking (None si aún no completó trivias)")
+    total_score: int
+    trivias_played: int
+    total_players: int = Field(..., description="Cantidad de jugadores en el ranking")
+    around: List[RankingEntry] = Field(default_factory=list, description="Jugadores inmediatamente por encima y por debajo")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "position": 2,
+                "total_score": 120,
+                "trivias_played": 3,
+                "total_players": 3,
+                "around": [
+                    {"position": 1, "player_name": "Ana Player", "total_score": 150, "trivias_played": 3},
+                    {"position": 2, "player_name": "Beto Player", "total_score": 120, "trivias_played": 3},
+                    {"position": 3, "player_name": "Caro Player", "total_score": 90, "trivias_played": 2}
+                ]
+            }
+        }
+    )
+
+
 # Detalle de una partida jugada        
 class MatchHistoryItem(BaseModel):
     trivia_name: str
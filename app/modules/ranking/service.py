@@ -1,28 +1,72 @@
+from typing import List, Optional
+from app.modules.ranking.leaderboard import Leaderboard, load_entries
 from app.modules.ranking.repository import RankingRepository
-from app.modules.ranking.schemas import PlayerStatsResponse, RankingEntry
+from app.modules.ranking.schemas import MyRankResponse, PlayerStatsResponse, RankingEntry
 from app.modules.users.repository import UserRepository
 from fastapi import HTTPException
 
 class RankingService:
-    def __init__(self, repository: RankingRepository, user_repo: UserRepository):
+    def __init__(self, repository: RankingRepository, user_repo: UserRepository,
+                 leaderboard: Optional[Leaderboard] = None):
         self.repository = repository
         self.user_repo = user_repo
+        # Si hay leaderboard en memoria, las posiciones se resuelven en O(log n)
+        self.leaderboard = leaderboard
 
-    def get_top_players(self, limit: int = 10):
-        
-        data = self.repository.get_global_ranking(limit)
-        
-        results = []
-        for index, row in enumerate(data):
-            
-            results.append(RankingEntry(
-                position=index + 1,
-                player_name=row.full_name,
-                total_score=row.total_score or 0,
-                trivias_played=row.trivias_played
-            ))
-            
-        return results
+    def _use_leaderboard(self) -> bool:
+        """
+        El leaderboard solo se usa si ya está cargado (la primera carga la hace
+        la ruta sobre el primario, ver `load_leaderboard`); si no, se consulta
+        la base de datos. Aquí solo se dispara la recarga periódica.
+        """
+        if self.leaderboard is None or not self.leaderboard.ready:
+            return False
+        self.leaderboard.ensure_fresh(lambda user_ids=None: load_entries(self.repository.db, user_ids))
+        return True
+
+    @staticmethod
+    def _to_entry(position: int, row) -> RankingEntry:
+        return RankingEntry(
+            position=position,
+            player_name=row.full_name,
+            total_score=row.total_score or 0,
+            trivias_played=row.trivias_played
+        )
+
+    def get_top_players(self, limit: int = 10, offset: int = 0) -> List[RankingEntry]:
+        if self._use_leaderboard():
+            return [self._to_entry(pos, e) for pos, e in self.leaderboard.top(limit, offset)]
+
+        data = self.repository.get_global_ranking(limit, offset)
+        return [self._to_entry(offset + index + 1, row) for index, row in enumerate(data)]
+
+    def get_my_rank(self, user_id: int, radius: int = 5) -> MyRankResponse:
+        """
+        Posición absoluta del jugador y los jugadores a su alrededor.
+        Si aún no completó ninguna trivia, `position` es None.
+        """
+        if self._use_leaderboard():
+            entry = self.leaderboard.get(user_id)
+            position = self.leaderboard.rank_of(user_id)
+            around = self.leaderboard.around(user_id, radius)
+            total_players = len(self.leaderboard)
+        else:
+            entry = self.repository.get_leaderboard_row(user_id)
+            position = around = None
+            if entry is not None:
+                position = self.repository.count_players_ahead(entry.total_score, user_id) + 1
+                start = max(position - 1 - radius, 0)
+                rows = self.repository.get_global_ranking(position - start + radius, start)
+                around = [(start + i + 1, row) for i, row in enumerate(rows)]
+            total_players = self.repository.count_ranked_players()
+
+        return MyRankResponse(
+            position=position,
+            total_score=entry.total_score if entry else 0,
+            trivias_played=entry.trivias_played if entry else 0,
+            total_players=total_players,
+            around=[self._to_entry(pos, row) for pos, row in (around or [])]
+        )
     
     def get_player_stats(self, user_id: int) -> PlayerStatsResponse:
         # 1. Obtener datos del usuario
@@ -0,0 +1,293 @@
+"""
+Generador de datos sintéticos a gran escala (benchmarks).
+
+A diferencia de `POST /testing/seed` (un puñado de filas, un commit por
+fila), genera volúmenes realistas de usuarios, preguntas, trivias,
+asignaciones y respuestas con inserciones masivas:
+
+- PostgreSQL (psycopg2): `COPY ... FROM STDIN` por lote.
+- Otros motores: INSERT con executemany por lote.
+
+Los ids se asignan en Python a continuación del máximo existente, así que
+se puede ejecutar sobre una base con datos. Con la misma `seed` y la misma
+base de partida, el resultado es idéntico. Los contadores derivados
+(`player_scores`, `users.pending_assignments`) se escriben ya calculados.
+
+Uso:
+    python -m app.modules.testing.generator --users 500000 --questions 50000 \\
+        --trivias 5000 --trivias-per-user 4 --seed 42
+"""
+import argparse
+import csv
+import enum
+import io
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass, fields
+from itertools import islice
+from typing import Iterable, Iterator, List, Sequence
+from sqlalchemy import Table, func, select
+from sqlalchemy.engine import Connection, Engine
+from app.core.logger import LoggerSetup
+from app.core.security import get_password_hash
+from app.core.workers import WorkerPool
+from app.modules.game.scoring import POINTS_BY_DIFFICULTY
+from app.modules.questions.models import DifficultyLevel, Option, Question, normalize_question_text
+from app.modules.questions.search import search_index
+from app.modules.ranking.leaderboard import leaderboard
+from app.modules.ranking.models import PlayerScore
+from app.modules.trivias.models import AssignmentStatus, Trivia, TriviaAssignment, UserAnswer, trivia_questions
+from app.modules.users.models import User, UserRole
+
+logger = LoggerSetup.get_logger(__name__)
+
+# Contraseña de todos los usuarios generados (para pruebas de carga del login)
+SYNTHETIC_PASSWORD = "synthetic-password"
+SYNTHETIC_EMAIL_DOMAIN = "synthetic.talatrivia.dev"
+
+_FIRST_NAMES = ["Ana", "Beto", "Carla", "Diego", "Elena", "Felipe", "Gabriela", "Héctor", "Isidora", "Javier",
+                "Karen", "Luis", "Macarena", "Nicolás", "Olivia", "Pablo", "Renata", "Sebastián", "Trinidad", "Vicente"]
+_LAST_NAMES = ["González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras", "Silva", "Martínez", "Sepúlveda",
+               "Morales", "Rodríguez", "López", "Fuentes", "Hernández", "Torres", "Araya", "Flores", "Espinoza", "Valenzuela"]
+_TOPICS = ["vacaciones", "licencia médica", "finiquito", "horas extra", "jornada laboral", "teletrabajo",
+           "seguro de cesantía", "gratificación", "indemnización", "contrato indefinido", "contrato a plazo fijo",
+           "fuero maternal", "sala cuna", "feriado legal", "liquidación de sueldo", "cotización previsional"]
+_PROMPTS = ["¿Qué establece la ley sobre {topic}", "¿Cuándo corresponde {topic}", "¿Quién paga {topic}",
+            "¿Cómo se calcula {topic}", "¿Qué plazo existe para {topic}"]
+_DIFFICULTY_WEIGHTS = [(DifficultyLevel.EASY, 5), (DifficultyLevel.MEDIUM, 3), (DifficultyLevel.HARD, 2)]
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    users: int = 1_000
+    questions: int = 500
+    options_per_question: int = 4
+    trivias: int = 50
+    questions_per_trivia: int = 10
+    trivias_per_user: int = 3
+    # Fracción de asignaciones ya jugadas (con respuestas y puntaje)
+    completion_rate: float = 0.6
+    seed: int = 42
+    batch_size: int = 10_000
+
+    def __post_init__(self):
+        if self.options_per_question < 2:
+            raise ValueError("Cada pregunta necesita al menos 2 opciones")
+        if self.questions_per_trivia > self.questions:
+            raise ValueError("questions_per_trivia no puede superar a questions")
+        if self.trivias_per_user > self.trivias:
+            raise ValueError("trivias_per_user no puede superar a trivias")
+        if not 0 <= self.completion_rate <= 1:
+            raise ValueError("completion_rate debe estar entre 0 y 1")
+        if self.batch_size < 1:
+            raise ValueError("batch_size debe ser positivo")
+
+
+@dataclass
+class DatasetReport:
+    users: int = 0
+    questions: int = 0
+    options: int = 0
+    trivias: int = 0
+    assignments: int = 0
+    answers: int = 0
+    first_user_id: int = 0
+    seconds: float = 0.0
+    password: str = SYNTHETIC_PASSWORD
+
+
+def _batched(rows: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class BulkWriter:
+    """Inserta filas (tuplas en el orden de `columns`) por lotes, un commit por lote."""
+
+    def __init__(self, engine: Engine, batch_size: int):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.use_copy = engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+
+    def write(self, table: Table, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+        written = 0
+        for batch in _batched(rows, self.batch_size):
+            with self.engine.begin() as conn:
+                if self.use_copy:
+                    self._copy(conn, table, columns, batch)
+                else:
+                    conn.execute(table.insert(), [dict(zip(columns, row)) for row in batch])
+            written += len(batch)
+        return written
+
+    @staticmethod
+    def _copy(conn: Connection, table: Table, columns: Sequence[str], batch: List[tuple]) -> None:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in batch:
+            # Los Enum se guardan por nombre; None queda como campo vacío (NULL en CSV)
+            writer.writerow([v.name if isinstance(v, enum.Enum) else v for v in row])
+        buffer.seek(0)
+        cursor = conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        finally:
+            cursor.close()
+
+
+def _next_id(conn: Connection, table: Table) -> int:
+    return (conn.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+def _reset_sequences(engine: Engine, tables: Iterable[Table]) -> None:
+    """Los ids se insertaron explícitamente: alinear las secuencias de PostgreSQL."""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for table in tables:
+            conn.exec_driver_sql(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 1) FROM {table.name}))"
+            )
+
+
+def generate_dataset(engine: Engine, spec: DatasetSpec) -> DatasetReport:
+    """Genera el dataset descrito por `spec` y devuelve cuántas filas insertó."""
+    started = time.perf_counter()
+    rng = random.Random(spec.seed)
+    writer = BulkWriter(engine, spec.batch_size)
+    users_t, questions_t, options_t = User.__table__, Question.__table__, Option.__table__
+    trivias_t, assignments_t, answers_t = Trivia.__table__, TriviaAssignment.__table__, UserAnswer.__table__
+
+    with engine.connect() as conn:
+        user_start, question_start, option_start, trivia_start, assignment_start, answer_start = (
+            _next_id(conn, t) for t in (users_t, questions_t, options_t, trivias_t, assignments_t, answers_t)
+        )
+    report = DatasetReport(first_user_id=user_start)
+    k = spec.options_per_question
+
+    # 1. Preguntas y opciones (se recuerda la dificultad y la opción correcta de cada una)
+    difficulties = [
+        rng.choices([d for d, _ in _DIFFICULTY_WEIGHTS], weights=[w for _, w in _DIFFICULTY_WEIGHTS])[0]
+        for _ in range(spec.questions)
+    ]
+    correct_index = [rng.randrange(k) for _ in range(spec.questions)]
+
+    def question_rows():
+        for i, difficulty in enumerate(difficulties):
+            question_id = question_start + i
+            text = rng.choice(_PROMPTS).format(topic=rng.choice(_TOPICS)) + f" (caso {question_id})?"
+            yield question_id, text, normalize_question_text(text), difficulty, True
+
+    def option_rows():
+        for i in range(spec.questions):
+            for j in range(k):
+                yield option_start + i * k + j, f"Alternativa {chr(65 + j)}", j == correct_index[i], question_start + i
+
+    report.questions = writer.write(
+        questions_t, ["id", "text", "normalized_text", "difficulty", "is_active"], question_rows()
+    )
+    report.options = writer.write(options_t, ["id", "text", "is_correct", "question_id"], option_rows())
+
+    # 2. Trivias con sus preguntas
+    trivia_question_idx = [
+        rng.sample(range(spec.questions), spec.questions_per_trivia) for _ in range(spec.trivias)
+    ]
+    report.trivias = writer.write(trivias_t, ["id", "name", "description", "is_active"], (
+        (trivia_start + t, f"Trivia sintética {trivia_start + t}", f"Tema: {rng.choice(_TOPICS)}", True)
+        for t in range(spec.trivias)
+    ))
+    writer.write(trivia_questions, ["trivia_id", "question_id"], (
+        (trivia_start + t, question_start + i)
+        for t, indexes in enumerate(trivia_question_idx) for i in indexes
+    ))
+
+    # 3. Usuarios por bloques, cada bloque con sus asignaciones, respuestas y puntajes
+    hashed_password = get_password_hash(SYNTHETIC_PASSWORD)
+    next_assignment, next_answer = assignment_start, answer_start
+
+    for block_start in range(0, spec.users, spec.batch_size):
+        block = range(block_start, min(block_start + spec.batch_size, spec.users))
+        users, assignments, answers, scores = [], [], [], []
+        for u in block:
+            user_id = user_start + u
+            skill = rng.uniform(0.3, 0.95)
+            pending, total_score, played = 0, 0, 0
+            for t in rng.sample(range(spec.trivias), spec.trivias_per_user):
+                assignment_id, next_assignment = next_assignment, next_assignment + 1
+                if rng.random() >= spec.completion_rate:
+                    pending += 1
+                    assignments.append((assignment_id, user_id, trivia_start + t, AssignmentStatus.PENDING, 0))
+                    continue
+                score = 0
+                for i in trivia_question_idx[t]:
+                    if rng.random() < skill:
+                        selected, is_correct = correct_index[i], True
+                    else:
+                        selected = rng.choice([j for j in range(k) if j != correct_index[i]])
+                        is_correct = False
+                    points = POINTS_BY_DIFFICULTY[difficulties[i]] if is_correct else 0
+                    score += points
+                    answers.append((
+                        next_answer, assignment_id, question_start + i, option_start + i * k + selected, is_correct, points
+                    ))
+                    next_answer += 1
+                assignments.append((assignment_id, user_id, trivia_start + t, AssignmentStatus.COMPLETED, score))
+                total_score += score
+                played += 1
+            name = f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}"
+            users.append((
+                user_id, name, f"user{user_id}@{SYNTHETIC_EMAIL_DOMAIN}", hashed_password, UserRole.PLAYER, pending, True
+            ))
+            if played:
+                scores.append((user_id, total_score, played))
+
+        report.users += writer.write(
+            users_t, ["id", "full_name", "email", "hashed_password", "role", "pending_assignments", "is_active"], users
+        )
+        report.assignments += writer.write(
+            assignments_t, ["id", "user_id", "trivia_id", "status", "total_score"], assignments
+        )
+        report.answers += writer.write(
+            answers_t, ["id", "assignment_id", "question_id", "selected_option_id", "is_correct", "points_awarded"], answers
+        )
+        writer.write(PlayerScore.__table__, ["user_id", "total_score", "trivias_played"], scores)
+        logger.info(f"Datos sintéticos: {report.users}/{spec.users} usuarios, {report.answers} respuestas")
+
+    _reset_sequences(engine, [users_t, questions_t, options_t, trivias_t, assignments_t, answers_t])
+    leaderboard.invalidate()
+    search_index.invalidate()
+    report.seconds = round(time.perf_counter() - started, 2)
+    logger.info(f"Datos sintéticos generados en {report.seconds}s: {asdict(report)}")
+    return report
+
+
+# Generaciones lanzadas desde `POST /testing/generate` (de a una)
+generation_pool = WorkerPool("datagen", max_workers=1)
+
+
+def _parse_spec(argv: List[str] | None) -> DatasetSpec:
+    parser = argparse.ArgumentParser(prog="python -m app.modules.testing.generator")
+    for f in fields(DatasetSpec):
+        parser.add_argument(f"--{f.name.replace('_', '-')}", type=type(f.default), default=f.default)
+    return DatasetSpec(**vars(parser.parse_args(argv)))
+
+
+def main(argv: List[str] | None = None) -> int:
+    from app.core.database import engine
+    from app.core.migrations import run_migrations
+
+    spec = _parse_spec(argv)
+    run_migrations(engine)
+    report = generate_dataset(engine, spec)
+    for key, value in asdict(report).items():
+        print(f"{key:<16} {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
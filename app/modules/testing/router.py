@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, status
+from dataclasses import asdict
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app.core.database import get_db
+from app.core.deps import get_current_admin
 from app.core.security import get_password_hash
 from app.core.logger import LoggerSetup
 from datetime import datetime, timedelta
@@ -9,7 +11,17 @@ import random
 
 from app.modules.users.models import User, UserRole
 from app.modules.questions.models import Question, Option, DifficultyLevel
+from app.modules.questions.repository import QuestionRepository
+from app.modules.questions.search import search_index
 from app.modules.trivias.models import Trivia, TriviaAssignment, AssignmentStatus, UserAnswer
+from app.modules.trivias.repository import TriviaRepository
+from app.modules.game.models import SubmissionJob
+from app.modules.ranking.models import PlayerScore
+from app.modules.ranking.leaderboard import leaderboard, record_completion
+from app.modules.ranking.repository import RankingRepository
+from app.modules.users.cache import principal_cache
+from app.modules.testing.generator import SYNTHETIC_PASSWORD, DatasetSpec, generate_dataset, generation_pool
+from app.modules.testing.schemas import DatasetSpecRequest
 
 router = APIRouter(prefix="/testing", tags=["Testing & Seeding"])
 logger = LoggerSetup.get_logger(__name__)
@@ -111,7 +123,7 @@ def seed_database(db: Session = Depends(get_db)):
     all_questions_objs = []
     
     for q_text, diff, opts_data in questions_data:
-        q_exists = db.query(Question).filter(Question.text == q_text).first()
+        q_exists = QuestionRepository(db).get_by_text(q_text)
         if not q_exists:
             new_q = Question(text=q_text, difficulty=diff)
             db.add(new_q)
@@ -122,6 +134,7 @@ def seed_database(db: Session = Depends(get_db)):
             
             db.commit()
             db.refresh(new_q)
+            search_index.upsert(new_q.id, new_q.text, new_q.difficulty)
             all_questions_objs.append(new_q)
         else:
             all_questions_objs.append(q_exists)
@@ -264,6 +277,10 @@ def seed_database(db: Session = Depends(get_db)):
         days_ago=1
     )
 
+    # Las asignaciones del seed se insertan directamente: recalcular los contadores de uso
+    TriviaRepository(db).rebuild_usage_counters()
+    db.commit()
+
     return {
         "message": "Seed completado con éxito",
         "users_created": len(created_users),
@@ -360,15 +377,57 @@ def simulate_game_completion(
     # Marcar asignación como completada
     assignment.status = AssignmentStatus.COMPLETED
     assignment.total_score = total_score
+    RankingRepository(db).add_score(user.id, total_score)
     
     # Modificar created_at para simular que se jugó hace días
     fake_date = datetime.utcnow() - timedelta(days=days_ago)
     assignment.created_at = fake_date
     
     db.commit()
+    record_completion(db, user.id, total_score)
     logger.info(f"Partida simulada: {user_email} en {trivia_name} - {total_score} puntos")
 
 
+@router.post(
+    "/generate",
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={
+        202: {"description": "Generación iniciada en segundo plano"},
+        409: {"description": "Ya hay una generación en curso"},
+        422: {"description": "Parámetros inconsistentes"},
+        401: {"description": "No autenticado"},
+        403: {"description": "No tienes permisos de administrador"}
+    }
+)
+def generate_synthetic_data(
+    spec: DatasetSpecRequest,
+    db: Session = Depends(get_db),
+    current_admin = Depends(get_current_admin)
+):
+    """
+    Genera un dataset sintético a gran escala para benchmarks (usuarios,
+    preguntas, trivias, asignaciones y respuestas) con inserciones masivas.
+    Corre en segundo plano; el avance y el resumen quedan en el log.
+    Equivale a `python -m app.modules.testing.generator`.
+
+    Todos los usuarios generados tienen la contraseña `synthetic-password`.
+    """
+    try:
+        dataset = DatasetSpec(**spec.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if generation_pool.in_flight:
+        raise HTTPException(status_code=409, detail="Ya hay una generación de datos en curso")
+
+    generation_pool.submit(generate_dataset, db.get_bind(), dataset)
+    logger.info(f"Generación de datos sintéticos iniciada: {asdict(dataset)}")
+    return {
+        "message": "Generación iniciada en segundo plano",
+        "spec": asdict(dataset),
+        "password": SYNTHETIC_PASSWORD,
+    }
+
+
 @router.delete("/reset", status_code=status.HTTP_200_OK)
 def reset_test_data(db: Session = Depends(get_db)):
     """
@@ -385,8 +444,10 @@ def reset_test_data(db: Session = Depends(get_db)):
     logger.warning("Iniciando reset de data de testing...")
     
     try:
-        # 1. Eliminar respuestas de usuarios
+        # 1. Eliminar respuestas de usuarios, envíos encolados y ranking materializado
         deleted_answers = db.query(UserAnswer).delete()
+        db.query(SubmissionJob).delete()
+        db.query(PlayerScore).delete()
         
         # 2. Eliminar asignaciones de trivias
         deleted_assignments = db.query(TriviaAssignment).delete()
@@ -414,8 +475,12 @@ def reset_test_data(db: Session = Depends(get_db)):
                 "elena@talana.com"
             ])
         ).delete(synchronize_session=False)
+        TriviaRepository(db).rebuild_usage_counters()
         
         db.commit()
+        leaderboard.invalidate()
+        principal_cache.clear()
+        search_index.invalidate()
         
         logger.info("Reset completado exitosamente")
         
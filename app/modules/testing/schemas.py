@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+
+
+class DatasetSpecRequest(BaseModel):
+    """Volúmenes del dataset sintético (ver `app.modules.testing.generator`)."""
+    users: int = Field(1_000, ge=0, le=2_000_000)
+    questions: int = Field(500, ge=1, le=500_000)
+    options_per_question: int = Field(4, ge=2, le=6)
+    trivias: int = Field(50, ge=1, le=100_000)
+    questions_per_trivia: int = Field(10, ge=1, le=100)
+    trivias_per_user: int = Field(3, ge=0, le=100)
+    completion_rate: float = Field(0.6, ge=0, le=1, description="Fracción de asignaciones ya jugadas")
+    seed: int = Field(42, description="Semilla: el mismo valor genera los mismos datos")
+    batch_size: int = Field(10_000, ge=100, le=100_000, description="Filas por INSERT/COPY y por commit")
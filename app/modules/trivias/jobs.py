@@ -0,0 +1,140 @@
+"""
+Cola durable de creación de asignaciones.
+
+Crear una trivia (o agregarle usuarios) no inserta las asignaciones dentro
+de la petición: se registra un `AssignmentJob` y las filas se insertan por
+tramos con INSERT ... SELECT ... ON CONFLICT DO NOTHING (sin cargar los
+usuarios como objetos ORM y omitiendo a los ya asignados), cada tramo en su
+propia transacción junto con el progreso. Así una trivia para toda la
+empresa no retiene una transacción gigante y se puede seguir su avance en
+`GET /trivias/assignment-jobs/{job_id}`.
+
+Los destinos chicos (hasta ASSIGNMENT_INLINE_LIMIT usuarios) se procesan en
+la misma petición; el resto va al pool de workers y se retoma al arrancar
+(`recover`) si quedó a medias.
+"""
+from datetime import datetime, timedelta
+from typing import Callable
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logger import LoggerSetup
+from app.core.workers import WorkerPool
+from app.modules.trivias.models import AssignmentJob, AssignmentJobStatus
+from app.modules.trivias.repository import TriviaRepository
+
+logger = LoggerSetup.get_logger(__name__)
+
+
+class AssignmentQueue:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        workers: int,
+        chunk_size: int,
+        inline_limit: int = 0,
+        stale_after_seconds: int = 300
+    ):
+        self.session_factory = session_factory
+        self.pool = WorkerPool("assignments", max_workers=workers)
+        self.chunk_size = chunk_size
+        self.inline_limit = inline_limit
+        self.stale_after = timedelta(seconds=stale_after_seconds)
+
+    def schedule(self, db: Session, job: AssignmentJob) -> AssignmentJob:
+        """Procesa el trabajo en la petición si es chico; si no, lo agenda en el pool."""
+        if job.total <= self.inline_limit:
+            self.run(db, job.id)
+            db.refresh(job)
+        else:
+            self.pool.submit(self.process, job.id)
+        return job
+
+    def process(self, job_id: int) -> None:
+        """Ejecuta un trabajo encolado (en un worker del pool)."""
+        db = self.session_factory()
+        try:
+            self.run(db, job_id)
+        finally:
+            db.close()
+
+    def run(self, db: Session, job_id: int) -> None:
+        # Reclamar el trabajo de forma atómica (evita que dos workers lo procesen)
+        claimed = db.query(AssignmentJob).filter(
+            AssignmentJob.id == job_id,
+            AssignmentJob.status == AssignmentJobStatus.QUEUED
+        ).update({"status": AssignmentJobStatus.PROCESSING}, synchronize_session=False)
+        db.commit()
+        if not claimed:
+            return
+
+        repository = TriviaRepository(db)
+        job = repository.get_assignment_job(job_id)
+        try:
+            while True:
+                covered, inserted, upper = repository.assign_chunk(
+                    job.trivia_id, job.target, job.last_user_id, self.chunk_size
+                )
+                job.processed += covered
+                job.inserted += inserted
+                if upper is None:
+                    job.status = AssignmentJobStatus.DONE
+                else:
+                    job.last_user_id = upper
+                # El tramo y el progreso se confirman juntos
+                db.commit()
+                if upper is None:
+                    break
+            logger.info(
+                f"Asignaciones de la trivia {job.trivia_id}: {job.inserted} nuevas, {job.skipped} ya existentes"
+            )
+        except Exception as e:
+            db.rollback()
+            job.status = AssignmentJobStatus.FAILED
+            job.error_detail = str(e)
+            db.commit()
+            logger.error(f"Error creando asignaciones (trabajo {job_id}): {e}")
+
+    def recover(self) -> int:
+        """
+        Re-agenda los trabajos pendientes (p. ej. tras un reinicio).
+        Los que quedaron en `processing` por más de `stale_after` continúan
+        desde el último tramo confirmado.
+        """
+        db = self.session_factory()
+        try:
+            cutoff = datetime.utcnow() - self.stale_after
+            db.query(AssignmentJob).filter(
+                AssignmentJob.status == AssignmentJobStatus.PROCESSING,
+                AssignmentJob.updated_at < cutoff
+            ).update({"status": AssignmentJobStatus.QUEUED}, synchronize_session=False)
+            db.commit()
+
+            job_ids = [
+                job_id for (job_id,) in db.query(AssignmentJob.id).filter(
+                    AssignmentJob.status == AssignmentJobStatus.QUEUED
+                ).order_by(AssignmentJob.id).all()
+            ]
+        finally:
+            db.close()
+
+        for job_id in job_ids:
+            self.pool.submit(self.process, job_id)
+        if job_ids:
+            logger.info(f"Re-agendados {len(job_ids)} trabajo(s) de asignación pendiente(s).")
+        return len(job_ids)
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=True)
+
+
+assignment_queue = AssignmentQueue(
+    SessionLocal,
+    workers=settings.ASSIGNMENT_WORKERS,
+    chunk_size=settings.ASSIGNMENT_CHUNK_SIZE,
+    inline_limit=settings.ASSIGNMENT_INLINE_LIMIT
+)
+
+
+def get_assignment_queue() -> AssignmentQueue:
+    return assignment_queue
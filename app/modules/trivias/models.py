@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, String, ForeignKey, Integer, Table, Enum, Boolean
+from sqlalchemy import Column, String, ForeignKey, Integer, Table, Enum, Boolean, Index, JSON
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from app.core.models import IDMixin, TimestampMixin, SoftDeleteMixin
@@ -10,7 +10,9 @@ trivia_questions = Table(
     "trivia_questions",
     Base.metadata,
     Column("trivia_id", Integer, ForeignKey("trivias.id"), primary_key=True),
-    Column("question_id", Integer, ForeignKey("questions.id"), primary_key=True)
+    Column("question_id", Integer, ForeignKey("questions.id"), primary_key=True),
+    # La PK (trivia_id, question_id) no sirve para buscar por pregunta
+    Index("ix_trivia_questions_question_id", "question_id")
 )
 
 class AssignmentStatus(str, enum.Enum):
@@ -36,6 +38,12 @@ class TriviaAssignment(Base, IDMixin, TimestampMixin):
     Aquí guardaremos el puntaje final para el Ranking[cite: 38].
     """
     __tablename__ = "trivia_assignments"
+    __table_args__ = (
+        Index("ix_trivia_assignments_user_status", "user_id", "status"),
+        Index("ix_trivia_assignments_trivia_status", "trivia_id", "status"),
+        # Un usuario se asigna una sola vez a cada trivia (destino de ON CONFLICT DO NOTHING)
+        Index("uq_trivia_assignments_user_trivia", "user_id", "trivia_id", unique=True),
+    )
 
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     trivia_id = Column(Integer, ForeignKey("trivias.id"), nullable=False)
@@ -54,7 +62,7 @@ class UserAnswer(Base, IDMixin, TimestampMixin):
     """
     __tablename__ = "user_answers"
 
-    assignment_id = Column(Integer, ForeignKey("trivia_assignments.id"), nullable=False)
+    assignment_id = Column(Integer, ForeignKey("trivia_assignments.id"), nullable=False, index=True)
     question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
     selected_option_id = Column(Integer, ForeignKey("options.id"), nullable=False)
     
@@ -63,4 +71,45 @@ class UserAnswer(Base, IDMixin, TimestampMixin):
     points_awarded = Column(Integer, default=0, nullable=False)
 
     # Relación
-    assignment = relationship("TriviaAssignment", backref="answers")
\ No newline at end of file
+    assignment = relationship("TriviaAssignment", backref="answers")
+
+class AssignmentJobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class AssignmentJob(Base, IDMixin, TimestampMixin):
+    """
+    Creación en segundo plano de las asignaciones de una trivia.
+    Los usuarios se insertan por tramos de id (INSERT ... SELECT); cada tramo
+    se confirma junto con el progreso, así que el trabajo se puede retomar.
+    """
+    __tablename__ = "assignment_jobs"
+
+    trivia_id = Column(Integer, ForeignKey("trivias.id"), nullable=False, index=True)
+    status = Column(Enum(AssignmentJobStatus), default=AssignmentJobStatus.QUEUED, nullable=False, index=True)
+
+    # Destinatarios: {"user_ids": [...]} o filtro {"role": ..., "email_domain": ...}
+    target = Column(JSON, nullable=False)
+
+    total = Column(Integer, default=0, nullable=False)
+    processed = Column(Integer, default=0, nullable=False)
+    # Asignaciones nuevas; el resto de los procesados ya estaban asignados
+    inserted = Column(Integer, default=0, server_default="0", nullable=False)
+    # Último users.id cubierto (los tramos siguientes empiezan después)
+    last_user_id = Column(Integer, default=0, nullable=False)
+    error_detail = Column(String, nullable=True)
+
+    @property
+    def skipped(self) -> int:
+        """Usuarios procesados que ya tenían la trivia asignada."""
+        return self.processed - self.inserted
+
+    @property
+    def progress(self) -> float:
+        """Porcentaje de usuarios ya procesados."""
+        if not self.total:
+            return 100.0 if self.status == AssignmentJobStatus.DONE else 0.0
+        return round(min(self.processed / self.total, 1) * 100, 1)
@@ -1,15 +1,32 @@
-from typing import List
+import bisect
+from typing import Iterable, List, Optional, Tuple, Union
+from sqlalchemy import Select, func, literal, select, update
 from sqlalchemy.orm import Session
-from app.modules.trivias.models import Trivia, TriviaAssignment, AssignmentStatus
+from app.core.database import dialect_insert
+from app.core.pagination import apply_keyset
+from app.modules.trivias.models import Trivia, TriviaAssignment, AssignmentStatus, AssignmentJob
 from app.modules.trivias.schemas import TriviaCreate, TriviaUpdate
 from app.modules.questions.models import Question
-from app.modules.users.models import User
+from app.modules.users.models import User, UserRole
+from app.modules.game.cache import invalidate_trivia
+
+# IDs por lista IN al contar destinatarios por `user_ids` (límite de parámetros por sentencia)
+USER_IDS_BATCH_SIZE = 5000
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
 
 class TriviaRepository:
     def __init__(self, db: Session):
         self.db = db
 
-    def create(self, trivia_data: TriviaCreate) -> Trivia:
+    def create(self, trivia_data: TriviaCreate) -> Tuple[Trivia, AssignmentJob]:
+        """
+        Crea la trivia y el trabajo que generará sus asignaciones.
+        Las asignaciones no se crean aquí: ver `assign_chunk`.
+        """
         db_trivia = Trivia(
             name=trivia_data.name,
             description=trivia_data.description
@@ -25,30 +42,160 @@ class TriviaRepository:
         self.db.add(db_trivia)
         self.db.flush() 
         
-        # Crear ASIGNACIONES para usuarios activos
-        active_users = self.db.query(User).filter(
-            User.id.in_(trivia_data.user_ids),
-            User.is_active == True
-        ).all()
-        
-        for user in active_users:
-            assignment = TriviaAssignment(
-                trivia_id=db_trivia.id,
-                user_id=user.id,
-                status=AssignmentStatus.PENDING,
-                total_score=0
-            )
-            self.db.add(assignment)
+        job = self.add_assignment_job(db_trivia.id, trivia_data.assignment_target())
             
         self.db.commit()
         self.db.refresh(db_trivia)
-        return db_trivia
+        return db_trivia, job
+
+    def create_assignment_job(self, trivia_id: int, target: dict) -> AssignmentJob:
+        """Registra un trabajo para asignar la trivia a más usuarios."""
+        job = self.add_assignment_job(trivia_id, target)
+        self.db.commit()
+        return job
+
+    def add_assignment_job(self, trivia_id: int, target: dict) -> AssignmentJob:
+        """Agrega el trabajo a la sesión (sin confirmar)."""
+        job = AssignmentJob(trivia_id=trivia_id, target=target, total=self.count_assignees(target))
+        self.db.add(job)
+        return job
+
+    # --- Asignaciones por conjuntos ---
+
+    @staticmethod
+    def _assignee_conditions(target: dict) -> list:
+        """
+        Condiciones sobre `users` para los destinatarios de un AssignmentJob.
+        Los filtros (todo salvo `user_ids` explícitos) excluyen a los administradores.
+        """
+        conditions = [User.is_active == True]
+        if "user_ids" in target:
+            conditions.append(User.id.in_(target["user_ids"]))
+        else:
+            conditions.append(User.role != UserRole.ADMIN)
+        if "role" in target:
+            conditions.append(User.role == UserRole(target["role"]))
+        if "email_domain" in target:
+            conditions.append(User.email.like(f"%@{_escape_like(target['email_domain'])}", escape="\\"))
+        return conditions
+
+    def count_assignees(self, target: dict) -> int:
+        if "user_ids" not in target:
+            return self.db.query(func.count(User.id)).filter(*self._assignee_conditions(target)).scalar()
+        ids = target["user_ids"]
+        return sum(
+            self.db.query(func.count(User.id)).filter(
+                *self._assignee_conditions({**target, "user_ids": ids[i:i + USER_IDS_BATCH_SIZE]})
+            ).scalar()
+            for i in range(0, len(ids), USER_IDS_BATCH_SIZE)
+        )
+
+    def assign_chunk(self, trivia_id: int, target: dict, after_user_id: int, chunk_size: int) -> Tuple[int, int, Optional[int]]:
+        """
+        Inserta con un solo INSERT ... SELECT ... ON CONFLICT DO NOTHING las
+        asignaciones de los siguientes `chunk_size` destinatarios
+        (por users.id > `after_user_id`); los ya asignados se omiten sin error.
+        Devuelve (usuarios cubiertos, filas insertadas, último id cubierto o
+        None si no quedan más). No confirma la transacción.
+
+        Con `user_ids` (ordenados), cada tramo solo envía sus `chunk_size`
+        ids en la lista IN, no la lista completa.
+        """
+        if "user_ids" in target:
+            ids = target["user_ids"]
+            start = bisect.bisect_right(ids, after_user_id)
+            chunk = ids[start:start + chunk_size]
+            conditions = self._assignee_conditions({**target, "user_ids": chunk})
+            upper = chunk[-1] if start + chunk_size < len(ids) else None
+            return self._insert_assignments(trivia_id, conditions, None, upper)
+
+        conditions = self._assignee_conditions(target) + [User.id > after_user_id]
+        upper = self.db.execute(
+            select(User.id).where(*conditions).order_by(User.id).offset(chunk_size - 1).limit(1)
+        ).scalar()
+        if upper is not None:
+            conditions.append(User.id <= upper)
+        return self._insert_assignments(trivia_id, conditions, chunk_size if upper is not None else None, upper)
+
+    def _insert_assignments(
+        self, trivia_id: int, conditions: list, covered: Optional[int], upper: Optional[int]
+    ) -> Tuple[int, int, Optional[int]]:
+        """Inserta las asignaciones de los usuarios que cumplen `conditions` (un tramo de `assign_chunk`)."""
+        if covered is None:
+            covered = self.db.execute(select(func.count(User.id)).where(*conditions)).scalar()
+
+        status_type = TriviaAssignment.__table__.c.status.type
+        rows = select(
+            User.id,
+            literal(trivia_id),
+            literal(AssignmentStatus.PENDING, status_type),
+            literal(0)
+        ).where(*conditions)
+        stmt = dialect_insert(self.db, TriviaAssignment).from_select(
+            ["user_id", "trivia_id", "status", "total_score"], rows
+        ).on_conflict_do_nothing(index_elements=["user_id", "trivia_id"])
+        result = self.db.execute(stmt)
+        if result.rowcount:
+            # Se recuenta el tramo: no se sabe cuáles de sus usuarios ya estaban asignados
+            self.db.execute(
+                update(User).where(*conditions)
+                .values(pending_assignments=self._user_pending_count())
+                .execution_options(synchronize_session=False)
+            )
+        return covered, result.rowcount, upper
+
+    # --- Contador de uso (asignaciones pendientes por usuario) ---
+    # Se actualiza en la misma transacción que crea, completa o cancela las
+    # asignaciones, para que eliminar un usuario no tenga que contarlas. Cada
+    # fila es de un solo usuario, así que los envíos de distintos jugadores no
+    # compiten por ella. Las de una pregunta se cuentan al eliminarla
+    # (QuestionRepository.get_usage): mantenerlas obligaba a cada envío a
+    # actualizar todas las preguntas de la trivia.
+
+    @staticmethod
+    def _user_pending_count():
+        """Subconsulta correlacionada: asignaciones pendientes de `users.id`."""
+        return select(func.count(TriviaAssignment.id)).where(
+            TriviaAssignment.user_id == User.id,
+            TriviaAssignment.status == AssignmentStatus.PENDING
+        ).scalar_subquery()
+
+    def _shift_user_usage(self, user_ids: Union[Iterable[int], Select], delta: int) -> None:
+        self.db.execute(
+            update(User).where(User.id.in_(user_ids))
+            .values(pending_assignments=User.pending_assignments + delta)
+            .execution_options(synchronize_session=False)
+        )
+
+    def release_assignment(self, assignment: TriviaAssignment) -> None:
+        """
+        Descuenta del contador del usuario una asignación que deja de estar
+        pendiente (al completarse). No hace commit.
+        """
+        self._shift_user_usage([assignment.user_id], -1)
+
+    def rebuild_usage_counters(self) -> None:
+        """Recalcula los contadores desde `trivia_assignments` (migración, seed). No hace commit."""
+        self.db.execute(
+            update(User).values(pending_assignments=self._user_pending_count())
+            .execution_options(synchronize_session=False)
+        )
+
+    def get_assignment_job(self, job_id: int) -> AssignmentJob | None:
+        return self.db.get(AssignmentJob, job_id)
 
     def get_all(self, skip: int = 0, limit: int = 100, include_deleted: bool = False):
         query = self.db.query(Trivia)
         if not include_deleted:
             query = query.filter(Trivia.is_active == True)
         return query.offset(skip).limit(limit).all()
+
+    def get_page_after(self, after: Optional[tuple] = None, limit: int = 100, include_deleted: bool = False):
+        """Página por keyset (id): las `limit + 1` trivias siguientes al cursor."""
+        query = self.db.query(Trivia)
+        if not include_deleted:
+            query = query.filter(Trivia.is_active == True)
+        return apply_keyset(query, (Trivia.id,), after, limit).all()
     
     def count_all(self, include_deleted: bool = False) -> int:
         """Cuenta el total de trivias."""
@@ -80,6 +227,7 @@ class TriviaRepository:
             setattr(trivia, field, value)
         
         self.db.commit()
+        invalidate_trivia(trivia.id)
         self.db.refresh(trivia)
         return trivia
     
@@ -87,12 +235,15 @@ class TriviaRepository:
         """Marca la trivia como eliminada y cancela assignments pendientes."""
         trivia.soft_delete()
         
-        # Cancelar assignments pendientes
-        self.db.query(TriviaAssignment).filter(
+        # Cancelar assignments pendientes (y descontarlos de los contadores)
+        pending = (
             TriviaAssignment.trivia_id == trivia.id,
             TriviaAssignment.status == AssignmentStatus.PENDING
-        ).update({"status": AssignmentStatus.CANCELLED})
+        )
+        self._shift_user_usage(select(TriviaAssignment.user_id).where(*pending), -1)
+        self.db.query(TriviaAssignment).filter(*pending).update({"status": AssignmentStatus.CANCELLED})
         
         self.db.commit()
+        invalidate_trivia(trivia.id)
         self.db.refresh(trivia)
         return trivia
\ No newline at end of file
@@ -1,22 +1,30 @@
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, status, Query
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.deps import get_current_admin
-from app.core.pagination import PaginatedResponse
+from app.core.pagination import CursorPage, PaginatedResponse
 from app.modules.trivias import schemas
 from app.modules.trivias.repository import TriviaRepository
 from app.modules.trivias.service import TriviaService
+from app.modules.trivias.jobs import AssignmentQueue, get_assignment_queue
 
 router = APIRouter(prefix="/trivias", tags=["Trivias"])
 
-def get_service(db: Session = Depends(get_db)) -> TriviaService:
+def get_service(
+    db: Session = Depends(get_db),
+    assignments: AssignmentQueue = Depends(get_assignment_queue)
+) -> TriviaService:
     repository = TriviaRepository(db)
-    return TriviaService(repository)
+    return TriviaService(repository, assignments)
+
+def get_read_service(db: Session = Depends(get_read_db)) -> TriviaService:
+    """Servicio sobre una réplica de lectura (solo para listados)."""
+    return TriviaService(TriviaRepository(db))
 
 @router.post(
     "/",
-    response_model=schemas.TriviaResponse,
+    response_model=schemas.TriviaCreateResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Crear trivia",
     responses={
@@ -36,10 +44,84 @@ def create_trivia(
     
     Requiere:
     - Lista de IDs de preguntas existentes
-    - Lista de IDs de usuarios a asignar
+    - Destinatarios: `user_ids`, `assign_all_players` o `assignee_filter` (uno solo).
+      `user_ids` admite hasta 10.000 ids; `assignee_filter` necesita `role` o
+      `email_domain` y nunca incluye administradores.
+
+    Las asignaciones se crean por tramos en un trabajo en segundo plano cuando
+    los destinatarios superan ASSIGNMENT_INLINE_LIMIT; `assignment_job` indica
+    su estado (ver `GET /trivias/assignment-jobs/{job_id}`).
     """
     return service.create_trivia(trivia)
 
+@router.post(
+    "/{trivia_id}/assignees",
+    response_model=schemas.AssignmentJobResponse,
+    summary="Asignar la trivia a más usuarios",
+    responses={
+        200: {"description": "Asignaciones creadas o agendadas"},
+        404: {"description": "Trivia no encontrada"},
+        401: {"description": "No autenticado"},
+        403: {"description": "No tienes permisos de administrador"},
+        422: {"description": "Destinatarios inválidos"}
+    }
+)
+def add_assignees(
+    trivia_id: int,
+    target: schemas.AssignmentTarget,
+    service: TriviaService = Depends(get_service),
+    current_admin = Depends(get_current_admin)
+):
+    """
+    Agrega usuarios a una trivia existente (`user_ids`, `assign_all_players`
+    o `assignee_filter`). Los usuarios que ya la tenían asignada se omiten:
+    `inserted` y `skipped` indican cuántos se agregaron y cuántos no.
+    """
+    return service.add_assignees(trivia_id, target)
+
+@router.get(
+    "/assignment-jobs/{job_id}",
+    response_model=schemas.AssignmentJobResponse,
+    summary="Progreso de la creación de asignaciones",
+    responses={
+        200: {"description": "Estado del trabajo"},
+        404: {"description": "Trabajo no encontrado"},
+        401: {"description": "No autenticado"},
+        403: {"description": "No tienes permisos de administrador"}
+    }
+)
+def get_assignment_job(
+    job_id: int,
+    service: TriviaService = Depends(get_service),
+    current_admin = Depends(get_current_admin)
+):
+    """Devuelve el estado y el progreso (usuarios procesados / total) del trabajo."""
+    return service.get_assignment_job(job_id)
+
+@router.get(
+    "/cursor",
+    response_model=CursorPage[schemas.TriviaResponse],
+    summary="Listar trivias por cursor",
+    responses={
+        200: {"description": "Página de trivias obtenida exitosamente"},
+        400: {"description": "Cursor inválido"},
+        401: {"description": "No autenticado"},
+        403: {"description": "No tienes permisos de administrador"}
+    }
+)
+def list_trivias_cursor(
+    cursor: Optional[str] = Query(None, description="`next_cursor` de la página anterior (vacío = primera página)"),
+    per_page: int = Query(100, ge=1, le=1000, description="Elementos por página"),
+    include_total: bool = Query(False, description="Incluir el total de elementos (agrega un COUNT)"),
+    service: TriviaService = Depends(get_read_service),
+    current_admin = Depends(get_current_admin)
+):
+    """
+    Lista trivias con paginación por cursor (keyset).
+    El costo de cada página no depende de su profundidad: recomendado para exportar.
+    """
+    return service.get_trivias_cursor(cursor=cursor, per_page=per_page, include_total=include_total)
+
 @router.get(
     "/{trivia_id}",
     response_model=schemas.TriviaResponse,
@@ -118,7 +200,7 @@ def delete_trivia(
 def list_trivias(
     page: int = Query(1, ge=1, description="Número de página (1-indexed)"),
     per_page: int = Query(10, ge=1, le=100, description="Elementos por página"),
-    service: TriviaService = Depends(get_service),
+    service: TriviaService = Depends(get_read_service),
     current_admin = Depends(get_current_admin)
 ):
     """Lista todas las trivias con paginación."""
@@ -1,16 +1,56 @@
 from typing import List, Optional
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 from datetime import datetime
+from app.modules.trivias.models import AssignmentJobStatus
+from app.modules.users.models import UserRole
 
 # Base
 class TriviaBase(BaseModel):
     name: str = Field(..., json_schema_extra={"example": "Trivia Mensual RRHH"})
     description: Optional[str] = Field(None, json_schema_extra={"example": "Evaluación de conocimientos legales"})
 
+# Tope de `user_ids` por petición: para más usuarios, usar `assignee_filter`
+MAX_ASSIGNEE_IDS = 10_000
+
+# Filtro de destinatarios (alternativa a enviar miles de IDs); nunca incluye administradores
+class AssigneeFilter(BaseModel):
+    role: Optional[UserRole] = Field(None, description="Solo usuarios con este rol")
+    email_domain: Optional[str] = Field(None, min_length=1, json_schema_extra={"example": "talana.com"}, description="Solo emails de este dominio")
+
+    @model_validator(mode="after")
+    def check_criteria(self):
+        if self.role is None and self.email_domain is None:
+            raise ValueError("El filtro debe indicar al menos un criterio: role o email_domain")
+        if self.role == UserRole.ADMIN:
+            raise ValueError("Las trivias no se asignan a administradores")
+        return self
+
+# Destinatarios de una asignación (exactamente uno)
+class AssignmentTarget(BaseModel):
+    user_ids: Optional[List[int]] = Field(
+        None, min_length=1, max_length=MAX_ASSIGNEE_IDS, description="IDs de los usuarios a invitar"
+    )
+    assign_all_players: bool = Field(False, description="Asignar a todos los jugadores activos")
+    assignee_filter: Optional[AssigneeFilter] = Field(None, description="Asignar a los usuarios activos que cumplan el filtro")
+
+    @model_validator(mode="after")
+    def check_single_target(self):
+        targets = [self.user_ids is not None, self.assign_all_players, self.assignee_filter is not None]
+        if sum(targets) != 1:
+            raise ValueError("Indica exactamente uno de: user_ids, assign_all_players o assignee_filter")
+        return self
+
+    def assignment_target(self) -> dict:
+        """Destinatarios en el formato guardado en `AssignmentJob.target`."""
+        if self.user_ids is not None:
+            return {"user_ids": sorted(set(self.user_ids))}
+        if self.assign_all_players:
+            return {"role": UserRole.PLAYER.value}
+        return self.assignee_filter.model_dump(mode="json", exclude_none=True)
+
 # Create: Input del Admin
-class TriviaCreate(TriviaBase):
+class TriviaCreate(TriviaBase, AssignmentTarget):
     question_ids: List[int] = Field(..., min_length=1, description="IDs de las preguntas a incluir")
-    user_ids: List[int] = Field(..., min_length=1, description="IDs de los usuarios a invitar")
 
 # Update: Campos opcionales
 class TriviaUpdate(BaseModel):
@@ -24,4 +64,21 @@ class TriviaResponse(TriviaBase):
     id: int
     created_at: datetime
     
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# Progreso de la creación de asignaciones
+class AssignmentJobResponse(BaseModel):
+    id: int
+    trivia_id: int
+    status: AssignmentJobStatus
+    total: int
+    processed: int
+    inserted: int
+    skipped: int
+    progress: float
+    error_detail: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class TriviaCreateResponse(TriviaResponse):
+    assignment_job: AssignmentJobResponse
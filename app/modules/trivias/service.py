@@ -1,15 +1,42 @@
+from typing import Optional
 from fastapi import HTTPException
-from app.modules.trivias.schemas import TriviaCreate, TriviaUpdate
+from app.modules.trivias.schemas import (
+    AssignmentTarget, TriviaCreate, TriviaUpdate, TriviaCreateResponse, TriviaResponse
+)
 from app.modules.trivias.repository import TriviaRepository
-from app.core.pagination import paginate, calculate_skip
+from app.modules.trivias.jobs import AssignmentQueue
+from app.core.pagination import paginate, calculate_skip, cursor_paginate, decode_cursor
 
 class TriviaService:
-    def __init__(self, repository: TriviaRepository):
+    def __init__(self, repository: TriviaRepository, assignments: Optional[AssignmentQueue] = None):
         self.repository = repository
+        self.assignments = assignments
 
-    def create_trivia(self, trivia_data: TriviaCreate):
-        # Aquí podrías validar: len(found_questions) == len(input_ids)
-        return self.repository.create(trivia_data)
+    def create_trivia(self, trivia_data: TriviaCreate) -> TriviaCreateResponse:
+        """
+        Crea la trivia y agenda la creación de sus asignaciones
+        (en la misma petición si son pocas, en segundo plano si no).
+        """
+        trivia, job = self.repository.create(trivia_data)
+        job = self.assignments.schedule(self.repository.db, job)
+        return TriviaCreateResponse(
+            **TriviaResponse.model_validate(trivia).model_dump(),
+            assignment_job=job
+        )
+
+    def add_assignees(self, trivia_id: int, target: AssignmentTarget):
+        """Asigna la trivia a más usuarios; los ya asignados se omiten."""
+        trivia = self.repository.get_by_id(trivia_id)
+        if not trivia:
+            raise HTTPException(status_code=404, detail="Trivia no encontrada")
+        job = self.repository.create_assignment_job(trivia.id, target.assignment_target())
+        return self.assignments.schedule(self.repository.db, job)
+
+    def get_assignment_job(self, job_id: int):
+        job = self.repository.get_assignment_job(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Trabajo de asignación no encontrado")
+        return job
 
     def get_trivias(self, page: int = 1, per_page: int = 10):
         """Obtiene trivias con paginación."""
@@ -17,6 +44,12 @@ class TriviaService:
         items = self.repository.get_all(skip=skip, limit=per_page)
         total = self.repository.count_all()
         return paginate(items, total, page, per_page)
+
+    def get_trivias_cursor(self, cursor: str | None = None, per_page: int = 10, include_total: bool = False):
+        """Obtiene trivias con paginación por cursor (keyset por id)."""
+        rows = self.repository.get_page_after(decode_cursor(cursor, 1), limit=per_page)
+        total = self.repository.count_all() if include_total else None
+        return cursor_paginate(rows, per_page, key=lambda t: (t.id,), total=total)
     
     def get_trivia_by_id(self, trivia_id: int):
         trivia = self.repository.get_by_id(trivia_id)
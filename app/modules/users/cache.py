@@ -0,0 +1,40 @@
+"""
+Caché de usuarios autenticados ("principals").
+
+`get_current_user` resuelve el `sub` del JWT a un usuario en cada petición
+autenticada. Como solo se necesitan id y rol, se guarda una versión liviana
+e inmutable del usuario, por email, durante unos segundos.
+
+UserService invalida la entrada al modificar, eliminar o restaurar un usuario;
+el TTL acota cuánto puede quedar desactualizado un worker que no recibió la
+invalidación.
+"""
+from dataclasses import dataclass
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.modules.users.models import User, UserRole
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    role: UserRole
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, email=user.email, role=user.role, is_active=user.is_active)
+
+
+# email -> Principal
+principal_cache = LRUCache(
+    "principals",
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Elimina al usuario de la caché (bajo cualquier email con el que estuviera)."""
+    principal_cache.invalidate_where(lambda _, principal: principal.id == user_id)
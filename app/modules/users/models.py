@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, String, Enum
+from sqlalchemy import Column, String, Enum, Integer
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from app.core.models import IDMixin, TimestampMixin, SoftDeleteMixin
@@ -15,6 +15,9 @@ class User(Base, IDMixin, TimestampMixin, SoftDeleteMixin):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     role = Column(Enum(UserRole), default=UserRole.PLAYER, nullable=False)
+    # Asignaciones pendientes: se mantiene al asignar, completar o cancelar
+    # (ver TriviaRepository) para validar el soft delete sin contar filas
+    pending_assignments = Column(Integer, default=0, server_default="0", nullable=False)
 
     # Relaciones (se activarán cuando creemos el módulo de Trivias)
     # assignments = relationship("TriviaAssignment", back_populates="user")
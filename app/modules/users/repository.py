@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from sqlalchemy.orm import Session
+from app.core.pagination import apply_keyset
 from app.modules.users.models import User
+from app.modules.ranking.leaderboard import leaderboard, sync_player
 from app.modules.users.schemas import UserCreate, UserUpdate
 from typing import Optional
 
@@ -18,6 +20,10 @@ class BaseUserRepository(ABC):
     def get_all(self, skip: int = 0, limit: int = 100, include_deleted: bool = False):
         pass
     
+    @abstractmethod
+    def get_page_after(self, after: Optional[tuple] = None, limit: int = 100, include_deleted: bool = False):
+        pass
+    
     @abstractmethod
     def get_by_id(self, user_id: int, include_deleted: bool = False) -> User | None:
         pass
@@ -46,6 +52,13 @@ class UserRepository(BaseUserRepository):
         if not include_deleted:
             query = query.filter(User.is_active == True)
         return query.offset(skip).limit(limit).all()
+
+    def get_page_after(self, after: Optional[tuple] = None, limit: int = 100, include_deleted: bool = False):
+        """Página por keyset (id): las `limit + 1` usuarios siguientes al cursor."""
+        query = self.db.query(User)
+        if not include_deleted:
+            query = query.filter(User.is_active == True)
+        return apply_keyset(query, (User.id,), after, limit).all()
     
     def count_all(self, include_deleted: bool = False) -> int:
         """Cuenta el total de usuarios."""
@@ -89,6 +102,13 @@ class UserRepository(BaseUserRepository):
         
         self.db.commit()
         self.db.refresh(user)
+        sync_player(self.db, user.id)  # El nombre o el rol pueden cambiar su fila del ranking
+        return user
+    
+    def update_password_hash(self, user: User, hashed_password: str) -> User:
+        """Reemplaza el hash de la contraseña (p. ej. al cambiar el costo de bcrypt)."""
+        user.hashed_password = hashed_password
+        self.db.commit()
         return user
     
     def soft_delete(self, user: User) -> User:
@@ -96,6 +116,7 @@ class UserRepository(BaseUserRepository):
         user.soft_delete()
         self.db.commit()
         self.db.refresh(user)
+        leaderboard.remove(user.id)
         return user
     
     def restore(self, user: User) -> User:
@@ -103,4 +124,5 @@ class UserRepository(BaseUserRepository):
         user.restore()
         self.db.commit()
         self.db.refresh(user)
+        sync_player(self.db, user.id)
         return user
\ No newline at end of file
@@ -1,15 +1,15 @@
 from app.core.deps import get_current_admin, get_current_user
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.pagination import PaginatedResponse
+from app.core.database import get_db, get_read_db
+from app.core.pagination import CursorPage, PaginatedResponse
 from app.modules.users import schemas
 from app.modules.users.repository import UserRepository
 from app.modules.users.service import UserService
 from app.core.logger import LoggerSetup
 from app.modules.users.schemas import UserSignup
-from app.modules.users.models import User
+from app.modules.users.cache import Principal
 
 router = APIRouter(prefix="/users", tags=["Users"])
 logger = LoggerSetup.get_logger(__name__)
@@ -19,6 +19,10 @@ def get_user_service(db: Session = Depends(get_db)) -> UserService:
     repository = UserRepository(db)
     return UserService(repository)
 
+def get_read_user_service(db: Session = Depends(get_read_db)) -> UserService:
+    """Servicio sobre una réplica de lectura (solo para listados)."""
+    return UserService(UserRepository(db))
+
 @router.post("/signup", response_model=schemas.UserResponse, status_code=status.HTTP_201_CREATED)
 def register_user(
     user_data: schemas.UserSignup,
@@ -44,12 +48,36 @@ def register_user(
 def list_users(
     page: int = Query(1, ge=1, description="Número de página (1-indexed)"),
     per_page: int = Query(10, ge=1, le=100, description="Elementos por página"),
-    service: UserService = Depends(get_user_service),
+    service: UserService = Depends(get_read_user_service),
     current_admin = Depends(get_current_admin)
 ):
     """Lista todos los usuarios con paginación (solo activos)."""
     return service.get_all_users(page=page, per_page=per_page)
 
+@router.get(
+    "/cursor",
+    response_model=CursorPage[schemas.UserResponse],
+    summary="Listar usuarios por cursor",
+    responses={
+        200: {"description": "Página de usuarios obtenida exitosamente"},
+        400: {"description": "Cursor inválido"},
+        401: {"description": "No autenticado"},
+        403: {"description": "No tienes permisos de administrador"}
+    }
+)
+def list_users_cursor(
+    cursor: Optional[str] = Query(None, description="`next_cursor` de la página anterior (vacío = primera página)"),
+    per_page: int = Query(100, ge=1, le=1000, description="Elementos por página"),
+    include_total: bool = Query(False, description="Incluir el total de elementos (agrega un COUNT)"),
+    service: UserService = Depends(get_read_user_service),
+    current_admin = Depends(get_current_admin)
+):
+    """
+    Lista usuarios con paginación por cursor (keyset).
+    El costo de cada página no depende de su profundidad: recomendado para exportar.
+    """
+    return service.get_users_cursor(cursor=cursor, per_page=per_page, include_total=include_total)
+
 @router.get(
     "/deleted",
     response_model=List[schemas.UserResponse],
@@ -81,7 +109,7 @@ def list_deleted_users(
 def get_user(
     user_id: int,
     service: UserService = Depends(get_user_service),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Obtiene un usuario por ID. Admin puede ver cualquiera, usuario normal solo sí mismo."""
     user = service.get_user_by_id(user_id)
@@ -148,7 +176,7 @@ def update_user(
     user_id: int,
     update_data: schemas.UserUpdate,
     service: UserService = Depends(get_user_service),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Actualiza un usuario. Admin puede actualizar cualquiera, usuario normal solo sí mismo.
@@ -178,7 +206,6 @@ def update_user(
 )
 def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
     service: UserService = Depends(get_user_service),
     current_admin = Depends(get_current_admin)
 ):
@@ -186,7 +213,7 @@ def delete_user(
     Elimina un usuario (soft delete). Solo admin.
     Valida que no tenga trivias pendientes antes de eliminar.
     """
-    return service.delete_user(user_id, db)
+    return service.delete_user(user_id)
 
 @router.put(
     "/{user_id}/restore",
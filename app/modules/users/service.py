@@ -1,11 +1,10 @@
 from app.core.security import get_password_hash
 from app.modules.users.models import UserRole
+from app.modules.users.cache import invalidate_user
 from app.modules.users.schemas import UserCreate, UserSignup, UserUpdate
 from app.modules.users.repository import BaseUserRepository
-from app.core.pagination import paginate, calculate_skip
+from app.core.pagination import paginate, calculate_skip, cursor_paginate, decode_cursor
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-from app.modules.trivias.models import TriviaAssignment, AssignmentStatus
 
 class UserService:
     def __init__(self, repository: BaseUserRepository):
@@ -20,6 +19,12 @@ class UserService:
         items = self.repository.get_all(skip=skip, limit=per_page, include_deleted=include_deleted)
         total = self.repository.count_all(include_deleted=include_deleted)
         return paginate(items, total, page, per_page)
+
+    def get_users_cursor(self, cursor: str | None = None, per_page: int = 10, include_total: bool = False):
+        """Obtiene usuarios activos con paginación por cursor (keyset por id)."""
+        rows = self.repository.get_page_after(decode_cursor(cursor, 1), limit=per_page)
+        total = self.repository.count_all() if include_total else None
+        return cursor_paginate(rows, per_page, key=lambda u: (u.id,), total=total)
     
     def get_deleted_users(self):
         """Obtiene SOLO usuarios eliminados (sin paginación)."""
@@ -55,27 +60,26 @@ class UserService:
         if update_data.password:
             hashed_pwd = get_password_hash(update_data.password)
         
-        return self.repository.update(user, update_data, hashed_pwd)
+        updated = self.repository.update(user, update_data, hashed_pwd)
+        invalidate_user(user_id)  # Rol o email pueden haber cambiado
+        return updated
     
-    def delete_user(self, user_id: int, db: Session):
+    def delete_user(self, user_id: int):
         """Soft delete con validación de integridad."""
         user = self.repository.get_by_id(user_id)
         if not user:
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
         
-        # Validar que no tenga trivias pendientes
-        pending_trivias = db.query(TriviaAssignment).filter(
-            TriviaAssignment.user_id == user_id,
-            TriviaAssignment.status == AssignmentStatus.PENDING
-        ).count()
-        
-        if pending_trivias > 0:
+        # Validar que no tenga trivias pendientes (contador precalculado)
+        if user.pending_assignments > 0:
             raise HTTPException(
                 status_code=409,
-                detail=f"No se puede eliminar usuario con {pending_trivias} trivia(s) pendiente(s)"
+                detail=f"No se puede eliminar usuario con {user.pending_assignments} trivia(s) pendiente(s)"
             )
         
-        return self.repository.soft_delete(user)
+        deleted = self.repository.soft_delete(user)
+        invalidate_user(user_id)  # Sus tokens dejan de ser válidos de inmediato
+        return deleted
     
     def restore_user(self, user_id: int):
         """Restaura un usuario eliminado."""
@@ -86,7 +90,9 @@ class UserService:
         if user.is_active:
             raise HTTPException(status_code=400, detail="El usuario no está eliminado")
         
-        return self.repository.restore(user)
+        restored = self.repository.restore(user)
+        invalidate_user(user_id)
+        return restored
     
     def register_player(self, signup_data: UserSignup):
         if self.repository.get_by_email(signup_data.email):
@@ -0,0 +1 @@
+"""Benchmarks de endpoints sobre un dataset sintético (ver `benchmarks.run`)."""
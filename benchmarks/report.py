@@ -0,0 +1,90 @@
+"""
+Métricas de los escenarios y comparación contra la línea base (JSON).
+
+Un resultado tiene la forma:
+    {"meta": {...}, "scenarios": {"nombre": {"requests": 200, "p50_ms": ...,
+     "p95_ms": ..., "p99_ms": ..., "queries_per_request": ...}}}
+
+Las consultas por petición se comparan siempre; la latencia solo si se pide
+un umbral y la línea base se midió en la misma máquina, porque depende de
+ella y de la carga del momento.
+"""
+import json
+import statistics
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+# Variación aceptada en las consultas por petición (promedio): p. ej. fallos de caché al rotar usuarios
+QUERY_TOLERANCE = 0.5
+
+# Campos de `meta` que deben coincidir con la línea base para que la comparación tenga sentido
+COMPARABLE_META = ("dialect", "dataset", "requests", "login_requests")
+
+# Además, para comparar latencias (las consultas por petición no dependen de esto)
+LATENCY_META = ("bcrypt_rounds", "machine")
+
+
+def summarize(latencies_ms: List[float], query_counts: List[int]) -> Dict[str, float]:
+    """Percentiles de latencia y consultas por petición."""
+    cuts = statistics.quantiles(latencies_ms, n=100, method="inclusive") if len(latencies_ms) > 1 else latencies_ms * 99
+    return {
+        "requests": len(latencies_ms),
+        "p50_ms": round(cuts[49], 2),
+        "p95_ms": round(cuts[94], 2),
+        "p99_ms": round(cuts[98], 2),
+        "queries_per_request": round(sum(query_counts) / len(query_counts), 2) if query_counts else 0.0,
+    }
+
+
+def incomparable(current: dict, baseline: dict, keys: Sequence[str] = COMPARABLE_META) -> List[str]:
+    """Diferencias de `meta` (en `keys`) que invalidan la comparación; vacío si son comparables."""
+    current_meta, base_meta = current.get("meta", {}), baseline.get("meta", {})
+    return [
+        f"{key}: {current_meta.get(key)!r} (línea base {base_meta.get(key)!r})"
+        for key in keys if current_meta.get(key) != base_meta.get(key)
+    ]
+
+
+def compare(current: dict, baseline: dict, latency_threshold: Optional[float] = None) -> List[str]:
+    """
+    Regresiones de `current` respecto de `baseline`: más consultas por
+    petición y, si se indica `latency_threshold` (fracción), un p95 peor que
+    ese margen. Los escenarios que no están en ambos lados no se comparan.
+    Verificar antes con `incomparable` que ambos resultados son comparables
+    (y con LATENCY_META antes de pasar un umbral de latencia).
+    """
+    regressions = []
+    for name, base in baseline.get("scenarios", {}).items():
+        result = current["scenarios"].get(name)
+        if result is None:
+            continue
+        if latency_threshold is not None and result["p95_ms"] > base["p95_ms"] * (1 + latency_threshold):
+            regressions.append(f"{name}: p95 {result['p95_ms']} ms (línea base {base['p95_ms']} ms)")
+        if result["queries_per_request"] > base["queries_per_request"] + QUERY_TOLERANCE:
+            regressions.append(
+                f"{name}: {result['queries_per_request']} consultas/petición "
+                f"(línea base {base['queries_per_request']})"
+            )
+    return regressions
+
+
+def format_table(result: dict) -> str:
+    header = f"{'escenario':<22}{'req':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}"
+    lines = [header, "-" * len(header)]
+    for name, s in result["scenarios"].items():
+        lines.append(
+            f"{name:<22}{s['requests']:>6}{s['p50_ms']:>10}"
+            f"{s['p95_ms']:>10}{s['p99_ms']:>10}{s['queries_per_request']:>9}"
+        )
+    return "\n".join(lines)
+
+
+def load(path: Path) -> dict | None:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save(path: Path, result: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(result, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
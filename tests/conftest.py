@@ -4,12 +4,19 @@ Este archivo se ejecuta ANTES de todos los tests.
 
 Fixtures = Funciones que preparan el entorno de prueba.
 """
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import List, Optional
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.core.database import Base, get_db
+from app.core.database import Base, get_async_db, get_db, instrument_engine
 from app.main import app
+from app.modules.questions.search import search_index
+from app.modules.users.cache import principal_cache
 
 # BASE DE DATOS DE PRUEBA (EN MEMORIA)
 
@@ -20,8 +27,14 @@ engine = create_engine(
     connect_args={"check_same_thread": False}  # Solo para SQLite
 )
 
+instrument_engine(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Mismo archivo, con driver asíncrono (rutas `async def`)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db")
+instrument_engine(async_engine.sync_engine)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 
 @pytest.fixture(scope="function")
@@ -65,7 +78,15 @@ def client(db_session):
         finally:
             pass
     
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # Los usuarios y preguntas se recrean en cada test: no reutilizar cachés en memoria
+    principal_cache.clear()
+    search_index.invalidate()
     
     # Crear cliente de test
     with TestClient(app) as test_client:
@@ -73,3 +94,104 @@ def client(db_session):
     
     # Limpiar override
     app.dependency_overrides.clear()
+
+
+# PRESUPUESTO DE CONSULTAS POR PETICIÓN
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "query_budget(n): cada petición del `client` en el test hace como máximo n consultas SQL"
+    )
+
+
+def pytest_collection_modifyitems(items):
+    # Los tests marcados con query_budget usan el fixture aunque no lo pidan
+    for item in items:
+        if item.get_closest_marker("query_budget") and "query_budget" not in item.fixturenames:
+            item.fixturenames.append("query_budget")
+
+
+@dataclass
+class RecordedRequest:
+    method: str
+    url: str
+    statements: List[str] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+class QueryRecorder:
+    """
+    Sentencias SQL ejecutadas durante cada petición del `client` (en ambos
+    engines de prueba). Las que ejecuta el propio test fuera de una petición
+    (fixtures, `db_session`) no se cuentan.
+    """
+
+    def __init__(self):
+        self.requests: List[RecordedRequest] = []
+        self._current: Optional[RecordedRequest] = None
+
+    def on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self._current is not None:
+            self._current.statements.append(" ".join(statement.split()))
+
+    @property
+    def last(self) -> RecordedRequest:
+        return self.requests[-1]
+
+    def check(self, max_queries: int, requests: Optional[List[RecordedRequest]] = None) -> None:
+        over = [r for r in (self.requests if requests is None else requests) if r.count > max_queries]
+        if over:
+            details = "\n".join(
+                f"{r.method} {r.url}: {r.count} consultas (máximo {max_queries})\n    " + "\n    ".join(r.statements)
+                for r in over
+            )
+            raise AssertionError(f"Presupuesto de consultas excedido:\n{details}")
+
+    @contextmanager
+    def max_queries(self, max_queries: int):
+        """Cada petición hecha dentro del bloque debe hacer como máximo `max_queries` consultas."""
+        start = len(self.requests)
+        yield
+        self.check(max_queries, self.requests[start:])
+
+
+@pytest.fixture
+def query_budget(request, client, monkeypatch):
+    """
+    Registra las consultas SQL de cada petición del `client`.
+
+        def test_algo(client, query_budget):
+            with query_budget.max_queries(3):
+                client.get("/game/my-trivias")
+            assert query_budget.last.count == 2
+
+    Con `@pytest.mark.query_budget(n)` el límite se verifica para todas las peticiones del test.
+    """
+    recorder = QueryRecorder()
+    engines = (engine, async_engine.sync_engine)
+    for target in engines:
+        event.listen(target, "before_cursor_execute", recorder.on_execute)
+
+    send = client.request
+
+    def recorded_request(method, url, *args, **kwargs):
+        recorder._current = RecordedRequest(method, str(url))
+        recorder.requests.append(recorder._current)
+        try:
+            return send(method, url, *args, **kwargs)
+        finally:
+            recorder._current = None
+
+    monkeypatch.setattr(client, "request", recorded_request)
+    try:
+        yield recorder
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", recorder.on_execute)
+
+    marker = request.node.get_closest_marker("query_budget")
+    if marker is not None:
+        recorder.check(marker.args[0])
@@ -170,3 +170,73 @@ def test_logout(client):
     assert response.json()["message"] == "Logout exitoso"
     
     print("Logout funciona correctamente")
+
+
+def test_principal_cache_invalidated_on_delete(client, db_session):
+    """
+    Test 7: El usuario autenticado se cachea entre peticiones,
+    pero al eliminarlo su token deja de ser válido de inmediato.
+    """
+    from app.core.security import create_access_token
+    from app.modules.users.cache import principal_cache
+    from app.modules.users.repository import UserRepository
+    from app.modules.users.service import UserService
+
+    data = client.post("/users/signup", json={
+        "full_name": "Cache User",
+        "email": "cache@test.com",
+        "password": "pass123"
+    }).json()
+    client.cookies.set("access_token", create_access_token({"sub": "cache@test.com", "role": "player"}))
+
+    assert client.get(f"/users/{data['id']}").status_code == 200
+    hits = principal_cache.hits
+    assert client.get(f"/users/{data['id']}").status_code == 200
+    assert principal_cache.hits == hits + 1  # Segunda petición sin consultar la DB
+
+    UserService(UserRepository(db_session)).delete_user(data["id"])
+
+    assert client.get(f"/users/{data['id']}").status_code == 401
+
+
+def test_login_rehashes_password_with_new_cost(client, db_session, monkeypatch):
+    """
+    Test 8: Si el hash se generó con un costo de bcrypt menor,
+    el login exitoso lo reemplaza por uno con el costo configurado.
+    """
+    from passlib.hash import bcrypt
+    from app.core.passwords import password_hasher
+    from app.modules.users.models import User
+
+    # Costo fijo: no depende de BCRYPT_ROUNDS ni de la calibración del entorno
+    monkeypatch.setattr(password_hasher, "rounds", 5)
+    db_session.add(User(
+        full_name="Rehash User",
+        email="rehash@test.com",
+        hashed_password=bcrypt.using(rounds=4).hash("pass123")
+    ))
+    db_session.commit()
+
+    response = client.post("/auth/login", json={"email": "rehash@test.com", "password": "pass123"})
+    assert response.status_code == 200
+
+    user = db_session.query(User).filter(User.email == "rehash@test.com").first()
+    db_session.refresh(user)
+    assert bcrypt.from_string(user.hashed_password).rounds == 5
+    assert bcrypt.verify("pass123", user.hashed_password)
+
+
+def test_rehash_never_lowers_the_cost():
+    """
+    Test 9: Un hash con más rounds que los locales no se re-hashea
+    (workers calibrados distinto no deben reescribirlo en cada login).
+    """
+    from passlib.hash import bcrypt
+    from app.core.passwords import PasswordHasher
+
+    hasher = PasswordHasher(workers=0, max_pending=1, rounds=10)
+    cheap = bcrypt.using(rounds=4).hash("pass123")
+    assert hasher.needs_rehash(cheap)
+    assert not hasher.needs_rehash(cheap.replace("$04$", "$10$", 1))
+    assert not hasher.needs_rehash(cheap.replace("$04$", "$12$", 1))
+    assert hasher.needs_rehash("no-es-bcrypt")
@@ -0,0 +1,51 @@
+"""
+Tests de las métricas y la comparación de la suite de benchmarks.
+Archivo: tests/test_benchmarks.py
+"""
+from benchmarks.report import LATENCY_META, compare, incomparable, summarize
+
+
+def _result(p95=10.0, queries=2.0, **meta):
+    return {
+        "meta": {"dialect": "sqlite", "requests": 200, "machine": "x86_64, cpu, 8 CPUs", **meta},
+        "scenarios": {"game_play": {"p95_ms": p95, "queries_per_request": queries}},
+    }
+
+
+def test_summarize_percentiles_and_queries():
+    summary = summarize([float(ms) for ms in range(1, 101)], [2] * 99 + [3])
+    assert summary["requests"] == 100
+    assert (summary["p50_ms"], summary["p95_ms"], summary["p99_ms"]) == (50.5, 95.05, 99.01)
+    assert summary["queries_per_request"] == 2.01
+
+
+def test_compare_flags_query_regressions_and_latency_only_when_asked():
+    baseline = _result()
+    assert compare(_result(p95=12.0, queries=2.4), baseline, latency_threshold=0.25) == []
+
+    # Sin umbral de latencia solo cuentan las consultas
+    assert compare(_result(p95=100.0), baseline) == []
+    assert len(compare(_result(p95=100.0, queries=3.0), baseline)) == 1
+
+    regressions = compare(_result(p95=13.0, queries=3.0), baseline, latency_threshold=0.25)
+    assert len(regressions) == 2
+    assert all(r.startswith("game_play:") for r in regressions)
+
+
+def test_incomparable_when_measured_differently():
+    assert incomparable(_result(), _result()) == []
+    differences = incomparable(_result(requests=50, machine="arm64, cpu, 4 CPUs"), _result())
+    assert [d.split(":")[0] for d in differences] == ["requests"]
+
+
+def test_other_machine_only_skips_latency():
+    """Las consultas por petición se comparan en cualquier máquina; la latencia no."""
+    other_machine = _result(machine="arm64, cpu, 4 CPUs")
+    assert incomparable(other_machine, _result()) == []
+    differences = incomparable(other_machine, _result(), LATENCY_META)
+    assert [d.split(":")[0] for d in differences] == ["machine"]
+
+
+def test_compare_ignores_scenarios_missing_from_either_side():
+    assert compare({"scenarios": {}}, _result()) == []
+    assert compare(_result(queries=100.0), {"scenarios": {}}) == []
@@ -0,0 +1,388 @@
+"""
+Tests del flujo de juego vía HTTP.
+Archivo: tests/test_game_api.py
+
+Los datos se crean directamente en la base de prueba y el jugador se
+autentica con una cookie firmada (sin pasar por /auth/login, que tiene rate limit).
+"""
+import os
+
+import pytest
+
+from app.core import database
+from app.core.config import settings
+from app.core.security import create_access_token, get_password_hash
+from app.main import app
+from app.modules.game.cache import answer_key_cache, play_payload_cache
+from app.modules.game.queue import SubmissionQueue, get_submission_queue
+from app.modules.questions.models import Question, Option, DifficultyLevel
+from app.modules.ranking.leaderboard import leaderboard
+from app.modules.ranking.repository import RankingRepository
+from app.modules.trivias.models import Trivia, TriviaAssignment, AssignmentStatus
+from app.modules.users.models import User, UserRole
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture(autouse=True)
+def clear_game_caches(client):
+    """
+    Las cachés y el leaderboard son por proceso: se limpian para que cada test
+    parta de cero (el leaderboard se recarga desde la base de prueba).
+    """
+    answer_key_cache.clear()
+    play_payload_cache.clear()
+    leaderboard.invalidate()
+    yield
+    answer_key_cache.clear()
+    play_payload_cache.clear()
+
+
+@pytest.fixture
+def game_data(db_session):
+    """
+    Crea un jugador con una trivia pendiente de 2 preguntas:
+    - EASY  (correcta: "4")
+    - HARD  (correcta: "Santiago")
+    """
+    player = User(
+        full_name="Player Game",
+        email="player@game.com",
+        hashed_password=get_password_hash("secret123"),
+        role=UserRole.PLAYER
+    )
+    q_easy = Question(text="¿Cuánto es 2 + 2?", difficulty=DifficultyLevel.EASY, options=[
+        Option(text="4", is_correct=True),
+        Option(text="5", is_correct=False),
+    ])
+    q_hard = Question(text="¿Capital de Chile?", difficulty=DifficultyLevel.HARD, options=[
+        Option(text="Santiago", is_correct=True),
+        Option(text="Lima", is_correct=False),
+    ])
+    trivia = Trivia(name="Trivia Test", questions=[q_easy, q_hard])
+    db_session.add_all([player, trivia])
+    db_session.flush()
+
+    assignment = TriviaAssignment(user_id=player.id, trivia_id=trivia.id, status=AssignmentStatus.PENDING)
+    db_session.add(assignment)
+    db_session.commit()
+
+    return {
+        "player": player,
+        "trivia": trivia,
+        "assignment": assignment,
+        "correct": {q.id: next(o.id for o in q.options if o.is_correct) for q in (q_easy, q_hard)},
+        "wrong": {q.id: next(o.id for o in q.options if not o.is_correct) for q in (q_easy, q_hard)},
+    }
+
+
+@pytest.fixture
+def player_client(client, game_data):
+    """Cliente autenticado como el jugador de `game_data`."""
+    token = create_access_token({"sub": game_data["player"].email, "role": "player"})
+    client.cookies.set("access_token", token)
+    return client
+
+
+def test_my_trivias_lists_pending(player_client, game_data):
+    response = player_client.get("/game/my-trivias")
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"id": game_data["assignment"].id, "trivia_name": "Trivia Test", "status": "pending"}
+    ]
+
+
+def test_my_trivias_has_no_repeated_statements_in_strict_mode(player_client, game_data, db_session, monkeypatch):
+    """Con varias trivias asignadas no debe haber un lazy load por asignación (N+1)."""
+    monkeypatch.setattr(settings, "SQL_STRICT_MODE", True)
+    monkeypatch.setattr(settings, "SQL_REPEATED_STATEMENT_THRESHOLD", 1)
+    for i in range(3):
+        trivia = Trivia(name=f"Extra {i}")
+        db_session.add(trivia)
+        db_session.flush()
+        db_session.add(TriviaAssignment(
+            user_id=game_data["player"].id, trivia_id=trivia.id, status=AssignmentStatus.PENDING
+        ))
+    db_session.commit()
+
+    response = player_client.get("/game/my-trivias")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 4
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert int(response.headers["X-DB-Query-Count"]) >= 1
+
+
+def test_strict_mode_raises_on_repeated_statement(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "SQL_STRICT_MODE", True)
+    monkeypatch.setattr(settings, "SQL_REPEATED_STATEMENT_THRESHOLD", 2)
+    token = database._current_query_stats.set(database.QueryStats())
+    try:
+        for user_id in (1, 2):
+            db_session.get(User, user_id)
+        db_session.expunge_all()
+        with pytest.raises(database.RepeatedStatementError):
+            db_session.get(User, 3)
+    finally:
+        database._current_query_stats.reset(token)
+
+
+def test_play_hides_correct_flag_and_supports_etag(player_client, game_data):
+    assignment_id = game_data["assignment"].id
+
+    response = player_client.get(f"/game/{assignment_id}/play")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["assignment_id"] == assignment_id
+    assert data["trivia_name"] == "Trivia Test"
+    assert len(data["questions"]) == 2
+    assert all("is_correct" not in o for q in data["questions"] for o in q["options"])
+
+    # Con el mismo ETag el cliente no vuelve a descargar el contenido
+    etag = response.headers["etag"]
+    cached = player_client.get(f"/game/{assignment_id}/play", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+
+def test_submit_scores_and_completes(player_client, game_data):
+    assignment_id = game_data["assignment"].id
+    correct, wrong = game_data["correct"], game_data["wrong"]
+    easy_id, hard_id = list(correct)
+
+    response = player_client.post(f"/game/{assignment_id}/submit", json={"answers": [
+        {"question_id": easy_id, "option_id": wrong[easy_id]},
+        {"question_id": hard_id, "option_id": correct[hard_id]},
+    ]})
+
+    assert response.status_code == 200
+    assert response.json()["total_score"] == 3
+    assert response.json()["correct_count"] == 1
+
+    # La trivia ya no se puede jugar ni volver a enviar
+    assert player_client.get(f"/game/{assignment_id}/play").status_code == 400
+    again = player_client.post(f"/game/{assignment_id}/submit", json={"answers": []})
+    assert again.status_code == 409
+
+
+def test_async_submit_returns_ticket_and_result(player_client, game_data):
+    """Modo asíncrono: 202 con ticket y luego el GameResult al consultar."""
+    queue = SubmissionQueue(TestingSessionLocal, workers=1)
+    app.dependency_overrides[get_submission_queue] = lambda: queue
+
+    assignment_id = game_data["assignment"].id
+    easy_id, hard_id = list(game_data["correct"])
+    response = player_client.post(f"/game/{assignment_id}/submit?async=true", json={"answers": [
+        {"question_id": easy_id, "option_id": game_data["correct"][easy_id]},
+        {"question_id": hard_id, "option_id": game_data["correct"][hard_id]},
+    ]})
+
+    assert response.status_code == 202
+    ticket = response.json()
+    assert ticket["status"] == "queued"
+
+    # Esperar a que el worker termine
+    queue.shutdown()
+
+    result = player_client.get(ticket["result_url"])
+    assert result.status_code == 200
+    assert result.json()["total_score"] == 4
+    assert result.json()["correct_count"] == 2
+
+
+def test_ranking_reads_materialized_scores(player_client, game_data, db_session):
+    """Completar una trivia actualiza `player_scores` y el ranking lo refleja."""
+    assignment_id = game_data["assignment"].id
+    easy_id, hard_id = list(game_data["correct"])
+    player_client.post(f"/game/{assignment_id}/submit", json={"answers": [
+        {"question_id": easy_id, "option_id": game_data["correct"][easy_id]},
+        {"question_id": hard_id, "option_id": game_data["correct"][hard_id]},
+    ]})
+
+    ranking = player_client.get("/ranking/global").json()
+    assert ranking == [
+        {"position": 1, "player_name": "Player Game", "total_score": 4, "trivias_played": 1}
+    ]
+
+    # El backfill reconstruye exactamente el mismo agregado
+    assert RankingRepository(db_session).rebuild_player_scores() == 1
+    assert player_client.get("/ranking/global").json() == ranking
+
+
+def test_my_rank_uses_in_memory_leaderboard(player_client, game_data, db_session):
+    """La posición del jugador se actualiza al completar una trivia."""
+    rival = User(
+        full_name="Rival Game",
+        email="rival@game.com",
+        hashed_password=get_password_hash("secret123"),
+        role=UserRole.PLAYER
+    )
+    db_session.add(rival)
+    db_session.flush()
+    RankingRepository(db_session).add_score(rival.id, 3)
+    db_session.commit()
+
+    before = player_client.get("/ranking/my-rank").json()
+    assert before["position"] is None
+    assert before["total_players"] == 1
+    assert before["around"] == []
+
+    assignment_id = game_data["assignment"].id
+    easy_id, hard_id = list(game_data["correct"])
+    player_client.post(f"/game/{assignment_id}/submit", json={"answers": [
+        {"question_id": easy_id, "option_id": game_data["correct"][easy_id]},
+        {"question_id": hard_id, "option_id": game_data["correct"][hard_id]},
+    ]})
+
+    after = player_client.get("/ranking/my-rank?radius=1").json()
+    assert after["position"] == 1
+    assert after["total_score"] == 4
+    assert after["total_players"] == 2
+    assert [e["player_name"] for e in after["around"]] == ["Player Game", "Rival Game"]
+
+    page = player_client.get("/ranking/global?limit=1&offset=1").json()
+    assert page == [{"position": 2, "player_name": "Rival Game", "total_score": 3, "trivias_played": 1}]
+
+
+def test_reads_go_to_replica_until_client_writes(player_client, game_data, monkeypatch):
+    """
+    Con una réplica configurada (otro archivo SQLite, vacío), los listados se
+    leen de ella; tras una escritura el cliente vuelve al primario.
+    """
+    from app.core import database
+    from app.core.database import Base, PRIMARY_STICKY_COOKIE, ReplicaRouter
+
+    router = ReplicaRouter(["sqlite:///./replica.db"], sticky_seconds=5)
+    Base.metadata.create_all(bind=router._engines[0])
+    monkeypatch.setattr(database, "replicas", router)
+    try:
+        # La réplica no tiene la asignación del jugador
+        assert player_client.get("/game/my-trivias").json() == []
+
+        assignment_id = game_data["assignment"].id
+        response = player_client.post(f"/game/{assignment_id}/submit", json={"answers": []})
+        assert response.status_code == 200
+        assert PRIMARY_STICKY_COOKIE in response.cookies
+
+        # Con la cookie, las lecturas van al primario (ve la trivia ya completada)
+        assert player_client.get(f"/game/{assignment_id}/play").status_code == 400
+    finally:
+        Base.metadata.drop_all(bind=router._engines[0])
+        router._engines[0].dispose()
+        os.remove("replica.db")
+
+
+def test_play_content_is_cached_from_primary_not_replica(player_client, game_data, monkeypatch):
+    """
+    La caché de contenido de juego es compartida: aunque la asignación se
+    valide en una réplica atrasada, el contenido se lee del primario.
+    """
+    from sqlalchemy.orm import Session
+    from app.core import database
+    from app.core.database import Base, ReplicaRouter
+
+    router = ReplicaRouter(["sqlite:///./replica.db"], sticky_seconds=5)
+    Base.metadata.create_all(bind=router._engines[0])
+    monkeypatch.setattr(database, "replicas", router)
+    try:
+        # Copia de la trivia en la réplica, con el texto de una opción sin actualizar
+        player, trivia, assignment = game_data["player"], game_data["trivia"], game_data["assignment"]
+        with Session(router._engines[0]) as replica:
+            replica.add(User(id=player.id, full_name=player.full_name, email=player.email,
+                             hashed_password=player.hashed_password, role=player.role))
+            replica.add(Trivia(id=trivia.id, name=trivia.name, questions=[
+                Question(id=q.id, text=q.text, difficulty=q.difficulty, options=[
+                    Option(id=o.id, text=f"{o.text} (viejo)", is_correct=o.is_correct) for o in q.options
+                ])
+                for q in trivia.questions
+            ]))
+            replica.add(TriviaAssignment(id=assignment.id, user_id=player.id, trivia_id=trivia.id,
+                                         status=AssignmentStatus.PENDING))
+            replica.commit()
+
+        response = player_client.get(f"/game/{assignment.id}/play")
+
+        assert response.status_code == 200
+        texts = [o["text"] for q in response.json()["questions"] for o in q["options"]]
+        assert texts and not any("viejo" in text for text in texts)
+    finally:
+        Base.metadata.drop_all(bind=router._engines[0])
+        router._engines[0].dispose()
+        os.remove("replica.db")
+
+
+def _add_trivia(db_session, player, questions: int) -> TriviaAssignment:
+    trivia = Trivia(name=f"Trivia {questions} preguntas", questions=[
+        Question(text=f"¿Pregunta {questions}-{i}?", difficulty=DifficultyLevel.MEDIUM, options=[
+            Option(text="Sí", is_correct=True),
+            Option(text="No", is_correct=False),
+        ])
+        for i in range(questions)
+    ])
+    db_session.add(trivia)
+    db_session.flush()
+    assignment = TriviaAssignment(user_id=player.id, trivia_id=trivia.id, status=AssignmentStatus.PENDING)
+    db_session.add(assignment)
+    db_session.commit()
+    return assignment
+
+
+def _answers(assignment: TriviaAssignment) -> dict:
+    return {"answers": [
+        {"question_id": q.id, "option_id": q.options[0].id} for q in assignment.trivia.questions
+    ]}
+
+
+def test_submit_query_count_does_not_grow_with_answers(player_client, game_data, db_session, query_budget):
+    player = game_data["player"]
+    small, large = _add_trivia(db_session, player, 2), _add_trivia(db_session, player, 12)
+    player_client.get("/game/my-trivias")  # Carga el principal en caché
+
+    with query_budget.max_queries(8):
+        for assignment in (small, large):
+            response = player_client.post(f"/game/{assignment.id}/submit", json=_answers(assignment))
+            assert response.status_code == 200
+
+    small_count, large_count = (r.count for r in query_budget.requests[-2:])
+    assert small_count == large_count
+
+
+@pytest.mark.query_budget(4)
+def test_my_trivias_and_play_have_constant_query_budget(player_client, game_data, db_session, query_budget):
+    player_client.get("/game/my-trivias")
+    baseline = query_budget.last.count
+    for questions in (3, 5, 8):
+        _add_trivia(db_session, game_data["player"], questions)
+
+    assert len(player_client.get("/game/my-trivias").json()) == 4
+    assert query_budget.last.count <= baseline
+
+    play_counts = []
+    for assignment in db_session.query(TriviaAssignment).filter_by(user_id=game_data["player"].id):
+        assert player_client.get(f"/game/{assignment.id}/play").status_code == 200
+        play_counts.append(query_budget.last.count)
+    assert len(set(play_counts)) == 1
+
+
+def test_concurrent_first_leaderboard_load_does_not_block_the_loop(player_client, game_data):
+    """
+    Dos peticiones de ranking a la vez con el leaderboard sin cargar: la
+    segunda espera la carga de la primera sin bloquear el event loop.
+    """
+    import asyncio
+    import httpx
+
+    async def both():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test",
+                                     cookies=dict(player_client.cookies)) as http:
+            return await asyncio.wait_for(asyncio.gather(
+                http.get("/ranking/global"), http.get("/ranking/my-rank")
+            ), timeout=10)
+
+    leaderboard.invalidate()
+    first, second = player_client.portal.call(both)
+
+    assert first.status_code == second.status_code == 200
+    assert leaderboard.ready
@@ -1,7 +1,10 @@
+import time
+
 import pytest
 from unittest.mock import Mock, MagicMock
 from fastapi import HTTPException
 
+from app.modules.game.cache import AnswerKeyCache
 from app.modules.game.service import GameService
 from app.modules.game.schemas import GameSubmission, AnswerSubmit
 from app.modules.trivias.models import TriviaAssignment, Trivia, AssignmentStatus
@@ -41,9 +44,9 @@ class TestCalculoPuntaje:
         
         # Configurar comportamiento del repositorio
         mock_repo.get_assignment.return_value = mock_assignment
-        mock_repo.get_question.return_value = mock_question
-        mock_repo.get_option.return_value = mock_option
-        mock_repo.save_answer.return_value = None
+        mock_repo.get_questions_by_ids.return_value = [mock_question]
+        mock_repo.get_options_by_ids.return_value = [mock_option]
+        mock_repo.save_answers.return_value = None
         mock_repo.complete_assignment.return_value = None
         mock_repo.commit.return_value = None
         
@@ -82,9 +85,9 @@ class TestCalculoPuntaje:
         mock_option.is_correct = True
         
         mock_repo.get_assignment.return_value = mock_assignment
-        mock_repo.get_question.return_value = mock_question
-        mock_repo.get_option.return_value = mock_option
-        mock_repo.save_answer.return_value = None
+        mock_repo.get_questions_by_ids.return_value = [mock_question]
+        mock_repo.get_options_by_ids.return_value = [mock_option]
+        mock_repo.save_answers.return_value = None
         mock_repo.complete_assignment.return_value = None
         mock_repo.commit.return_value = None
         
@@ -116,9 +119,9 @@ class TestCalculoPuntaje:
         mock_option.is_correct = True
         
         mock_repo.get_assignment.return_value = mock_assignment
-        mock_repo.get_question.return_value = mock_question
-        mock_repo.get_option.return_value = mock_option
-        mock_repo.save_answer.return_value = None
+        mock_repo.get_questions_by_ids.return_value = [mock_question]
+        mock_repo.get_options_by_ids.return_value = [mock_option]
+        mock_repo.save_answers.return_value = None
         mock_repo.complete_assignment.return_value = None
         mock_repo.commit.return_value = None
         
@@ -150,9 +153,9 @@ class TestCalculoPuntaje:
         mock_option.is_correct = False  # Respuesta incorrecta
         
         mock_repo.get_assignment.return_value = mock_assignment
-        mock_repo.get_question.return_value = mock_question
-        mock_repo.get_option.return_value = mock_option
-        mock_repo.save_answer.return_value = None
+        mock_repo.get_questions_by_ids.return_value = [mock_question]
+        mock_repo.get_options_by_ids.return_value = [mock_option]
+        mock_repo.save_answers.return_value = None
         mock_repo.complete_assignment.return_value = None
         mock_repo.commit.return_value = None
         
@@ -204,11 +207,11 @@ class TestCalculoPuntaje:
         o3.question_id = 12
         o3.is_correct = True
         
-        # Configurar side_effect para devolver diferentes valores según el argumento
+        # El repositorio devuelve todas las preguntas/opciones en un solo lote
         mock_repo.get_assignment.return_value = mock_assignment
-        mock_repo.get_question.side_effect = [q1, q2, q3]
-        mock_repo.get_option.side_effect = [o1, o2, o3]
-        mock_repo.save_answer.return_value = None
+        mock_repo.get_questions_by_ids.return_value = [q1, q2, q3]
+        mock_repo.get_options_by_ids.return_value = [o1, o2, o3]
+        mock_repo.save_answers.return_value = None
         mock_repo.complete_assignment.return_value = None
         mock_repo.commit.return_value = None
         
@@ -224,6 +227,13 @@ class TestCalculoPuntaje:
         assert result["total_score"] == 4
         assert result["correct_count"] == 2
 
+        # Una sola carga en lote y un solo INSERT para las 3 respuestas
+        mock_repo.get_options_by_ids.assert_called_once()
+        mock_repo.get_questions_by_ids.assert_called_once()
+        mock_repo.save_answers.assert_called_once()
+        saved_rows = mock_repo.save_answers.call_args.args[0]
+        assert [r["points_awarded"] for r in saved_rows] == [1, 0, 3]
+
 
 class TestValidacionesSeguridad:
     """
@@ -252,8 +262,8 @@ class TestValidacionesSeguridad:
         mock_option.question_id = 99  # Pertenece a otra pregunta
         
         mock_repo.get_assignment.return_value = mock_assignment
-        mock_repo.get_question.return_value = mock_question
-        mock_repo.get_option.return_value = mock_option
+        mock_repo.get_questions_by_ids.return_value = [mock_question]
+        mock_repo.get_options_by_ids.return_value = [mock_option]
         
         submission = GameSubmission(answers=[
             AnswerSubmit(question_id=10, option_id=20)
@@ -297,7 +307,8 @@ class TestValidacionesSeguridad:
         mock_assignment.status = AssignmentStatus.PENDING
         
         mock_repo.get_assignment.return_value = mock_assignment
-        mock_repo.get_option.return_value = None  # Opción no existe
+        mock_repo.get_options_by_ids.return_value = []  # Opción no existe
+        mock_repo.get_questions_by_ids.return_value = []
         
         submission = GameSubmission(answers=[
             AnswerSubmit(question_id=10, option_id=999)
@@ -309,6 +320,30 @@ class TestValidacionesSeguridad:
         assert exc_info.value.status_code == 404
         assert "opción" in exc_info.value.detail.lower()
 
+    def test_fallo_del_leaderboard_no_anula_la_partida_guardada(self):
+        """Si el leaderboard falla tras el commit, la partida se reporta como completada."""
+        mock_repo = Mock()
+        service = GameService(mock_repo)
+
+        mock_assignment = Mock(spec=TriviaAssignment)
+        mock_assignment.id = 1
+        mock_assignment.status = AssignmentStatus.PENDING
+        mock_question = Mock(spec=Question, id=10, difficulty=DifficultyLevel.EASY)
+        mock_option = Mock(spec=Option, id=20, question_id=10, is_correct=True)
+
+        mock_repo.get_assignment.return_value = mock_assignment
+        mock_repo.get_questions_by_ids.return_value = [mock_question]
+        mock_repo.get_options_by_ids.return_value = [mock_option]
+        mock_repo.sync_leaderboard.side_effect = RuntimeError("DB caída")
+
+        result = service.submit_answers(1, 100, GameSubmission(answers=[
+            AnswerSubmit(question_id=10, option_id=20)
+        ]))
+
+        assert result["total_score"] == 1
+        mock_repo.commit.assert_called_once()
+        mock_repo.rollback.assert_not_called()
+
 
 class TestObtenerTriviasPendientes:
     """
@@ -359,3 +394,189 @@ class TestObtenerTriviasPendientes:
         result = service.get_my_trivias(user_id=100)
         
         assert result == []
+
+
+class TestHojaDeRespuestasCacheada:
+    """
+    Test 4: Puntaje usando la hoja de respuestas compilada por trivia.
+
+    Con la hoja en caché, un envío se puntúa sin leer `questions`/`options`.
+    """
+
+    def _service_con_cache(self):
+        mock_repo = Mock()
+        cache = AnswerKeyCache(maxsize=10)
+        service = GameService(mock_repo, answer_keys=cache)
+
+        mock_assignment = Mock(spec=TriviaAssignment)
+        mock_assignment.id = 1
+        mock_assignment.trivia_id = 7
+        mock_assignment.status = AssignmentStatus.PENDING
+
+        mock_repo.get_assignment.return_value = mock_assignment
+        # (question_id, difficulty, option_id, is_correct)
+        mock_repo.get_answer_key_rows.return_value = [
+            (10, DifficultyLevel.EASY, 20, True),
+            (10, DifficultyLevel.EASY, 21, False),
+            (11, DifficultyLevel.HARD, 30, False),
+            (11, DifficultyLevel.HARD, 31, True),
+        ]
+        return service, mock_repo, cache
+
+    def test_puntua_sin_consultar_opciones_ni_preguntas(self):
+        service, mock_repo, cache = self._service_con_cache()
+        submission = GameSubmission(answers=[
+            AnswerSubmit(question_id=10, option_id=20),
+            AnswerSubmit(question_id=11, option_id=31),
+        ])
+
+        result = service.submit_answers(1, 100, submission)
+        service.submit_answers(1, 100, submission)
+
+        assert result["total_score"] == 4
+        assert result["correct_count"] == 2
+        # La hoja se compila una sola vez y no se tocan opciones/preguntas
+        mock_repo.get_answer_key_rows.assert_called_once_with(7)
+        mock_repo.get_options_by_ids.assert_not_called()
+        mock_repo.get_questions_by_ids.assert_not_called()
+        assert cache.stats()["hits"] == 1
+
+    def test_invalida_al_cambiar_una_pregunta(self):
+        service, mock_repo, cache = self._service_con_cache()
+        submission = GameSubmission(answers=[AnswerSubmit(question_id=10, option_id=20)])
+
+        service.submit_answers(1, 100, submission)
+        cache.invalidate_question(10)
+        service.submit_answers(1, 100, submission)
+
+        assert mock_repo.get_answer_key_rows.call_count == 2
+
+    def test_opcion_ajena_usa_validacion_completa(self):
+        """Si la hoja no resuelve la respuesta, se valida contra la DB (error exacto)."""
+        service, mock_repo, _ = self._service_con_cache()
+
+        mock_question = Mock(spec=Question)
+        mock_question.id = 10
+        mock_option = Mock(spec=Option)
+        mock_option.id = 31
+        mock_option.question_id = 11
+        mock_repo.get_questions_by_ids.return_value = [mock_question]
+        mock_repo.get_options_by_ids.return_value = [mock_option]
+
+        submission = GameSubmission(answers=[AnswerSubmit(question_id=10, option_id=31)])
+
+        with pytest.raises(HTTPException) as exc_info:
+            service.submit_answers(1, 100, submission)
+
+        assert exc_info.value.status_code == 422
+
+
+class TestLeaderboardEnMemoria:
+    """
+    Test 5: El leaderboard se reconstruye en O(n) desde filas ordenadas y
+    no pierde las partidas completadas mientras se recarga.
+    """
+
+    @staticmethod
+    def _source(db_rows):
+        """Fuente sobre un dict user_id -> puntaje (hace de base de datos)."""
+        from app.modules.ranking.leaderboard import LeaderboardEntry
+
+        def source(user_ids=None):
+            ids = db_rows if user_ids is None else [u for u in user_ids if u in db_rows]
+            entries = [LeaderboardEntry(u, f"P{u}", db_rows[u], 1) for u in ids]
+            return sorted(entries, key=lambda e: e.key)
+        return source
+
+    def test_from_sorted_equivale_a_insertar(self):
+        import random
+        from app.modules.ranking.leaderboard import IndexableSkipList
+
+        keys = sorted({(-random.randint(0, 50), random.randint(1, 10_000)) for _ in range(500)})
+        built, inserted = IndexableSkipList.from_sorted(keys), IndexableSkipList()
+        for key in random.sample(keys, len(keys)):
+            inserted.insert(key)
+
+        assert len(built) == len(inserted) == len(keys)
+        assert [built.index(k) for k in keys] == list(range(len(keys)))
+        for start in (0, 1, 137, len(keys) - 1):
+            assert list(built.iter_from(start)) == list(inserted.iter_from(start)) == keys[start:]
+        built.insert((-100, 1))
+        built.remove(keys[10])
+        assert built.index((-100, 1)) == 0 and len(built) == len(keys)
+
+    def test_recarga_no_pierde_partidas_completadas_durante_la_carga(self):
+        from app.modules.ranking.leaderboard import Leaderboard
+
+        db_rows = {1: 10, 2: 5}
+        board = Leaderboard()
+        board.load(self._source(db_rows)(None))
+        full_load = self._source(db_rows)
+
+        def loading_source(user_ids=None):
+            if user_ids is None:
+                snapshot = full_load(None)
+                # Partida confirmada y aplicada en memoria mientras se lee el snapshot
+                db_rows[2] += 20
+                board.add_score(2, 20)
+                return snapshot
+            return full_load(user_ids)
+
+        board.reload(loading_source)
+
+        assert board.get(2).total_score == 25
+        assert board.rank_of(2) == 1 and board.rank_of(1) == 2
+
+    def test_recarga_periodica_en_segundo_plano(self):
+        from app.core.workers import WorkerPool
+        from app.modules.ranking.leaderboard import Leaderboard
+
+        db_rows = {1: 10}
+        pool = WorkerPool("leaderboard-test", max_workers=1)
+        board = Leaderboard(refresh_seconds=0.01, background_source=self._source(db_rows), refresher=pool)
+        request_source = Mock(side_effect=self._source(db_rows))
+        try:
+            board.ensure_fresh(request_source)  # Primera carga: en la petición
+            assert request_source.call_count == 1
+
+            db_rows[2] = 50
+            time.sleep(0.02)
+            board.ensure_fresh(request_source)  # Vencido: se recarga en segundo plano
+            deadline = time.monotonic() + 5
+            while board.get(2) is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            pool.shutdown()
+
+        assert request_source.call_count == 1
+        assert board.rank_of(2) == 1
+
+    def test_primera_carga_concurrente_no_bloquea(self):
+        """
+        Mientras una petición hace la primera carga, otra no espera el lock
+        (en el event loop eso lo dejaría colgado): recibe la carga en curso.
+        """
+        import threading
+        from app.modules.ranking.leaderboard import Leaderboard
+
+        board = Leaderboard()
+        started, release = threading.Event(), threading.Event()
+        full_load = self._source({1: 10})
+
+        def slow_source(user_ids=None):
+            started.set()
+            release.wait(5)
+            return full_load(user_ids)
+
+        first = threading.Thread(target=board.ensure_fresh, args=(slow_source,))
+        first.start()
+        assert started.wait(5)
+
+        pending = board.ensure_fresh(Mock(side_effect=AssertionError("no debe cargar dos veces")))
+        assert pending is not None and not pending.done()
+        assert not board.ready
+
+        release.set()
+        pending.result(timeout=5)
+        first.join(5)
+        assert board.ready and board.rank_of(1) == 1
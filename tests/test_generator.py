@@ -0,0 +1,89 @@
+"""
+Tests del generador de datos sintéticos.
+Archivo: tests/test_generator.py
+"""
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.security import create_access_token, verify_password
+from app.modules.questions.models import Question
+from app.modules.ranking.models import PlayerScore
+from app.modules.testing.generator import (
+    SYNTHETIC_EMAIL_DOMAIN, SYNTHETIC_PASSWORD, DatasetSpec, generate_dataset, generation_pool
+)
+from app.modules.trivias.models import AssignmentStatus, TriviaAssignment, UserAnswer
+from app.modules.trivias.repository import TriviaRepository
+from app.modules.users.models import User, UserRole
+from tests.conftest import engine
+
+SPEC = DatasetSpec(users=60, questions=30, trivias=6, questions_per_trivia=5, trivias_per_user=2, batch_size=25)
+
+
+def _snapshot(target_engine):
+    with target_engine.connect() as conn:
+        return (
+            conn.execute(select(User.id, User.full_name, User.pending_assignments).order_by(User.id)).all(),
+            conn.execute(select(Question.id, Question.text, Question.difficulty).order_by(Question.id)).all(),
+            # Sin created_at/updated_at: dependen del reloj, no de la semilla
+            conn.execute(select(
+                UserAnswer.id, UserAnswer.assignment_id, UserAnswer.question_id,
+                UserAnswer.selected_option_id, UserAnswer.is_correct, UserAnswer.points_awarded
+            ).order_by(UserAnswer.id)).all(),
+        )
+
+
+def test_generator_is_reproducible():
+    snapshots = []
+    for _ in range(2):
+        memory = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(memory)
+        generate_dataset(memory, SPEC)
+        snapshots.append(_snapshot(memory))
+    assert snapshots[0] == snapshots[1]
+
+
+def test_generator_volumes_and_derived_counters(db_session):
+    report = generate_dataset(engine, SPEC)
+
+    assert (report.users, report.questions, report.options, report.trivias) == (60, 30, 120, 6)
+    assert report.assignments == db_session.query(TriviaAssignment).count() == 120
+    completed = db_session.query(TriviaAssignment).filter_by(status=AssignmentStatus.COMPLETED).count()
+    assert report.answers == db_session.query(UserAnswer).count() == completed * 5
+
+    # Los contadores escritos por el generador coinciden con un recálculo completo
+    before = db_session.query(User.id, User.pending_assignments).order_by(User.id).all()
+    TriviaRepository(db_session).rebuild_usage_counters()
+    db_session.commit()
+    assert db_session.query(User.id, User.pending_assignments).order_by(User.id).all() == before
+    played = db_session.query(PlayerScore).filter(PlayerScore.trivias_played > 0).count()
+    assert played == db_session.query(TriviaAssignment.user_id).filter_by(
+        status=AssignmentStatus.COMPLETED
+    ).distinct().count()
+
+    # Los usuarios generados pueden iniciar sesión con la contraseña conocida
+    user = db_session.query(User).filter_by(email=f"user{report.first_user_id}@{SYNTHETIC_EMAIL_DOMAIN}").one()
+    assert verify_password(SYNTHETIC_PASSWORD, user.hashed_password)
+
+
+def test_generate_route_requires_admin_and_runs_in_background(client, db_session):
+    payload = {"users": 10, "questions": 10, "trivias": 2, "questions_per_trivia": 3, "trivias_per_user": 1}
+    assert client.post("/testing/generate", json=payload).status_code == 401
+
+    db_session.add(User(full_name="Admin", email="admin@generator.com", hashed_password="x", role=UserRole.ADMIN))
+    db_session.commit()
+    client.cookies.set("access_token", create_access_token({"sub": "admin@generator.com", "role": "admin"}))
+
+    assert client.post("/testing/generate", json={**payload, "trivias_per_user": 3}).status_code == 422
+    response = client.post("/testing/generate", json=payload)
+    assert response.status_code == 202
+    generation_pool.shutdown(wait=True)
+
+    assert db_session.query(User).filter(User.email.like(f"%@{SYNTHETIC_EMAIL_DOMAIN}")).count() == 10
+
+
+@pytest.mark.parametrize("field, value", [("options_per_question", 1), ("completion_rate", 1.5)])
+def test_dataset_spec_rejects_inconsistent_values(field, value):
+    with pytest.raises(ValueError):
+        DatasetSpec(**{field: value})
@@ -29,3 +29,165 @@ def test_health_check(client):
     assert "TalaTrivia API is running" in json_data["message"]
     
     print("Test pasó correctamente!")
+
+
+def test_db_pool_status_counts_checkout_timeouts(client, db_session):
+    """
+    El endpoint de monitoreo del pool (solo admin) reporta, para el pool
+    síncrono y el asíncrono, los checkouts que fallaron por timeout.
+    """
+    import asyncio
+    import pytest
+    from sqlalchemy import create_engine, exc
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from app.core.database import (
+        InstrumentedAsyncQueuePool, InstrumentedQueuePool, async_pool_stats, instrument_pool, pool_stats
+    )
+    from app.core.security import create_access_token
+    from app.modules.users.models import User, UserRole
+
+    db_session.add(User(full_name="Admin", email="admin@pool.com", hashed_password="x", role=UserRole.ADMIN))
+    db_session.commit()
+    client.cookies.set("access_token", create_access_token({"sub": "admin@pool.com", "role": "admin"}))
+
+    # Pool de 1 conexión sin overflow: el segundo checkout agota el timeout
+    small = create_engine("sqlite:///./test.db", poolclass=InstrumentedQueuePool,
+                          pool_size=1, max_overflow=0, pool_timeout=0.05)
+    failures = pool_stats.checkout_failures
+    with small.connect():
+        with pytest.raises(exc.TimeoutError):
+            small.connect()
+    small.dispose()
+
+    async def exhaust_async_pool():
+        small_async = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=InstrumentedAsyncQueuePool,
+                                          pool_size=1, max_overflow=0, pool_timeout=0.05)
+        instrument_pool(small_async.sync_engine, async_pool_stats)
+        async with small_async.connect():
+            with pytest.raises(exc.TimeoutError):
+                await small_async.connect()
+        await small_async.dispose()
+
+    async_failures, async_created = async_pool_stats.checkout_failures, async_pool_stats.connections_created
+    asyncio.run(exhaust_async_pool())
+
+    data = client.get("/monitoring/db-pool").json()
+    assert data["sync"]["checkout_failures"] == failures + 1
+    assert data["async"]["checkout_failures"] == async_failures + 1
+    assert data["async"]["connections_created"] == async_created + 1
+    for pool in ("sync", "async"):
+        assert {"checked_out", "overflow", "wait_histogram"} <= data[pool].keys()
+
+
+def test_cursor_pagination_walks_all_users(client, db_session):
+    """
+    La paginación por cursor recorre todos los elementos sin repetir,
+    y el total solo se calcula si se pide.
+    """
+    from app.core.security import create_access_token
+    from app.modules.users.models import User, UserRole
+
+    db_session.add(User(full_name="Admin", email="admin@cursor.com", hashed_password="x", role=UserRole.ADMIN))
+    db_session.add_all([
+        User(full_name=f"Player {i}", email=f"p{i}@cursor.com", hashed_password="x") for i in range(5)
+    ])
+    db_session.commit()
+    client.cookies.set("access_token", create_access_token({"sub": "admin@cursor.com", "role": "admin"}))
+
+    first = client.get("/users/cursor?per_page=4&include_total=true").json()
+    assert first["total"] == 6
+    assert len(first["items"]) == 4
+
+    second = client.get(f"/users/cursor?per_page=4&cursor={first['next_cursor']}").json()
+    assert second["total"] is None
+    assert second["next_cursor"] is None
+
+    emails = [u["email"] for u in first["items"] + second["items"]]
+    assert len(emails) == len(set(emails)) == 6
+
+    assert client.get("/users/cursor?cursor=no-es-un-cursor").status_code == 400
+    # JSON válido pero con valores que no son ids
+    from app.core.pagination import encode_cursor
+    for values in (["x"], [True], [1.5], [None]):
+        assert client.get(f"/users/cursor?cursor={encode_cursor(values)}").status_code == 400
+
+
+def test_hot_queries_use_indexes(db_session):
+    """Ninguna consulta caliente recorre completa su tabla (sequential scan)."""
+    from app.core.query_plans import find_sequential_scans
+
+    assert find_sequential_scans(db_session) == []
+
+
+def test_migrations_apply_once(tmp_path):
+    """Las migraciones se aplican una sola vez y registran su versión."""
+    from sqlalchemy import create_engine
+    from app.core.migrations import latest_version, pending_migrations, run_migrations
+    from app.modules.users.models import User
+    from sqlalchemy.orm import Session
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    try:
+        assert run_migrations(engine) == latest_version()
+        assert pending_migrations(engine) == []
+        assert run_migrations(engine) == 0
+
+        with Session(engine) as db:
+            assert db.query(User).count() == 1  # Superusuario del bootstrap
+    finally:
+        engine.dispose()
+
+
+def test_unique_assignments_migration_resolves_answered_duplicates(tmp_path):
+    """
+    Con asignaciones duplicadas ya respondidas, la migración conserva la
+    completada de mayor puntaje (con sus respuestas) en lugar de fallar.
+    """
+    from sqlalchemy import create_engine, delete
+    from sqlalchemy.orm import Session
+    from app.core.migrations import run_migrations, schema_migrations
+    from app.modules.questions.models import DifficultyLevel, Option, Question
+    from app.modules.ranking.models import PlayerScore
+    from app.modules.trivias.models import AssignmentStatus, Trivia, TriviaAssignment, UserAnswer
+    from app.modules.users.models import User
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    try:
+        run_migrations(engine)
+        # Base anterior a la versión 5: sin índice único y con duplicados respondidos
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX uq_trivia_assignments_user_trivia")
+            conn.execute(delete(schema_migrations).where(schema_migrations.c.version == 5))
+        with Session(engine) as db:
+            user = db.query(User).first()
+            option = Option(text="Sí", is_correct=True)
+            trivia = Trivia(name="Duplicada", questions=[
+                Question(text="¿Duplicada?", difficulty=DifficultyLevel.EASY, options=[option])
+            ])
+            db.add(trivia)
+            db.flush()
+            rows = [
+                TriviaAssignment(user_id=user.id, trivia_id=trivia.id, status=status, total_score=score)
+                for status, score in ((AssignmentStatus.COMPLETED, 1), (AssignmentStatus.COMPLETED, 3),
+                                      (AssignmentStatus.PENDING, 0))
+            ]
+            db.add_all(rows)
+            db.flush()
+            db.add_all([
+                UserAnswer(assignment_id=a.id, question_id=option.question_id, selected_option_id=option.id,
+                           is_correct=True, points_awarded=a.total_score)
+                for a in rows[:2]
+            ])
+            db.merge(PlayerScore(user_id=user.id, total_score=4, trivias_played=2))
+            db.commit()
+            kept_id, user_id = rows[1].id, user.id
+
+        assert run_migrations(engine) == 1
+
+        with Session(engine) as db:
+            assert [a.id for a in db.query(TriviaAssignment).filter_by(user_id=user_id)] == [kept_id]
+            assert [a.assignment_id for a in db.query(UserAnswer)] == [kept_id]
+            score = db.get(PlayerScore, user_id)
+            assert (score.total_score, score.trivias_played) == (3, 1)
+    finally:
+        engine.dispose()
@@ -0,0 +1,254 @@
+"""
+Tests del banco de preguntas vía HTTP.
+Archivo: tests/test_questions_api.py
+"""
+import pytest
+
+from app.core.security import create_access_token
+from app.modules.questions.models import Question, normalize_question_text
+from app.modules.users.models import User, UserRole
+
+
+@pytest.fixture
+def admin_client(client, db_session):
+    db_session.add(User(full_name="Admin", email="admin@questions.com", hashed_password="x", role=UserRole.ADMIN))
+    db_session.commit()
+    client.cookies.set("access_token", create_access_token({"sub": "admin@questions.com", "role": "admin"}))
+    return client
+
+
+def question_payload(text: str) -> dict:
+    return {
+        "text": text,
+        "difficulty": "easy",
+        "options": [{"text": "Sí", "is_correct": True}, {"text": "No", "is_correct": False}],
+    }
+
+
+def test_normalize_question_text():
+    assert normalize_question_text("  ¿Qué   es\tPYTHON? ") == "¿que es python?"
+    assert normalize_question_text("Ñandú") == "nandu"
+
+
+def test_create_question_rejects_normalized_duplicates(admin_client, db_session):
+    created = admin_client.post("/questions/", json=question_payload("¿Qué es Python?"))
+    assert created.status_code == 201
+    assert created.json()["text"] == "¿Qué es Python?"
+
+    duplicate = admin_client.post("/questions/", json=question_payload("  ¿QUE es   python? "))
+    assert duplicate.status_code == 409
+
+    question = db_session.get(Question, created.json()["id"])
+    assert question.normalized_text == "¿que es python?"
+
+
+def test_deleted_question_text_can_be_reused(admin_client):
+    created = admin_client.post("/questions/", json=question_payload("¿Capital de Perú?")).json()
+    assert admin_client.delete(f"/questions/{created['id']}").status_code == 200
+
+    again = admin_client.post("/questions/", json=question_payload("¿Capital de Peru?"))
+    assert again.status_code == 201
+
+
+def test_update_question_rejects_duplicate_text(admin_client):
+    first = admin_client.post("/questions/", json=question_payload("¿Uno?")).json()
+    second = admin_client.post("/questions/", json=question_payload("¿Dos?")).json()
+
+    response = admin_client.put(f"/questions/{second['id']}", json={"text": "¿UNO?"})
+    assert response.status_code == 409
+    assert admin_client.put(f"/questions/{first['id']}", json={"text": "¿Úno?"}).status_code == 200
+
+
+def test_import_jsonl_reports_errors_per_row(admin_client, db_session, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "QUESTION_IMPORT_BATCH_SIZE", 2)
+    admin_client.post("/questions/", json=question_payload("¿Ya existe?"))
+
+    lines = [
+        '{"text": "¿Uno?", "difficulty": "easy", "options": [{"text": "a", "is_correct": true}, {"text": "b"}]}',
+        '{"text": "¿Dos?", "difficulty": "hard", "options": [{"text": "a", "is_correct": true}, {"text": "b", "is_correct": true}]}',
+        'no es json',
+        '{"text": "¿ya EXISTE?", "difficulty": "easy", "options": [{"text": "a", "is_correct": true}, {"text": "b"}]}',
+        '{"text": "¿Tres?", "difficulty": "medium", "options": [{"text": "a"}, {"text": "b", "is_correct": true}]}',
+        '{"text": "¿UNO?", "difficulty": "easy", "options": [{"text": "a", "is_correct": true}, {"text": "b"}]}',
+        '{"text": "¿Cuatro?", "difficulty": "imposible", "options": [{"text": "a", "is_correct": true}, {"text": "b"}]}',
+    ]
+    response = admin_client.post(
+        "/questions/import",
+        files={"file": ("banco.jsonl", "\n".join(lines).encode(), "application/octet-stream")}
+    )
+
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["total_rows"], report["imported"], report["failed"]) == (7, 2, 5)
+    assert [e["row"] for e in report["errors"]] == [2, 3, 4, 6, 7]
+    assert "UNA respuesta correcta" in report["errors"][0]["error"]
+    assert "ya existe" in report["errors"][2]["error"]
+    assert db_session.query(Question).filter(Question.text.in_(["¿Uno?", "¿Tres?"])).count() == 2
+
+
+def test_import_csv(admin_client, db_session):
+    content = (
+        "text,difficulty,correct,option_1,option_2,option_3\n"
+        "¿Capital de Chile?,easy,1,Santiago,Lima,Quito\n"
+        "¿Capital de Perú?,medium,x,Santiago,Lima,\n"
+    )
+    response = admin_client.post("/questions/import", files={"file": ("banco.csv", content.encode(), "text/csv")})
+
+    report = response.json()
+    assert (report["imported"], report["failed"]) == (1, 1)
+    assert report["errors"][0]["row"] == 3
+    question = db_session.query(Question).filter_by(text="¿Capital de Chile?").one()
+    assert [(o.text, o.is_correct) for o in question.options] == [("Santiago", True), ("Lima", False), ("Quito", False)]
+
+
+def test_import_reports_invalid_utf8_after_committed_batches(admin_client, db_session, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "QUESTION_IMPORT_BATCH_SIZE", 1)
+    valid = "".join(
+        f'{{"text": "¿Válida {i}?", "difficulty": "easy", "options": [{{"text": "a", "is_correct": true}}, {{"text": "b"}}]}}\n'
+        for i in range(200)
+    )
+    # Más de un bloque de lectura válido antes del byte inválido: hay lotes ya confirmados
+    content = valid.encode() + b'{"text": "\xff"}\n'
+
+    response = admin_client.post("/questions/import", files={"file": ("banco.jsonl", content, "application/jsonl")})
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] == report["total_rows"] > 0
+    assert report["failed"] == 1
+    assert "UTF-8" in report["errors"][0]["error"]
+    assert report["errors"][0]["row"] == report["total_rows"] + 1
+    assert db_session.query(Question).filter(Question.text.like("¿Válida%")).count() == report["imported"]
+
+
+def test_import_rejects_unknown_format(admin_client):
+    response = admin_client.post("/questions/import", files={"file": ("banco.txt", b"hola", "text/plain")})
+    assert response.status_code == 400
+
+
+def test_update_options_keeps_ids_of_matched_options(admin_client):
+    created = admin_client.post("/questions/", json={
+        "text": "¿Color del cielo?",
+        "difficulty": "easy",
+        "options": [{"text": "Azul", "is_correct": True}, {"text": "Verde"}, {"text": "Rojo"}],
+    }).json()
+    ids = {o["text"]: o["id"] for o in created["options"]}
+
+    response = admin_client.put(f"/questions/{created['id']}", json={"options": [
+        {"id": ids["Azul"], "text": "Celeste", "is_correct": True},  # por id (cambia el texto)
+        {"text": " verde "},                                       # por texto (se normaliza el texto)
+        {"text": "Gris"},                                          # nueva
+    ]})
+
+    assert response.status_code == 200
+    options = {o["text"]: o["id"] for o in response.json()["options"]}
+    assert options["Celeste"] == ids["Azul"]
+    assert options["verde"] == ids["Verde"]
+    assert ids["Rojo"] not in options.values()
+    assert "Gris" in options
+
+
+def test_update_options_rejects_removing_answered_option(admin_client, db_session):
+    from app.modules.trivias.models import Trivia, TriviaAssignment, UserAnswer
+
+    created = admin_client.post("/questions/", json=question_payload("¿Respondida?")).json()
+    answered = next(o for o in created["options"] if not o["is_correct"])
+    player = User(full_name="P", email="p@questions.com", hashed_password="x", role=UserRole.PLAYER)
+    trivia = Trivia(name="T")
+    db_session.add_all([player, trivia])
+    db_session.flush()
+    assignment = TriviaAssignment(user_id=player.id, trivia_id=trivia.id)
+    db_session.add(assignment)
+    db_session.flush()
+    db_session.add(UserAnswer(
+        assignment_id=assignment.id, question_id=created["id"], selected_option_id=answered["id"], is_correct=False
+    ))
+    db_session.commit()
+
+    correct = next(o for o in created["options"] if o["is_correct"])
+    response = admin_client.put(f"/questions/{created['id']}", json={"options": [
+        {"id": correct["id"], "text": correct["text"], "is_correct": True},
+        {"text": "Otra"},
+    ]})
+    assert response.status_code == 409
+
+    foreign = admin_client.put(f"/questions/{created['id']}", json={"options": [
+        {"id": 999999, "text": "x", "is_correct": True}, {"text": "y"},
+    ]})
+    assert foreign.status_code == 422
+
+
+def test_parse_query_marks_prefix_terms():
+    from app.modules.questions.search import SearchTerm, parse_query, to_tsquery
+
+    terms = parse_query("  Contrato  INDEFINI* ")
+    assert terms == [SearchTerm("contrato", False), SearchTerm("indefini", True)]
+    assert to_tsquery(terms) == "contrato & indefini:*"
+
+
+@pytest.fixture
+def searchable(admin_client):
+    for text, difficulty in [
+        ("¿Cuántos días de vacaciones corresponden al año?", "easy"),
+        ("¿Qué es un contrato indefinido?", "medium"),
+        ("¿Cuándo un contrato a plazo fijo pasa a ser indefinido? Contrato renovado", "hard"),
+        ("¿Qué cubre el seguro de cesantía?", "hard"),
+    ]:
+        payload = question_payload(text)
+        payload["difficulty"] = difficulty
+        admin_client.post("/questions/", json=payload)
+    return admin_client
+
+
+def test_search_questions_by_term_and_prefix(searchable):
+    response = searchable.get("/questions/search", params={"q": "CONTRATO"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 2
+    # La pregunta que repite el término queda primero
+    assert body["items"][0]["text"].startswith("¿Cuándo un contrato")
+    assert body["items"][0]["score"] > body["items"][1]["score"]
+    assert len(body["items"][0]["options"]) == 2
+
+    assert searchable.get("/questions/search", params={"q": "cesant*"}).json()["total"] == 1
+    assert searchable.get("/questions/search", params={"q": "cesant"}).json()["total"] == 0
+    # Todos los términos son obligatorios y se ignoran las tildes
+    assert searchable.get("/questions/search", params={"q": "contrato plazo"}).json()["total"] == 1
+    assert searchable.get("/questions/search", params={"q": "cuantos dias"}).json()["total"] == 1
+
+
+def test_search_questions_filters_and_follows_writes(searchable):
+    hard = searchable.get("/questions/search", params={"q": "contrato", "difficulty": "hard"}).json()
+    assert [i["difficulty"] for i in hard["items"]] == ["hard"]
+
+    target = hard["items"][0]
+    searchable.put(f"/questions/{target['id']}", json={"text": "¿Qué es el finiquito?"})
+    assert searchable.get("/questions/search", params={"q": "finiquito"}).json()["total"] == 1
+    assert searchable.get("/questions/search", params={"q": "contrato"}).json()["total"] == 1
+
+    searchable.delete(f"/questions/{target['id']}")
+    assert searchable.get("/questions/search", params={"q": "finiquito"}).json()["total"] == 0
+
+
+def test_search_questions_requires_terms(searchable):
+    assert searchable.get("/questions/search", params={"q": "¿?"}).status_code == 400
+
+
+@pytest.mark.query_budget(4)
+def test_question_lists_load_options_without_n_plus_one(admin_client, db_session):
+    from app.modules.questions.models import DifficultyLevel, Option
+
+    db_session.add_all([
+        Question(text=f"¿Listado {i}?", difficulty=DifficultyLevel.EASY, options=[
+            Option(text="a", is_correct=True), Option(text="b"), Option(text="c"),
+        ])
+        for i in range(15)
+    ])
+    db_session.commit()
+
+    page = admin_client.get("/questions/", params={"per_page": 15}).json()
+    assert len(page["items"]) == 15 and all(len(q["options"]) == 3 for q in page["items"])
+    cursor_page = admin_client.get("/questions/cursor", params={"per_page": 15}).json()
+    assert all(len(q["options"]) == 3 for q in cursor_page["items"])
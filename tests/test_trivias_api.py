@@ -0,0 +1,253 @@
+"""
+Tests de creación de trivias y sus asignaciones vía HTTP.
+Archivo: tests/test_trivias_api.py
+"""
+import time
+
+import pytest
+
+from app.core.security import create_access_token
+from app.main import app
+from app.modules.questions.models import Question, Option, DifficultyLevel
+from app.modules.trivias.jobs import AssignmentQueue, get_assignment_queue
+from app.modules.trivias.models import TriviaAssignment
+from app.modules.users.models import User, UserRole
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def trivia_data(db_session):
+    """Un admin, una pregunta y 5 jugadores (uno de ellos eliminado)."""
+    admin = User(full_name="Admin", email="admin@trivias.com", hashed_password="x", role=UserRole.ADMIN)
+    question = Question(text="¿Cuánto es 1 + 1?", difficulty=DifficultyLevel.EASY, options=[
+        Option(text="2", is_correct=True),
+        Option(text="3", is_correct=False),
+    ])
+    players = [
+        User(full_name=f"Player {i}", email=f"player{i}@trivias.com", hashed_password="x", role=UserRole.PLAYER)
+        for i in range(5)
+    ]
+    players[-1].soft_delete()
+    db_session.add_all([admin, question, *players])
+    db_session.commit()
+    return {"question": question, "players": players}
+
+
+@pytest.fixture
+def admin_client(client, trivia_data):
+    client.cookies.set("access_token", create_access_token({"sub": "admin@trivias.com", "role": "admin"}))
+    return client
+
+
+def test_create_trivia_with_user_ids_assigns_inline(admin_client, trivia_data, db_session):
+    players = trivia_data["players"]
+    response = admin_client.post("/trivias/", json={
+        "name": "Trivia Chica",
+        "question_ids": [trivia_data["question"].id],
+        "user_ids": [players[0].id, players[1].id, players[-1].id],
+    })
+
+    assert response.status_code == 201
+    job = response.json()["assignment_job"]
+    # El usuario eliminado no se asigna
+    assert job["status"] == "done"
+    assert (job["total"], job["inserted"], job["progress"]) == (2, 2, 100.0)
+    assert db_session.query(TriviaAssignment).filter_by(trivia_id=response.json()["id"]).count() == 2
+
+
+def test_create_trivia_for_all_players_runs_in_background(admin_client, trivia_data, db_session):
+    """Sobre el límite en línea, las asignaciones se crean por tramos en un worker."""
+    queue = AssignmentQueue(TestingSessionLocal, workers=1, chunk_size=2, inline_limit=0)
+    app.dependency_overrides[get_assignment_queue] = lambda: queue
+    try:
+        response = admin_client.post("/trivias/", json={
+            "name": "Trivia Empresa",
+            "question_ids": [trivia_data["question"].id],
+            "assign_all_players": True,
+        })
+        assert response.status_code == 201
+        job_id = response.json()["assignment_job"]["id"]
+
+        for _ in range(50):
+            job = admin_client.get(f"/trivias/assignment-jobs/{job_id}").json()
+            if job["status"] == "done":
+                break
+            time.sleep(0.05)
+    finally:
+        queue.shutdown()
+        del app.dependency_overrides[get_assignment_queue]
+
+    assert job["status"] == "done"
+    assert (job["total"], job["processed"], job["inserted"]) == (4, 4, 4)
+    assigned = {a.user_id for a in db_session.query(TriviaAssignment).filter_by(trivia_id=job["trivia_id"])}
+    assert assigned == {p.id for p in trivia_data["players"][:4]}
+
+
+def test_create_trivia_requires_a_single_target(admin_client, trivia_data):
+    response = admin_client.post("/trivias/", json={
+        "name": "Sin destinatarios",
+        "question_ids": [trivia_data["question"].id],
+    })
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("assignee_filter", [{}, {"role": "admin"}])
+def test_assignee_filter_requires_a_player_criterion(admin_client, trivia_data, assignee_filter):
+    response = admin_client.post("/trivias/", json={
+        "name": "Filtro inválido",
+        "question_ids": [trivia_data["question"].id],
+        "assignee_filter": assignee_filter,
+    })
+    assert response.status_code == 422
+
+
+def test_assignee_filter_by_domain_escapes_wildcards_and_skips_admins(admin_client, trivia_data, db_session):
+    db_session.add(User(full_name="Comodín", email="x@triviasXcom.org", hashed_password="x"))
+    db_session.commit()
+
+    # "_" no es comodín: solo coincide el dominio literal (el admin comparte dominio y se excluye)
+    job = admin_client.post("/trivias/", json={
+        "name": "Trivia Dominio",
+        "question_ids": [trivia_data["question"].id],
+        "assignee_filter": {"email_domain": "trivias.com"},
+    }).json()["assignment_job"]
+    assert (job["total"], job["inserted"]) == (4, 4)
+
+    job = admin_client.post("/trivias/", json={
+        "name": "Trivia Comodines",
+        "question_ids": [trivia_data["question"].id],
+        "assignee_filter": {"email_domain": "trivias_com%"},
+    }).json()["assignment_job"]
+    assert job["total"] == 0
+
+
+def test_user_ids_are_sent_per_chunk(trivia_data, db_session):
+    """Cada tramo solo consulta sus propios ids (no la lista completa)."""
+    from sqlalchemy import event
+    from app.modules.trivias.repository import TriviaRepository
+    from tests.conftest import engine
+
+    players = trivia_data["players"]
+    target = {"user_ids": sorted(p.id for p in players)}  # Incluye al eliminado
+    repository = TriviaRepository(db_session)
+    assert repository.count_assignees(target) == 4
+
+    statements = []
+    capture = lambda conn, cursor, statement, parameters, context, executemany: statements.append(parameters)
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        chunks, after = [], 0
+        while True:
+            covered, inserted, upper = repository.assign_chunk(1, target, after, chunk_size=2)
+            chunks.append((covered, inserted))
+            if upper is None:
+                break
+            after = upper
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    db_session.rollback()
+
+    assert chunks == [(2, 2), (2, 2), (0, 0)]
+    assert statements and not any(set(target["user_ids"]) <= set(p) for p in statements)
+
+
+def test_add_assignees_skips_users_already_assigned(admin_client, trivia_data, db_session):
+    players = trivia_data["players"]
+    created = admin_client.post("/trivias/", json={
+        "name": "Trivia Onboarding",
+        "question_ids": [trivia_data["question"].id],
+        "user_ids": [players[0].id, players[1].id],
+    }).json()
+
+    response = admin_client.post(f"/trivias/{created['id']}/assignees", json={"assign_all_players": True})
+
+    assert response.status_code == 200
+    job = response.json()
+    assert job["status"] == "done"
+    assert (job["processed"], job["inserted"], job["skipped"]) == (4, 2, 2)
+    assert db_session.query(TriviaAssignment).filter_by(trivia_id=created["id"]).count() == 4
+
+
+def test_add_assignees_to_missing_trivia_returns_404(admin_client, trivia_data):
+    response = admin_client.post("/trivias/999999/assignees", json={"user_ids": [1]})
+    assert response.status_code == 404
+
+
+def test_usage_counters_follow_assignments(admin_client, trivia_data, db_session):
+    players = trivia_data["players"]
+    question = trivia_data["question"]
+    spare = Question(text="¿Sin usar?", difficulty=DifficultyLevel.EASY, options=[Option(text="a", is_correct=True)])
+    db_session.add(spare)
+    db_session.commit()
+
+    trivia = admin_client.post("/trivias/", json={
+        "name": "Trivia Contadores",
+        "question_ids": [question.id],
+        "user_ids": [players[0].id, players[1].id],
+    }).json()
+    db_session.expire_all()
+    assert (players[0].pending_assignments, players[2].pending_assignments) == (1, 0)
+
+    # Con asignaciones pendientes no se puede eliminar ni la pregunta ni el usuario
+    assert admin_client.delete(f"/questions/{question.id}").status_code == 409
+    assert admin_client.delete(f"/users/{players[0].id}").status_code == 409
+    report = admin_client.post("/questions/deletable", json={"question_ids": [question.id, spare.id, 999999]}).json()
+    assert report == {
+        "deletable": [spare.id],
+        "blocked": [{"id": question.id, "pending_assignments": 2}],
+        "not_found": [999999],
+    }
+
+    # Eliminar la trivia cancela sus asignaciones pendientes y libera los contadores
+    assert admin_client.delete(f"/trivias/{trivia['id']}").status_code == 200
+    db_session.expire_all()
+    assert players[0].pending_assignments == 0
+    assert admin_client.delete(f"/users/{players[0].id}").status_code == 200
+    assert admin_client.delete(f"/questions/{question.id}").status_code == 200
+
+
+def test_completing_and_moving_questions_update_counters(admin_client, trivia_data, db_session):
+    from sqlalchemy import event
+    from app.modules.game.repository import GameRepository
+    from app.modules.questions.repository import QuestionRepository
+    from app.modules.trivias.repository import TriviaRepository
+    from tests.conftest import engine
+
+    players = trivia_data["players"]
+    question = trivia_data["question"]
+    other = Question(text="¿Otra?", difficulty=DifficultyLevel.EASY, options=[Option(text="a", is_correct=True)])
+    db_session.add(other)
+    db_session.commit()
+    trivia = admin_client.post("/trivias/", json={
+        "name": "Trivia Cambios",
+        "question_ids": [question.id],
+        "user_ids": [players[0].id, players[1].id],
+    }).json()
+    usage = lambda: dict(QuestionRepository(db_session).get_usage([question.id, other.id]))
+
+    # Cambiar las preguntas traslada las asignaciones pendientes
+    admin_client.put(f"/trivias/{trivia['id']}", json={"question_ids": [other.id]})
+    assert usage() == {question.id: 0, other.id: 2}
+
+    # Completar solo actualiza la fila del jugador, no las preguntas de la trivia
+    statements = []
+    capture = lambda conn, cursor, statement, parameters, context, executemany: statements.append(statement)
+    assignment = db_session.query(TriviaAssignment).filter_by(trivia_id=trivia["id"], user_id=players[0].id).one()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        GameRepository(db_session).complete_assignment(assignment, score=1)
+        db_session.commit()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert not any(s.startswith("UPDATE questions") for s in statements)
+
+    db_session.expire_all()
+    counters = (players[0].pending_assignments, players[1].pending_assignments)
+    assert counters == (0, 1)
+    assert usage()[other.id] == 1
+
+    # El recálculo completo coincide con los contadores incrementales
+    TriviaRepository(db_session).rebuild_usage_counters()
+    db_session.commit()
+    db_session.expire_all()
+    assert (players[0].pending_assignments, players[1].pending_assignments) == counters